@@ -0,0 +1,10 @@
+"""
+Benchmarks for Script Runner Pro.
+
+    python -m benchmarks [--quick] [--suite NAME ...] [--output results.json]
+    python -m benchmarks --compare old.json new.json
+
+Runs headless: Qt uses the offscreen platform and all settings, logs and
+catalogs live in a temporary directory. See benchmarks/run.py for what is
+measured.
+"""
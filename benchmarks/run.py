@@ -0,0 +1,485 @@
+"""
+Benchmark runner for Script Runner Pro.
+
+Suites:
+
+  catalog    save and load time of the JSON and SQLite catalog stores, the
+             time to save a single edit, and list model population
+  search     trigram index build time and query latency, directly and through
+             the GUI's search thread including the list model update
+  output     lines/s delivered to the output widget and UI event-loop latency
+             while synthetic scripts print, through the real main window;
+             fails if the latency is over LOOP_LATENCY_LIMITS_MS
+  logsearch  search and filter time over a large run log
+  archive    archiving a large run log, compression ratio, line and time
+             seek latency, tail and grep over the archive
+
+Catalog and search suites run for catalogs of 1k, 10k and 100k entries
+(--sizes). Qt parts run on the offscreen platform; without PyQt5 they are
+skipped and the rest still runs. Results are JSON; --compare prints the
+change of every metric between two result files.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from .synthetic import (make_catalog, output_entry, write_catalog_json, write_log,
+                        write_output_script)
+
+SUITES = ["catalog", "search", "output", "logsearch", "archive"]
+DEFAULT_SIZES = [1000, 10000, 100000]
+QUICK_SIZES = [1000, 10000]
+
+SEARCH_QUERIES = ["backup", "backup db", "bakcup", "db", "deploy prod", "monitoring", "zzqqx"]
+SEARCH_REPEAT = 5
+SEEK_REPEAT = 200
+
+# Interval of the timer that measures how late the event loop runs it
+PROBE_INTERVAL_MS = 5
+
+# However fast scripts print, the window must keep responding within these
+LOOP_LATENCY_LIMITS_MS = {"loop_latency_p95_ms": 250, "loop_latency_max_ms": 500}
+
+# Metrics where a bigger number is better; for all others smaller is better
+HIGHER_IS_BETTER = ("_per_s",)
+
+
+def percentiles(samples, scale=1000.0):
+    """p50/p95/max of samples (seconds), in milliseconds by default."""
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "max_ms": None}
+    ordered = sorted(samples)
+
+    def at(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * scale
+
+    return {"p50_ms": at(0.5), "p95_ms": at(0.95), "max_ms": ordered[-1] * scale}
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def qt_application():
+    """The QApplication, created on the offscreen platform; None without PyQt5."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PyQt5.QtWidgets import QApplication
+    except ImportError:
+        return None
+    return QApplication.instance() or QApplication(["benchmarks"])
+
+
+def run_until(predicate, timeout):
+    """Run the Qt event loop until predicate() is true; returns whether it became so."""
+    from PyQt5.QtCore import QEventLoop, QTimer
+
+    loop = QEventLoop()
+    check = QTimer()
+    check.timeout.connect(lambda: predicate() and loop.quit())
+    check.start(5)
+    QTimer.singleShot(int(timeout * 1000), loop.quit)
+    if not predicate():
+        loop.exec_()
+    check.stop()
+    return predicate()
+
+
+class LatencyProbe:
+    """Measures how late a fast repeating timer fires: the UI event-loop latency."""
+
+    def __init__(self, interval_ms=PROBE_INTERVAL_MS):
+        from PyQt5.QtCore import Qt, QTimer
+
+        self.interval = interval_ms / 1000
+        self.timer = QTimer()
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.tick)
+        self.delays = []
+        self.last = None
+
+    def start(self):
+        self.delays = []
+        self.last = time.perf_counter()
+        self.timer.start()
+
+    def tick(self):
+        now = time.perf_counter()
+        self.delays.append(max(0.0, now - self.last - self.interval))
+        self.last = now
+
+    def stop(self):
+        self.timer.stop()
+        return {f"loop_latency_{key}": value for key, value in percentiles(self.delays).items()}
+
+
+def bench_catalog(sizes, work, app):
+    from script_runner_gui.store import open_store
+
+    results = {}
+    for size in sizes:
+        catalog = make_catalog(size)
+        first = next(iter(catalog))
+        for backend, suffix in (("json", ".json"), ("sqlite", ".db")):
+            path = os.path.join(work, f"catalog-{size}{suffix}")
+            store = open_store(path)
+            store.load()
+            for name, info in catalog.items():
+                store.put(name, info)
+            save_s, _ = timed(store.flush)
+            store.close()
+
+            loaded = open_store(path)
+            load_s, data = timed(loaded.load)
+            assert len(data) == size
+            loaded.put(first, dict(data[first], category="Edited"))
+            edit_save_s, _ = timed(loaded.flush)
+            loaded.close()
+            results[f"{backend}_{size}"] = {"save_s": save_s, "load_s": load_s,
+                                            "edit_save_s": edit_save_s,
+                                            "file_bytes": os.path.getsize(path)}
+        if app is not None:
+            from script_runner_gui.catalog_model import ScriptListModel
+
+            model = ScriptListModel()
+            results[f"model_{size}"] = {"load_s": timed(model.load, catalog)[0]}
+    return results
+
+
+def bench_search(sizes, app):
+    from script_runner_gui.search import SearchIndex
+
+    results = {}
+    for size in sizes:
+        catalog = make_catalog(size)
+        index = SearchIndex()
+        build_s, _ = timed(index.rebuild, catalog)
+        latencies = []
+        hits = {}
+        for query in SEARCH_QUERIES:
+            for _ in range(SEARCH_REPEAT):
+                elapsed, names = timed(index.search, query)
+                latencies.append(elapsed)
+            hits[query] = len(names)
+        result = {"index_build_s": build_s, "queries": len(latencies), "hits": hits}
+        result.update({f"query_{key}": value for key, value in percentiles(latencies).items()})
+        if app is not None:
+            result.update(_gui_search_latency(catalog, index))
+        results[str(size)] = result
+    return results
+
+
+def _gui_search_latency(catalog, index):
+    """Search thread round trip plus list model update, as the GUI does it."""
+    from script_runner_gui.catalog_model import ScriptListModel
+    from script_runner_gui.gui import SearchThread
+
+    model = ScriptListModel()
+    model.load(catalog)
+    thread = SearchThread(index)
+    thread.start()
+    latencies = []
+    done = []
+
+    def on_results(generation, names):
+        model.set_filter(names)
+        done.append(time.perf_counter())
+
+    thread.results_ready.connect(on_results)
+    try:
+        for generation, query in enumerate(SEARCH_QUERIES * SEARCH_REPEAT, 1):
+            start = time.perf_counter()
+            thread.search(generation, query)
+            if not run_until(lambda: len(done) >= generation, 30):
+                raise RuntimeError(f"search for '{query}' did not finish")
+            latencies.append(done[-1] - start)
+    finally:
+        thread.stop()
+    return {f"gui_search_{key}": value for key, value in percentiles(latencies).items()}
+
+
+def output_scenarios(quick):
+    """name -> [(lines, rate, width, stderr_every)] of scripts run at once."""
+    scale = 10 if quick else 1
+    return {
+        "flood": [(500000 // scale, 0, 80, 0)],
+        "flood_stderr_mix": [(200000 // scale, 0, 80, 10)],
+        "steady_20k_per_s": [(60000 // scale, 20000, 80, 0)],
+        "parallel_4x_flood": [(200000 // scale, 0, 80, 0)] * 4,
+        "long_lines": [(20000 // scale, 0, 2000, 0)],
+    }
+
+
+def bench_output(work, app, quick):
+    if app is None:
+        return {"skipped": "PyQt5 is not installed"}
+    script = write_output_script(work)
+    scenarios = output_scenarios(quick)
+    catalog = {}
+    for scenario, workloads in scenarios.items():
+        for number, workload in enumerate(workloads):
+            catalog[f"{scenario}_{number}"] = output_entry(script, *workload)
+    catalog_path = os.path.join(work, "output-catalog.json")
+    write_catalog_json(catalog, catalog_path)
+    os.environ["SCRIPT_RUNNER_CATALOG"] = catalog_path
+
+    from script_runner_gui.gui import ScriptRunnerGUI
+
+    window = ScriptRunnerGUI()
+    window.show()
+    if not run_until(lambda: window.store is not None, 30):
+        raise RuntimeError("the main window did not load its catalog")
+    finished = set()
+    window.engine_signals.run_finished.connect(lambda run_id, code: finished.add(run_id))
+    probe = LatencyProbe()
+
+    probe.start()
+    run_until(lambda: False, 1.0)
+    results = {"idle": probe.stop()}
+    try:
+        for scenario, workloads in scenarios.items():
+            results[scenario] = _run_output_scenario(window, scenario, workloads, finished, probe)
+    finally:
+        window.close()
+    return results
+
+
+def _run_output_scenario(window, scenario, workloads, finished, probe):
+    delivered = {"lines": 0, "insert_s": 0.0}
+
+    def instrument(pane):
+        append_segments = pane.append_segments
+
+        def counted(segments):
+            start = time.perf_counter()
+            append_segments(segments)
+            delivered["insert_s"] += time.perf_counter() - start
+            # Script output only, not the console's own messages
+            delivered["lines"] += sum(text.count('\n') for stream, _, text in segments
+                                      if stream is not None)
+
+        pane.append_segments = counted
+
+    probe.start()
+    start = time.perf_counter()
+    run_ids = []
+    for number in range(len(workloads)):
+        window.current_script = f"{scenario}_{number}"
+        window.run_script()
+        run_id = window.current_run_id()
+        instrument(window.output_panes[run_id])
+        run_ids.append(run_id)
+    completed = run_until(lambda: all(run_id in finished for run_id in run_ids), 600)
+    elapsed = time.perf_counter() - start
+    result = probe.stop()
+    expected = sum(lines for lines, _, _, _ in workloads)
+    result.update({
+        "completed": completed,
+        "lines_expected": expected,
+        "lines_delivered": delivered["lines"],
+        "elapsed_s": elapsed,
+        "lines_per_s": delivered["lines"] / elapsed if elapsed else None,
+        "widget_insert_s": delivered["insert_s"],
+        "widget_busy_pct": 100 * delivered["insert_s"] / elapsed if elapsed else None,
+    })
+    for run_id in run_ids:
+        pane = window.output_panes.get(run_id)
+        if pane is not None:
+            window.close_output_tab(window.output_tabs.indexOf(pane))
+    return result
+
+
+def loop_latency_failures(output_results):
+    """Describe the output scenarios whose event-loop latency is over the limits."""
+    failures = []
+    for scenario, result in output_results.items():
+        if not isinstance(result, dict):
+            continue
+        for metric, limit in LOOP_LATENCY_LIMITS_MS.items():
+            value = result.get(metric)
+            if value is not None and value > limit:
+                failures.append(f"output {scenario}: {metric} is {value:.0f}, over {limit}")
+    return failures
+
+
+def bench_logsearch(work, quick):
+    from script_runner_gui.logsearch import LogSearch, Query
+
+    lines = 500000 if quick else 5000000
+    path = os.path.join(work, "build.log")
+    write_log(path, lines, needle_every=lines // 3)
+    queries = {
+        "find_rare": Query(find="error"),
+        "find_rare_case": Query(find="ERROR", case_sensitive=True),
+        "find_regex": Query(find=r"exit status \d+", regex=True),
+        "include_rare": Query(include="ERROR|WARN", regex=True),
+        "exclude_dense": Query(exclude="INFO"),
+        "include_dense_find": Query(include="info", find="target 5 "),
+    }
+    results = {"lines": lines, "log_bytes": os.path.getsize(path)}
+    for name, query in queries.items():
+        search = LogSearch(path, query, 'utf-8')
+        elapsed, _ = timed(search.update, True)
+        view = search.view()
+        results[name] = {"scan_s": elapsed, "lines_per_s": lines / elapsed if elapsed else None,
+                         "rows": view.row_count, "matches": view.match_count}
+    return results
+
+
+def bench_archive(work, quick):
+    from script_runner_gui.archive import LogArchive, grep_archives
+
+    lines = 500000 if quick else 5000000
+    path = os.path.join(work, "20240101-000000-1-build.log")
+    write_log(path, lines, needle_every=lines // 3)
+    size = os.path.getsize(path)
+    # One mark per MB, as if the log had been written over size / 1 MB seconds
+    marks = [(offset, 1000.0 + offset / (1024 * 1024)) for offset in range(0, size, 1024 * 1024)]
+    archive = LogArchive(os.path.join(work, "archive"))
+    elapsed, archived = timed(archive.add, path, marks)
+    results = {"lines": lines, "log_bytes": size, "stored_bytes": archived.stored_size,
+               "archive_s": elapsed, "archive_mb_per_s": size / elapsed / 1024 / 1024}
+
+    rng = random.Random(0)
+    line_samples = [timed(next, archived.lines(rng.randrange(lines)))[0]
+                    for _ in range(SEEK_REPEAT)]
+    times = [rng.uniform(1000.0, marks[-1][1]) for _ in range(SEEK_REPEAT)]
+    time_samples = [timed(next, archived.lines(archived.line_at(when)))[0] for when in times]
+    results["seek_line"] = percentiles(line_samples)
+    results["seek_time"] = percentiles(time_samples)
+    results["tail_100_ms"] = timed(archived.tail, 100)[0] * 1000
+    elapsed, hits = timed(lambda: sum(1 for _ in grep_archives([archived], r"exit status \d+")))
+    results["grep"] = {"scan_s": elapsed, "lines_per_s": lines / elapsed, "matches": hits}
+    return results
+
+
+def flatten(results, prefix=""):
+    """{"a": {"b": 1}} -> {"a.b": 1}, numbers only."""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(old_path, new_path, threshold):
+    """Print every metric of both files with its change; returns 1 on regressions."""
+    with open(old_path, encoding='utf-8') as file:
+        old = flatten(json.load(file)["results"])
+    with open(new_path, encoding='utf-8') as file:
+        new = flatten(json.load(file)["results"])
+    regressions = 0
+    print(f"{'metric':<60} {'old':>14} {'new':>14} {'change':>9}")
+    for name in sorted(set(old) & set(new)):
+        before, after = old[name], new[name]
+        change = (after - before) / before * 100 if before else 0.0
+        worse = -change if name.endswith(HIGHER_IS_BETTER) else change
+        timing = name.endswith(("_s", "_ms", "_per_s", "_pct"))
+        flag = " !" if timing and worse > threshold else ""
+        regressions += bool(flag)
+        print(f"{name:<60} {before:>14.4g} {after:>14.4g} {change:>+8.1f}%{flag}")
+    for name in sorted(set(new) - set(old)):
+        print(f"{name:<60} {'':>14} {new[name]:>14.4g}      new")
+    if regressions:
+        print(f"\n{regressions} metrics regressed by more than {threshold:g}%")
+    return 1 if regressions else 0
+
+
+def describe_environment(app):
+    info = {"python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count()}
+    from script_runner_gui.archive import available_codec
+
+    info["archive_codec"] = available_codec()
+    if app is not None:
+        from PyQt5.QtCore import PYQT_VERSION_STR, QT_VERSION_STR
+
+        info.update({"qt": QT_VERSION_STR, "pyqt": PYQT_VERSION_STR,
+                     "qt_platform": app.platformName()})
+    try:
+        info["git_commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        info["git_commit"] = None
+    return info
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="benchmarks", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--suite", action="append", choices=SUITES,
+                        help="run only this suite (repeatable; default: all)")
+    parser.add_argument("--sizes", type=lambda text: [int(size) for size in text.split(",")],
+                        help="catalog sizes, comma separated (default: 1000,10000,100000)")
+    parser.add_argument("--quick", action="store_true",
+                        help="smaller workloads, for a fast check")
+    parser.add_argument("-o", "--output", default="benchmark-results.json",
+                        help="where to write the results (default: benchmark-results.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="percentage change flagged as a regression (default: 10)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.compare:
+        return compare(args.compare[0], args.compare[1], args.threshold)
+
+    suites = args.suite or SUITES
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    work = tempfile.mkdtemp(prefix="script-runner-bench-")
+    # Keep settings, history, logs and caches away from the user's own
+    os.environ["SCRIPT_RUNNER_HOME"] = os.path.join(work, "home")
+    app = qt_application()
+    if app is None:
+        print("PyQt5 is not installed: skipping the Qt parts", file=sys.stderr)
+
+    from script_runner_gui import __version__
+
+    report = {"version": __version__, "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "environment": describe_environment(app), "options": {
+                  "suites": suites, "sizes": sizes, "quick": args.quick}, "results": {}}
+    try:
+        for suite in suites:
+            print(f"Running {suite}...", file=sys.stderr)
+            start = time.perf_counter()
+            if suite == "catalog":
+                result = bench_catalog(sizes, work, app)
+            elif suite == "search":
+                result = bench_search(sizes, app)
+            elif suite == "output":
+                result = bench_output(work, app, args.quick)
+            elif suite == "logsearch":
+                result = bench_logsearch(work, args.quick)
+            else:
+                result = bench_archive(work, args.quick)
+            report["results"][suite] = result
+            print(f"  done in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    for name, value in flatten(report["results"]).items():
+        print(f"{name:<60} {value:>14.4g}")
+    print(f"\nResults written to {args.output}", file=sys.stderr)
+    failures = loop_latency_failures(report["results"].get("output", {}))
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    return 1 if failures else 0
@@ -0,0 +1,102 @@
+"""
+Synthetic workloads for the benchmarks: scripts that print at a given
+rate, catalogs of any size and large log files.
+"""
+
+import json
+import os
+import random
+
+# Run as: python output_script.py LINES RATE WIDTH STDERR_EVERY
+# RATE is lines per second, 0 for as fast as possible; every STDERR_EVERY-th
+# line goes to stderr (0 for none).
+OUTPUT_SCRIPT = '''\
+import sys
+import time
+
+lines, rate, width, stderr_every = (int(arg) for arg in sys.argv[1:5])
+filler = "x" * max(0, width - 16)
+batch = max(1, rate // 100) if rate else 1000
+start = time.perf_counter()
+written = 0
+while written < lines:
+    out = []
+    err = []
+    for number in range(written, min(lines, written + batch)):
+        line = f"line {number:>10} {filler}\\n"
+        (err if stderr_every and number % stderr_every == 0 else out).append(line)
+    written = min(lines, written + batch)
+    if out:
+        sys.stdout.write("".join(out))
+        sys.stdout.flush()
+    if err:
+        sys.stderr.write("".join(err))
+        sys.stderr.flush()
+    if rate:
+        delay = start + written / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+'''
+
+CATEGORIES = ["Automation", "Backup", "Build", "Deploy", "Maintenance", "Monitoring",
+              "Reports", "Testing", "Utilities", "Data"]
+VERBS = ["backup", "sync", "deploy", "clean", "check", "export", "import", "build", "rotate",
+         "report", "scan", "update", "restart", "archive", "migrate"]
+NOUNS = ["db", "logs", "cache", "users", "invoices", "server", "images", "config", "metrics",
+         "mail", "queue", "index", "assets", "tickets", "backups"]
+TYPES = [("Python", ".py"), ("Shell", ".sh"), ("PowerShell", ".ps1"), ("Batch", ".bat")]
+
+
+def write_output_script(directory):
+    path = os.path.join(directory, "output_script.py")
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(OUTPUT_SCRIPT)
+    return path
+
+
+def output_entry(script_path, lines, rate=0, width=80, stderr_every=0, category="Benchmark"):
+    """Catalog entry running the output script with the given workload."""
+    return {"path": script_path, "type": "Python", "category": category,
+            "args": [str(lines), str(rate), str(width), str(stderr_every)]}
+
+
+def make_catalog(count, root="/srv/scripts", seed=0):
+    """A catalog of count plausible entries (the files don't exist)."""
+    rng = random.Random(seed)
+    catalog = {}
+    for number in range(count):
+        verb = rng.choice(VERBS)
+        noun = rng.choice(NOUNS)
+        category = rng.choice(CATEGORIES)
+        script_type, suffix = rng.choice(TYPES)
+        name = f"{verb}_{noun}_{number}"
+        info = {"path": os.path.join(root, category.lower(), f"{verb}_{noun}_{number}{suffix}"),
+                "type": script_type, "category": category}
+        if rng.random() < 0.3:
+            info["args"] = ["--env", rng.choice(["dev", "staging", "prod"])]
+        catalog[name] = info
+    return catalog
+
+
+def write_catalog_json(catalog, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(catalog, file)
+
+
+def write_log(path, lines, needle_every=0, seed=0):
+    """A build-log-like file; every needle_every-th line is an ERROR line."""
+    rng = random.Random(seed)
+    steps = ["compiling", "linking", "copying", "testing", "packaging"]
+    with open(path, 'wb') as file:
+        batch = []
+        for number in range(lines):
+            if needle_every and number % needle_every == needle_every // 2:
+                line = f"ERROR: step {number} failed: exit status {rng.randint(1, 255)}\n"
+            else:
+                line = (f"[{number:>9}] INFO {rng.choice(steps)} target {number % 997} "
+                        f"of module m{number % 113}.c\n")
+            batch.append(line)
+            if len(batch) >= 10000:
+                file.write(''.join(batch).encode('utf-8'))
+                batch = []
+        file.write(''.join(batch).encode('utf-8'))
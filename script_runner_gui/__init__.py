@@ -6,23 +6,24 @@ A modern script management and execution tool for Windows.
 __version__ = "2.0.0"
 __author__ = "Script Runner Pro Team"
 
-def main():
+def main(argv=None):
     """Entry point for the application."""
     import sys
-    import os
-    
-    # Add the parent directory to the path so we can import the main module
-    parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    sys.path.insert(0, parent_dir)
-    
-    from script_runner_gui import ScriptRunnerGUI
+    from .profiling import StartupProfiler
+
+    argv = list(sys.argv if argv is None else argv)
+    profiler = StartupProfiler.from_argv(argv)
+
     from PyQt5.QtWidgets import QApplication
+    profiler.mark("import PyQt5")
+    from .gui import ScriptRunnerGUI
+    profiler.mark("import gui")
     
-    app = QApplication(sys.argv)
+    app = QApplication(argv)
     app.setApplicationName("Script Runner Pro")
     app.setApplicationVersion(__version__)
+    profiler.mark("create application")
     
-    ex = ScriptRunnerGUI()
+    ex = ScriptRunnerGUI(profiler=profiler if profiler.enabled else None)
     ex.show()
     sys.exit(app.exec_())
-
@@ -1,9 +1,16 @@
 """
 Script Runner Pro - Main module entry point
+
+Without arguments the GUI is started; with arguments the headless CLI
+handles them (see script_runner_gui.cli).
 """
 
+import sys
+
 from . import main
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1 and not sys.argv[1].startswith('--profile-startup'):
+        from .cli import main as cli_main
+        sys.exit(cli_main())
     main()
-
@@ -0,0 +1,239 @@
+"""
+Worker agent for Script Runner Pro.
+
+Started with
+
+    python -m script_runner_gui agent [--listen HOST:PORT] [--slots N] [--token TOKEN]
+
+the agent runs the catalog entries consoles send it (see remote.py for the
+protocol) on one ExecutionEngine, at most `slots` at a time; further runs
+queue on the agent. The server shares the engine's event loop, so a run's
+output goes from its pipe to the console's socket without changing
+threads, and a console that can't keep up pauses the pipes of its runs.
+"""
+
+import asyncio
+import hmac
+import os
+import socket
+
+from .commands import build_command, build_env, warm_job, working_dir
+from .engine import STDERR, ExecutionEngine
+from .remote import (CANCEL, ERROR, EXIT, HELLO, PROTOCOL_VERSION, RUN, STATUS, STDERR as
+                     STDERR_FRAME, STDOUT as STDOUT_FRAME, WELCOME, FrameDecoder, ProtocolError,
+                     decode_message, write_frame, write_message)
+
+# Seconds between unsolicited status frames (free slots and load average)
+STATUS_INTERVAL = 2
+
+
+def load_average():
+    try:
+        return os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+
+
+class _Connection(asyncio.Protocol):
+    """One console connected to the agent."""
+
+    def __init__(self, agent):
+        self.agent = agent
+        self.transport = None
+        self.decoder = FrameDecoder()
+        self.authenticated = False
+        self.paused = False
+        self.channels = {}      # channel -> run id
+        self.received = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        try:
+            for kind, channel, payload in self.decoder.feed(data):
+                self._handle(kind, channel, payload)
+        except ProtocolError as e:
+            self.fail(str(e))
+
+    def connection_lost(self, exc):
+        self.agent.connections.discard(self)
+        self.transport = None
+        # Nobody is left to read the output
+        for run_id in list(self.channels.values()):
+            self.agent.engine.cancel(run_id)
+
+    def pause_writing(self):
+        # The console reads slower than the scripts write: stop reading
+        # their pipes until the send buffer drains
+        self.paused = True
+        for run_id in self.channels.values():
+            run = self.agent.engine.get_run(run_id)
+            if run is not None:
+                self.agent.engine.set_output_paused(run, True)
+
+    def resume_writing(self):
+        self.paused = False
+        for run_id in self.channels.values():
+            run = self.agent.engine.get_run(run_id)
+            if run is not None:
+                self.agent.engine.set_output_paused(run, False)
+
+    def send(self, kind, channel=0, payload=None, message=None):
+        if self.transport is None or self.transport.is_closing():
+            return
+        if message is not None:
+            write_message(self.transport, kind, channel, message)
+        else:
+            write_frame(self.transport, kind, channel, payload or b'')
+
+    def fail(self, message):
+        self.send(ERROR, 0, message={"message": message})
+        if self.transport is not None:
+            self.transport.close()
+
+    def _handle(self, kind, channel, payload):
+        if not self.authenticated:
+            if kind != HELLO:
+                raise ProtocolError("Expected a HELLO frame")
+            self._hello(decode_message(payload))
+        elif kind == RUN:
+            self._run(channel, decode_message(payload))
+        elif kind == CANCEL:
+            run_id = self.channels.get(channel)
+            if run_id is not None:
+                self.agent.engine.cancel(run_id)
+        else:
+            raise ProtocolError(f"Unexpected frame kind {kind}")
+
+    def _hello(self, message):
+        if message.get("protocol") != PROTOCOL_VERSION:
+            raise ProtocolError(f"Protocol {message.get('protocol')} is not supported "
+                                f"(agent speaks {PROTOCOL_VERSION})")
+        token = self.agent.token
+        if token and not hmac.compare_digest(str(message.get("token", '')).encode(),
+                                             token.encode()):
+            raise ProtocolError("Invalid agent token")
+        self.authenticated = True
+        self.agent.connections.add(self)
+        self.send(WELCOME, message={"protocol": PROTOCOL_VERSION, "host": socket.gethostname(),
+                                    "slots": self.agent.engine.max_workers,
+                                    "cpus": os.cpu_count() or 1})
+        self.send(STATUS, message=self.agent.status(self))
+
+    def _run(self, channel, message):
+        self.received += 1
+        job = message.get("job")
+        name = message.get("name") or "script"
+        if not isinstance(job, dict) or not isinstance(job.get("path"), str):
+            self.send(ERROR, channel, message={"message": "Malformed run request"})
+        elif not os.path.exists(job["path"]):
+            self.send(STDERR_FRAME, channel,
+                      f"Script file not found on {socket.gethostname()}: {job['path']}\n".encode())
+            self.send(EXIT, channel, message={"exit_code": -1})
+        else:
+            try:
+                run = self.agent.submit(name, job)
+            except Exception as e:
+                self.send(ERROR, channel, message={"message": f"Could not start {name}: {e}"})
+            else:
+                self.channels[channel] = run.run_id
+                self.agent.runs[run.run_id] = (self, channel)
+        self.agent.status_changed()
+
+
+class Agent:
+    """Runs scripts for remote consoles on an ExecutionEngine with `slots` workers.
+
+    token, if set, must be presented by every console. Python scripts run in
+    warm_pool when one is given.
+    """
+
+    def __init__(self, slots=None, token=None, warm_pool=None):
+        self.token = token
+        self.connections = set()
+        self.runs = {}      # engine run id -> (_Connection, channel)
+        self.server = None
+        self.loop = None
+        self.status_pending = False
+        self.engine = ExecutionEngine(max_workers=slots, warm_pool=warm_pool,
+                                      on_raw_output=self.on_raw_output,
+                                      on_finished=self.on_finished)
+
+    def submit(self, name, job):
+        return self.engine.submit(name, build_command(job), working_dir(job),
+                                  job.get('category', ''), build_env(job), warm_job(job),
+                                  limits=job.get('limits'))
+
+    def serve(self, host, port):
+        """Start listening; returns a concurrent Future that resolves once it is."""
+        return self.engine.run_coroutine(self._serve(host, port))
+
+    async def _serve(self, host, port):
+        self.loop = asyncio.get_event_loop()
+        self.server = await self.loop.create_server(lambda: _Connection(self), host, port)
+        self.loop.create_task(self._report_status())
+        return [sock.getsockname() for sock in self.server.sockets]
+
+    def close(self):
+        """Stop accepting consoles and cancel every run (from any thread)."""
+        self.engine.run_coroutine(self._close()).result()
+        self.engine.shutdown()
+
+    async def _close(self):
+        if self.server is not None:
+            self.server.close()
+        for connection in list(self.connections):
+            connection.transport.close()
+
+    def status(self, connection):
+        running = self.engine.running_count
+        queued = self.engine.queued_count
+        return {"slots": self.engine.max_workers, "running": running, "queued": queued,
+                "free": max(0, self.engine.max_workers - running - queued),
+                "load": load_average(), "received": connection.received}
+
+    def status_changed(self):
+        # Coalesce a burst of starts and finishes into one status frame
+        if not self.status_pending and self.loop is not None:
+            self.status_pending = True
+            self.loop.call_soon_threadsafe(self._send_status)
+
+    def _send_status(self):
+        self.status_pending = False
+        for connection in list(self.connections):
+            connection.send(STATUS, message=self.status(connection))
+
+    async def _report_status(self):
+        while self.server is not None and self.server.sockets:
+            await asyncio.sleep(STATUS_INTERVAL)
+            self._send_status()
+
+    def on_raw_output(self, run, data, stream):
+        # Called on the engine loop for every chunk a run writes
+        target = self.runs.get(run.run_id)
+        if target is None:
+            return
+        connection, channel = target
+        connection.send(STDERR_FRAME if stream == STDERR else STDOUT_FRAME, channel, data)
+        if connection.paused:
+            # Runs that started while the connection was paused
+            self.engine.set_output_paused(run, True)
+
+    def on_finished(self, run):
+        target = self.runs.pop(run.run_id, None)
+        self.engine.forget(run.run_id)
+        if target is not None:
+            connection, channel = target
+            connection.channels.pop(channel, None)
+            if run.timed_out:
+                # The engine reports this through on_output, which the agent
+                # doesn't use; the console shows it like any error
+                timeout = run.limits.get("timeout")
+                connection.send(STDERR_FRAME, channel,
+                                f"Timed out after {timeout:g} s, stopping the script\n".encode())
+            connection.send(EXIT, channel, message={
+                "exit_code": run.exit_code, "cpu_user": run.cpu_user,
+                "cpu_system": run.cpu_system, "max_rss": run.max_rss,
+                "timed_out": run.timed_out})
+        self.status_changed()
@@ -0,0 +1,455 @@
+"""
+Compressed log archive for Script Runner Pro.
+
+Once a run has finished, its log file is archived. The output is cut
+into blocks of about BLOCK_SIZE bytes, cut at line ends, and each block is
+compressed on its own: with gzip, or with zstd when the zstandard package
+is installed. The blocks are written one after the other to
+<log name>.gz (or .zst), so zcat or zstdcat still print the whole
+output.
+
+A sidecar <log name>.idx records where every block starts in the archive
+and in the output, and the number of the line it starts on. It also
+holds one (line, time) mark per second of output, taken as the output
+arrived. Reading line N, or the output from time T on, bisects the index
+and decompresses a block or two, however long the output is.
+grep_archives() searches many archives on all cores.
+
+The plain logs (runlog.py) remain the live copy while a run writes, and
+only the newest max_log_files of them are kept. Archives are kept for
+archive_max_age_days, up to archive_max_mb in total. This module has no
+Qt dependency.
+"""
+
+import bisect
+import concurrent.futures
+import fnmatch
+import json
+import os
+import re
+import struct
+import time
+import zlib
+from array import array
+
+from .runlog import LogPager, _MappedFile, safe_log_name
+
+# Uncompressed bytes per block: a line or time lookup decompresses about this much
+BLOCK_SIZE = 1024 * 1024
+# A block without a line end is cut here, splitting the line
+MAX_BLOCK = 8 * 1024 * 1024
+# Seconds of output between two (line, time) marks
+MARK_INTERVAL = 1.0
+
+INDEX_SUFFIX = '.idx'
+CODECS = {"gzip": (1, '.gz'), "zstd": (2, '.zst')}
+_CODEC_NAMES = {code: name for name, (code, _) in CODECS.items()}
+
+_MAGIC = b'SRLA'
+_VERSION = 1
+# magic, version, codec, meta length, block count, mark count, lines, bytes
+_HEADER = struct.Struct('<4sHBxIIIQQ')
+# archive offset, output offset, compressed size, size, newlines before, starts a line
+_BLOCK = struct.Struct('<QQIIQ?7x')
+# line, time
+_MARK = struct.Struct('<Qd')
+
+# Blocks one grep task decompresses and searches
+GREP_TASK_BLOCKS = 16
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def available_codec(preferred="auto"):
+    """The codec new archives use: zstd if preferred and installed, else gzip."""
+    if preferred in ("auto", "zstd") and _zstandard() is not None:
+        return "zstd"
+    return "gzip"
+
+
+def _compressor(codec, level=None):
+    if codec == "zstd":
+        compressor = _zstandard().ZstdCompressor(level=level or 3)
+        return compressor.compress
+
+    def compress(data):
+        # Each block is a complete gzip member; gzip readers concatenate them
+        compressor = zlib.compressobj(level or 6, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+    return compress
+
+
+def _decompressor(codec):
+    if codec == "zstd":
+        zstandard = _zstandard()
+        if zstandard is None:
+            raise ValueError("Reading zstd log archives needs the zstandard package")
+        return zstandard.ZstdDecompressor().decompress
+    return lambda data: zlib.decompress(data, 31)
+
+
+def _stem_key(stem):
+    # <YYYYmmdd>-<HHMMSS>-<run id>-<name>: newest first, run ids compared as numbers
+    parts = stem.split('-', 3)
+    run_id = int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else 0
+    return '-'.join(parts[:2]), run_id
+
+
+def _stem_matches(stem, pattern):
+    name = stem.split('-', 3)[-1]
+    return (stem == pattern or name == safe_log_name(pattern)
+            or fnmatch.fnmatchcase(stem, pattern) or fnmatch.fnmatchcase(name, pattern))
+
+
+class ArchivedLog:
+    """An archived run's output, read through its index.
+
+    Line numbers are 0-based. meta holds what the engine knew about the run
+    ("name", "run_id", "category", "started_at", "ended_at", "exit_code"
+    and the "encoding" of its output).
+    """
+
+    def __init__(self, index_path):
+        with open(index_path, 'rb') as file:
+            raw = file.read()
+        try:
+            (magic, version, codec, meta_size, block_count, mark_count, self.line_count,
+             self.size) = _HEADER.unpack_from(raw)
+            if magic != _MAGIC or version != _VERSION or codec not in _CODEC_NAMES:
+                raise ValueError(f"{index_path} is not a log archive index")
+            offset = _HEADER.size
+            self.meta = json.loads(raw[offset:offset + meta_size].decode('utf-8'))
+            offset += meta_size
+            self.blocks = list(_BLOCK.iter_unpack(raw[offset:offset + block_count * _BLOCK.size]))
+            offset += block_count * _BLOCK.size
+            marks = list(_MARK.iter_unpack(raw[offset:offset + mark_count * _MARK.size]))
+        except struct.error:
+            raise ValueError(f"{index_path} is truncated") from None
+        if len(self.blocks) != block_count or len(marks) != mark_count:
+            raise ValueError(f"{index_path} is truncated")
+        self.codec = _CODEC_NAMES[codec]
+        self.index_path = index_path
+        self.stem = os.path.basename(index_path)[:-len(INDEX_SUFFIX)]
+        self.path = index_path[:-len(INDEX_SUFFIX)] + CODECS[self.codec][1]
+        self.stored_size = sum(block[2] for block in self.blocks)
+        self.block_newlines = array('Q', (block[4] for block in self.blocks))
+        self.mark_lines = array('Q', (line for line, _ in marks))
+        self.mark_times = array('d', (when for _, when in marks))
+        self._decompress = None
+        self._cached = (None, None)
+
+    def read_block(self, number):
+        """Decompressed bytes of block `number` (the last one read is kept)."""
+        if self._cached[0] == number:
+            return self._cached[1]
+        if self._decompress is None:
+            self._decompress = _decompressor(self.codec)
+        offset, _, stored, _, _, _ = self.blocks[number]
+        with open(self.path, 'rb') as file:
+            file.seek(offset)
+            data = self._decompress(file.read(stored))
+        self._cached = (number, data)
+        return data
+
+    def lines(self, start=0):
+        """Yield the lines from line `start` on, as bytes without their newline."""
+        if start >= self.line_count or not self.blocks:
+            return
+        start = max(0, start)
+        number = bisect.bisect_right(self.block_newlines, start) - 1
+        # Line `start` may begin in an earlier block that was cut mid-line
+        while number > 0 and self.block_newlines[number] == start and not self.blocks[number][5]:
+            number -= 1
+        data = self.read_block(number)
+        skip = start - self.block_newlines[number]
+        # Past the skip-th newline; splitting finds it in C
+        pos = len(data) - len(data.split(b'\n', skip)[-1]) if skip else 0
+        partial = b''
+        while True:
+            end = data.find(b'\n', pos)
+            if end >= 0:
+                yield partial + data[pos:end]
+                partial = b''
+                pos = end + 1
+                continue
+            partial += data[pos:]
+            number += 1
+            if number >= len(self.blocks):
+                break
+            data = self.read_block(number)
+            pos = 0
+        if partial:
+            yield partial
+
+    def tail(self, count):
+        return list(self.lines(max(0, self.line_count - count)))
+
+    def line_at(self, timestamp):
+        """First line of the output that arrived at or after timestamp."""
+        index = bisect.bisect_left(self.mark_times, timestamp)
+        return self.mark_lines[index] if index < len(self.mark_lines) else self.line_count
+
+    def time_of(self, line):
+        """When line arrived (to within MARK_INTERVAL), or None if unknown."""
+        index = bisect.bisect_right(self.mark_lines, line) - 1
+        return self.mark_times[index] if index >= 0 else self.meta.get("started_at")
+
+    def encoding(self, default='utf-8'):
+        return self.meta.get("encoding") or default
+
+
+class LogArchive:
+    """The archive directory, and the plain logs of runs not archived yet.
+
+    codec is "auto", "gzip" or "zstd" (zstd falls back to gzip when the
+    zstandard package is missing); level is the codec's compression level.
+    """
+
+    def __init__(self, directory, log_dir=None, codec="auto", level=None):
+        self.directory = directory
+        self.log_dir = log_dir
+        self.codec = available_codec(codec)
+        self.level = level
+        os.makedirs(directory, exist_ok=True)
+
+    def index_path(self, stem):
+        return os.path.join(self.directory, stem + INDEX_SUFFIX)
+
+    def add(self, log_path, marks=None, meta=None):
+        """Archive a finished run's log file.
+
+        marks are (byte offset, time) pairs in output order, recorded as the
+        output arrived; meta is stored with the index. Returns the
+        ArchivedLog, or None if the log is empty or gone. Errors are raised
+        once the partly written files have been removed.
+        """
+        stem = os.path.basename(log_path)
+        if stem.endswith('.log'):
+            stem = stem[:-4]
+        data_path = os.path.join(self.directory, stem + CODECS[self.codec][1])
+        index_path = self.index_path(stem)
+        temp_paths = (data_path + '.tmp', index_path + '.tmp')
+        compress = _compressor(self.codec, self.level)
+        marks = marks or []
+        blocks = []
+        index_marks = []
+        completed = False
+        try:
+            with _MappedFile(log_path) as data:
+                if data is None:
+                    return None
+                size = len(data)
+                newlines = pos = mark = 0
+                with open(temp_paths[0], 'wb') as out:
+                    while pos < size:
+                        end = min(pos + BLOCK_SIZE, size)
+                        if end < size:
+                            cut = data.rfind(b'\n', pos, end)
+                            if cut < 0:
+                                cut = data.find(b'\n', end, min(pos + MAX_BLOCK, size))
+                            end = cut + 1 if cut >= 0 else min(pos + MAX_BLOCK, size)
+                        block = data[pos:end]
+                        while mark < len(marks) and marks[mark][0] < end:
+                            offset, when = marks[mark]
+                            index_marks.append(
+                                (newlines + block.count(b'\n', 0, max(0, offset - pos)), when))
+                            mark += 1
+                        packed = compress(block)
+                        blocks.append((out.tell(), pos, len(packed), len(block), newlines,
+                                       pos == 0 or data[pos - 1] == 10))
+                        out.write(packed)
+                        newlines += block.count(b'\n')
+                        pos = end
+                    last_is_newline = data[size - 1] == 10
+            meta = json.dumps(meta or {}).encode('utf-8')
+            header = _HEADER.pack(_MAGIC, _VERSION, CODECS[self.codec][0], len(meta), len(blocks),
+                                  len(index_marks), newlines + (0 if last_is_newline else 1), size)
+            with open(temp_paths[1], 'wb') as file:
+                file.write(header + meta)
+                file.write(b''.join(_BLOCK.pack(*block) for block in blocks))
+                file.write(b''.join(_MARK.pack(*entry) for entry in index_marks))
+            # The index goes last: an archive is complete once its index exists
+            os.replace(temp_paths[0], data_path)
+            os.replace(temp_paths[1], index_path)
+            completed = True
+        finally:
+            if not completed:
+                # An archive without its index would never be read or pruned
+                for path in temp_paths + (data_path,):
+                    self._remove(path)
+        return ArchivedLog(index_path)
+
+    def open(self, stem):
+        """The ArchivedLog of stem, or None if it isn't archived (or is damaged)."""
+        try:
+            return ArchivedLog(self.index_path(stem))
+        except (OSError, ValueError):
+            return None
+
+    def live_log(self, stem):
+        """Path of stem's plain log file, or None if it has been deleted."""
+        if not self.log_dir:
+            return None
+        path = os.path.join(self.log_dir, stem + '.log')
+        return path if os.path.isfile(path) else None
+
+    def stems(self):
+        """(archived stems, stems of plain logs not archived), newest first."""
+        archived = set(self._names(self.directory, INDEX_SUFFIX))
+        live = set(self._names(self.log_dir, '.log')) - archived if self.log_dir else set()
+        return (sorted(archived, key=_stem_key, reverse=True),
+                sorted(live, key=_stem_key, reverse=True))
+
+    def find(self, pattern=None):
+        """Stems of the runs matching pattern (default: all), newest first.
+
+        pattern is a full stem, a script name, or a glob over either.
+        """
+        archived, live = self.stems()
+        return sorted((stem for stem in archived + live
+                       if pattern is None or _stem_matches(stem, pattern)),
+                      key=_stem_key, reverse=True)
+
+    def follow(self, log_path, lines=10, interval=0.5):
+        """Yield the last `lines` lines of a plain log, then lines as they are appended.
+
+        Ends once the run's archive exists (it is written after the log is
+        closed) and the log has been read to the end.
+        """
+        stem = os.path.basename(log_path)[:-4]
+        pager = LogPager(log_path)
+        start, _ = pager.read_before(pager.size(), lines)
+        partial = b''
+        with open(log_path, 'rb') as file:
+            file.seek(start)
+            while True:
+                finished = os.path.exists(self.index_path(stem))
+                data = file.read(1024 * 1024)
+                if data:
+                    data = partial + data
+                    cut = data.rfind(b'\n') + 1
+                    yield from data[:cut].split(b'\n')[:-1]
+                    partial = data[cut:]
+                elif finished:
+                    break
+                else:
+                    time.sleep(interval)
+        if partial:
+            yield partial
+
+    def prune(self, max_age_days=None, max_bytes=None):
+        """Delete archives older than max_age_days, then the oldest beyond max_bytes."""
+        now = time.time()
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return
+        archives = []
+        sizes = {}
+        for entry in entries:
+            stem, suffix = os.path.splitext(entry.name)
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if suffix == '.tmp':
+                # Left by an interrupted archiving
+                if now - stat.st_mtime > 3600:
+                    self._remove(entry.path)
+            elif suffix == INDEX_SUFFIX:
+                archives.append((stat.st_mtime, stem))
+            sizes[stem] = sizes.get(stem, 0) + stat.st_size
+        archives.sort(reverse=True)
+        total = 0
+        for mtime, stem in archives:
+            total += sizes[stem]
+            if ((max_age_days is not None and now - mtime > max_age_days * 86400)
+                    or (max_bytes is not None and total > max_bytes)):
+                # The index first, so a half-deleted archive is never read
+                self._remove(self.index_path(stem))
+                for _, suffix in CODECS.values():
+                    self._remove(os.path.join(self.directory, stem + suffix))
+
+    @staticmethod
+    def _names(directory, suffix):
+        try:
+            return [entry.name[:-len(suffix)] for entry in os.scandir(directory)
+                    if entry.name.endswith(suffix)]
+        except OSError:
+            return []
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _grep_blocks(path, codec, blocks, pattern, flags):
+    """Search some blocks of one archive; returns [(line number, line)]."""
+    regex = re.compile(pattern, flags)
+    decompress = _decompressor(codec)
+    matches = []
+    with open(path, 'rb') as file:
+        for offset, stored, newlines in blocks:
+            file.seek(offset)
+            data = decompress(file.read(stored))
+            counted = 0
+            match = regex.search(data)
+            while match is not None:
+                start = data.rfind(b'\n', 0, match.start()) + 1
+                end = data.find(b'\n', match.start())
+                if end < 0:
+                    end = len(data)
+                newlines += data.count(b'\n', counted, start)
+                counted = start
+                matches.append((newlines, data[start:end]))
+                # One hit per line
+                match = regex.search(data, end + 1)
+    return matches
+
+
+def grep_archives(archives, pattern, ignore_case=False, jobs=None):
+    """Yield (ArchivedLog, line number, line) for each line matching pattern.
+
+    pattern is a regular expression, matched against the raw bytes of each
+    archive after being encoded with its output's encoding (see
+    logsearch.py for what that means). Archives are searched in chunks of
+    GREP_TASK_BLOCKS blocks on up to `jobs` processes (default: one per
+    CPU); results come in archive and line order. Lines that were split
+    between blocks (longer than MAX_BLOCK) are searched in pieces.
+    """
+    # ^ and $ match at line ends, as in grep
+    flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+    tasks = []
+    for archive in archives:
+        encoded = pattern.encode(archive.encoding(), 'replace')
+        blocks = [(block[0], block[2], block[4]) for block in archive.blocks]
+        for first in range(0, len(blocks), GREP_TASK_BLOCKS):
+            tasks.append((archive, (archive.path, archive.codec,
+                                    blocks[first:first + GREP_TASK_BLOCKS], encoded, flags)))
+    jobs = min(jobs or os.cpu_count() or 1, len(tasks))
+    if jobs <= 1:
+        results = (_grep_blocks(*arguments) for _, arguments in tasks)
+        executor = None
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=jobs)
+        futures = [executor.submit(_grep_blocks, *arguments) for _, arguments in tasks]
+        results = (future.result() for future in futures)
+    try:
+        for (archive, _), matches in zip(tasks, results):
+            for line, text in matches:
+                yield archive, line, text
+    finally:
+        if executor is not None:
+            # The caller may stop reading early
+            for future in futures:
+                future.cancel()
+            executor.shutdown()
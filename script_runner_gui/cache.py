@@ -0,0 +1,201 @@
+"""
+Result cache for Script Runner Pro.
+
+A catalog entry with "cache" set is deterministic: run again with the same
+script file, input files, arguments and environment it prints the same
+output and exits the same way. Such runs are keyed by a SHA-256 over all of
+that; when a key matches an earlier successful run, the engine replays the
+stored output and exit code instead of starting the script.
+
+    "cache": true
+    "cache": {"inputs": ["data/*.csv", "templates/**/*.html", "config.yaml"]}
+
+Input globs are relative to the script's directory. Entries are stored
+compressed, one file per key, and the least recently used ones are deleted
+once the cache grows past max_bytes.
+"""
+
+import collections
+import glob
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+
+from .engine import STDERR, STDOUT
+
+ENTRY_SUFFIX = '.result'
+# Bumped whenever the key material or the entry format changes
+FORMAT_VERSION = 1
+
+_STREAM_CODES = {STDOUT: 0, STDERR: 1}
+_STREAMS = {code: stream for stream, code in _STREAM_CODES.items()}
+_CHUNK_HEADER = struct.Struct('<BI')
+
+
+class ResultCache:
+    """Content-addressed store of finished runs' output, bounded by disk size.
+
+    All methods are thread-safe; key(), get() and put() touch the disk and
+    belong on a worker thread.
+    """
+
+    def __init__(self, directory, max_bytes=500 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # Output beyond this isn't captured, so one run can't flush the cache
+        self.max_entry_bytes = max(1, max_bytes // 4)
+        self._lock = threading.Lock()
+        self._entries = None          # key -> size, least recently used first
+        self._total = 0
+        self._file_digests = {}       # path -> (size, mtime_ns, digest)
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, spec):
+        """Hash the key material from commands.cache_spec()."""
+        digest = hashlib.sha256()
+        fixed = {"version": FORMAT_VERSION, "command": spec["command"], "cwd": spec["cwd"],
+                 "env": spec["env"]}
+        digest.update(json.dumps(fixed, sort_keys=True).encode('utf-8'))
+        for path in self._input_files(spec):
+            digest.update(b'\0' + path.encode('utf-8', 'surrogateescape') + b'\0')
+            digest.update(self._file_digest(path))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return (exit_code, [(stream, bytes)]) for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = zlib.decompress(file.read())
+            header, _, body = data.partition(b'\n')
+            exit_code = json.loads(header)["exit_code"]
+            chunks = []
+            offset = 0
+            while offset < len(body):
+                code, size = _CHUNK_HEADER.unpack_from(body, offset)
+                offset += _CHUNK_HEADER.size
+                chunks.append((_STREAMS[code], body[offset:offset + size]))
+                offset += size
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, struct.error, zlib.error):
+            # A damaged entry is a miss; the successful run will replace it
+            self._discard(key)
+            return None
+        with self._lock:
+            entries = self._load_entries()
+            if key in entries:
+                entries.move_to_end(key)
+        try:
+            # The modification time is the LRU order across restarts
+            os.utime(path)
+        except OSError:
+            pass
+        return exit_code, chunks
+
+    def put(self, key, exit_code, chunks):
+        """Store the output chunks [(stream, bytes)] of a run under key."""
+        parts = [json.dumps({"exit_code": exit_code, "created": time.time()}).encode() + b'\n']
+        for stream, data in chunks:
+            parts.append(_CHUNK_HEADER.pack(_STREAM_CODES[stream], len(data)))
+            parts.append(data)
+        blob = zlib.compress(b''.join(parts), 6)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(blob)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            entries = self._load_entries()
+            self._total += len(blob) - entries.pop(key, 0)
+            entries[key] = len(blob)
+            evicted = []
+            while self._total > self.max_bytes and len(entries) > 1:
+                old_key, size = entries.popitem(last=False)
+                self._total -= size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._load_entries())
+        for key in keys:
+            self._discard(key)
+
+    @property
+    def total_bytes(self):
+        with self._lock:
+            self._load_entries()
+            return self._total
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def _discard(self, key):
+        with self._lock:
+            self._total -= self._load_entries().pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _load_entries(self):
+        # Caller must hold self._lock
+        if self._entries is None:
+            found = []
+            with os.scandir(self.directory) as scan:
+                for entry in scan:
+                    if entry.name.endswith(ENTRY_SUFFIX):
+                        stat = entry.stat()
+                        found.append((stat.st_mtime, entry.name[:-len(ENTRY_SUFFIX)], stat.st_size))
+            found.sort()
+            self._entries = collections.OrderedDict((key, size) for _, key, size in found)
+            self._total = sum(self._entries.values())
+        return self._entries
+
+    def _input_files(self, spec):
+        files = {spec["script"]}
+        for pattern in spec["inputs"]:
+            pattern = os.path.join(spec["cwd"], os.path.expanduser(pattern))
+            if glob.has_magic(pattern):
+                files.update(path for path in glob.glob(pattern, recursive=True)
+                             if os.path.isfile(path))
+            else:
+                # A named input that doesn't exist yet still counts, as missing
+                files.add(pattern)
+        return sorted(os.path.normpath(path) for path in files)
+
+    def _file_digest(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return b'missing'
+        # Unchanged size and mtime: reuse the digest instead of rereading
+        cached = self._file_digests.get(path)
+        if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return cached[2]
+        digest = hashlib.sha256()
+        try:
+            with open(path, 'rb') as file:
+                for block in iter(lambda: file.read(1024 * 1024), b''):
+                    digest.update(block)
+        except OSError:
+            return b'unreadable'
+        result = digest.digest()
+        self._file_digests[path] = (stat.st_size, stat.st_mtime_ns, result)
+        return result
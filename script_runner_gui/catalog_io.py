@@ -0,0 +1,320 @@
+"""
+Bulk catalog import and export for Script Runner Pro.
+
+Three formats are understood, picked by file extension:
+
+  .json     the scripts.json format ({"name": {info}, ...}), or a list of
+            entries that carry their "name"
+  .ndjson   one entry per line: {"name": ..., "path": ..., ...} (also .jsonl)
+  .csv      columns name, path, type, category, args, env, interpreter and
+            extra (a JSON object with any other fields)
+
+Files are read as a stream, so memory use is bounded by the largest entry
+rather than the file size. Imported entries are merged into a catalog:
+entries whose path is already catalogued are duplicates and skipped, and a
+name already used for another script is resolved by on_conflict ("rename",
+"skip" or "replace").
+"""
+
+import codecs
+import csv
+import io
+import json
+import json.scanner
+import os
+import re
+import tempfile
+
+from .commands import detect_script_type, format_env, join_args, parse_env, split_args
+from .watch import path_key
+
+FORMATS = {'.json': 'json', '.ndjson': 'ndjson', '.jsonl': 'ndjson', '.csv': 'csv'}
+CONFLICT_POLICIES = ["rename", "skip", "replace"]
+CSV_FIELDS = ["name", "path", "type", "category", "args", "env", "interpreter", "extra"]
+
+CHUNK_SIZE = 1024 * 1024
+# Progress is reported after this many entries
+PROGRESS_EVERY = 1000
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def detect_format(path):
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix not in FORMATS:
+        raise ValueError(f"Unknown catalog format '{suffix}' (use .json, .ndjson or .csv)")
+    return FORMATS[suffix]
+
+
+class _CountingReader(io.RawIOBase):
+    """Binary file wrapper that counts the bytes read, for progress."""
+
+    def __init__(self, file):
+        self.file = file
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self.file.readinto(buffer)
+        self.bytes_read += count or 0
+        return count
+
+
+class _JsonStream:
+    """Reads the members of a top-level JSON object or array one at a time."""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self.scan = json.scanner.make_scanner(json.JSONDecoder())
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def __iter__(self):
+        """Yield (name, info) for an object, (None, item) for an array."""
+        opening = self._next_char()
+        if opening not in ('{', '['):
+            raise ValueError("Catalog must be a JSON object or array")
+        closing = '}' if opening == '{' else ']'
+        keyed = opening == '{'
+        self.pos += 1
+        if self._next_char() == closing:
+            return
+        scan = self.scan
+        skip = _WHITESPACE.match
+        while True:
+            buffer = self.buffer
+            pos = self.pos
+            # Parse as many members as the buffer holds; one cut off at the
+            # end of the buffer is parsed again after the next read
+            try:
+                while True:
+                    name = None
+                    if keyed:
+                        name, pos = scan(buffer, skip(buffer, pos).end())
+                        pos = skip(buffer, pos).end()
+                        if buffer[pos] != ':':
+                            raise ValueError(f"Expected ':' after {name!r}")
+                        pos += 1
+                    value, pos = scan(buffer, skip(buffer, pos).end())
+                    pos = skip(buffer, pos).end()
+                    separator = buffer[pos]
+                    if separator != ',' and separator != closing:
+                        raise ValueError(f"Expected ',' or '{closing}', found {separator!r}")
+                    pos += 1
+                    self.pos = pos
+                    yield name, value
+                    if separator == closing:
+                        return
+            except (StopIteration, IndexError, json.JSONDecodeError) as e:
+                if self.eof:
+                    raise ValueError("Invalid or truncated catalog file") from e
+                self._fill()
+
+    def _fill(self):
+        data = self.reader.read(CHUNK_SIZE)
+        self.eof = not data
+        # Drop what was consumed, so the buffer never holds more than a
+        # chunk plus the entry being parsed
+        self.buffer = self.buffer[self.pos:] + self.decoder.decode(data, final=self.eof)
+        self.pos = 0
+
+    def _next_char(self):
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                raise ValueError("Unexpected end of catalog file")
+            self._fill()
+
+
+def _read_json(reader):
+    for name, info in _JsonStream(reader):
+        if name is None and isinstance(info, dict):
+            info = dict(info)
+            name = info.pop('name', None)
+        yield name, info
+
+
+def _read_ndjson(reader):
+    for line in io.TextIOWrapper(reader, encoding='utf-8-sig'):
+        if line.strip():
+            info = json.loads(line)
+            if isinstance(info, dict):
+                info = dict(info)
+                yield info.pop('name', None), info
+            else:
+                yield None, info
+
+
+def _read_csv(reader):
+    for row in csv.DictReader(io.TextIOWrapper(reader, encoding='utf-8-sig', newline='')):
+        info = {}
+        if row.get('extra'):
+            info.update(json.loads(row['extra']))
+        for field in ('path', 'type', 'category', 'interpreter'):
+            if row.get(field):
+                info[field] = row[field]
+        if row.get('args'):
+            info['args'] = split_args(row['args'])
+        if row.get('env'):
+            info['env'] = parse_env(row['env'])
+        yield row.get('name'), info
+
+
+READERS = {'json': _read_json, 'ndjson': _read_ndjson, 'csv': _read_csv}
+
+
+def read_catalog(path, format=None, progress=None):
+    """Yield (name, info) pairs from a catalog file without loading it whole.
+
+    progress(fraction), if given, is called every PROGRESS_EVERY entries.
+    """
+    format = format or detect_format(path)
+    total = max(1, os.path.getsize(path))
+    with open(path, 'rb', buffering=0) as file:
+        reader = _CountingReader(file)
+        buffered = io.BufferedReader(reader, CHUNK_SIZE)
+        for count, entry in enumerate(READERS[format](buffered), 1):
+            yield entry
+            if progress is not None and count % PROGRESS_EVERY == 0:
+                progress(min(1.0, reader.bytes_read / total))
+
+
+def _valid_entry(name, info):
+    if not isinstance(name, str) or not name or not isinstance(info, dict):
+        return None
+    if not isinstance(info.get('path'), str) or not info['path']:
+        return None
+    info.setdefault('type', detect_script_type(info['path']))
+    info.setdefault('category', '')
+    return info
+
+
+def _free_name(name, taken):
+    candidate = name
+    number = 2
+    while candidate in taken:
+        candidate = f"{name} ({number})"
+        number += 1
+    return candidate
+
+
+def plan_import(entries, catalog, on_conflict="rename"):
+    """Resolve imported (name, info) pairs against catalog without changing it.
+
+    Returns (plan, counts): plan is a list of (name, info) to store, counts
+    says how many entries were added, renamed, replaced, duplicates (path
+    already catalogued), skipped (name conflict) or invalid. Safe to call
+    on a worker thread while another thread edits catalog.
+    """
+    if on_conflict not in CONFLICT_POLICIES:
+        raise ValueError(f"Unknown conflict policy '{on_conflict}'")
+    # list() of a dict's items is copied in one step under the GIL
+    snapshot = list(catalog.items())
+    names = {name for name, _ in snapshot}
+    paths = {path_key(info['path']) for _, info in snapshot
+             if isinstance(info, dict) and info.get('path')}
+    counts = dict.fromkeys(["added", "renamed", "replaced", "duplicates", "skipped", "invalid"], 0)
+    plan = []
+    for name, info in entries:
+        info = _valid_entry(name, info)
+        if info is None:
+            counts["invalid"] += 1
+            continue
+        key = path_key(info['path'])
+        if key in paths:
+            counts["duplicates"] += 1
+            continue
+        if name in names:
+            if on_conflict == "skip":
+                counts["skipped"] += 1
+                continue
+            if on_conflict == "rename":
+                name = _free_name(name, names)
+                counts["renamed"] += 1
+            else:
+                counts["replaced"] += 1
+        else:
+            counts["added"] += 1
+        names.add(name)
+        paths.add(key)
+        plan.append((name, info))
+    return plan, counts
+
+
+def apply_import(store, plan):
+    for name, info in plan:
+        store.put(name, info)
+
+
+def import_catalog(store, path, format=None, on_conflict="rename", progress=None):
+    """Read a catalog file and merge it into store; returns the counts."""
+    plan, counts = plan_import(read_catalog(path, format, progress), store.data, on_conflict)
+    apply_import(store, plan)
+    return counts
+
+
+def _write_json(file, entries):
+    # Same layout as scripts.json: one entry per line
+    file.write('{')
+    separator = '\n'
+    for name, info in entries:
+        file.write(f'{separator}  {json.dumps(name)}: {json.dumps(info)}')
+        separator = ',\n'
+    file.write('\n}\n' if separator != '\n' else '}\n')
+
+
+def _write_ndjson(file, entries):
+    for name, info in entries:
+        file.write(json.dumps(dict({"name": name}, **info)) + '\n')
+
+
+def _write_csv(file, entries):
+    writer = csv.writer(file)
+    writer.writerow(CSV_FIELDS)
+    for name, info in entries:
+        extra = {key: value for key, value in info.items() if key not in CSV_FIELDS}
+        writer.writerow([
+            name, info.get('path', ''), info.get('type', ''), info.get('category', ''),
+            join_args(info.get('args') or []), format_env(info.get('env')),
+            info.get('interpreter', ''), json.dumps(extra) if extra else '',
+        ])
+
+
+WRITERS = {'json': _write_json, 'ndjson': _write_ndjson, 'csv': _write_csv}
+
+
+def export_catalog(catalog, path, format=None, progress=None):
+    """Write catalog to path entry by entry; returns the number written.
+
+    The file is replaced atomically, so a failed export leaves any earlier
+    one intact.
+    """
+    format = format or detect_format(path)
+    entries = list(catalog.items())
+    total = max(1, len(entries))
+
+    def counted():
+        for count, entry in enumerate(entries, 1):
+            yield entry
+            if progress is not None and count % PROGRESS_EVERY == 0:
+                progress(count / total)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='' if format == 'csv' else '\n') as file:
+            WRITERS[format](file, counted())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return len(entries)
@@ -0,0 +1,157 @@
+"""
+Script list model for Script Runner Pro.
+
+ScriptListModel serves the catalog to a QListView instead of creating one
+QListWidgetItem per script. Rows are kept sorted by category and name in a
+flat list of sort keys, so a script's row is found by binary search and the
+view only asks for the rows it actually draws. While a search is active the
+model shows the ranked search results instead of the full catalog.
+"""
+
+import bisect
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+
+NAME_ROLE = Qt.UserRole
+
+
+def sort_key(name, info):
+    return ((info.get('category') or '').lower(), name.lower(), name)
+
+
+class ScriptListModel(QAbstractListModel):
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.catalog = {}
+        self._sorted = []      # sort keys of every script, grouped by category
+        self._keys = {}        # name -> sort key
+        self._filter = None    # ranked names while a search is active
+        self._filter_rows = {}
+
+    def load(self, catalog):
+        """Show every entry of catalog (a name -> info dict)."""
+        self.beginResetModel()
+        self.catalog = catalog
+        self._keys = {name: sort_key(name, info) for name, info in catalog.items()}
+        self._sorted = sorted(self._keys.values())
+        self._filter = None
+        self._filter_rows = {}
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._sorted) if self._filter is None else len(self._filter)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        name = self.name_at(index.row())
+        if role == NAME_ROLE:
+            return name
+        info = self.catalog.get(name, {})
+        if role == Qt.DisplayRole:
+            category = info.get('category')
+            return f"{name}  [{category}]" if category else name
+        if role == Qt.ToolTipRole:
+            return info.get('path', '')
+        return None
+
+    def name_at(self, row):
+        if self._filter is not None:
+            return self._filter[row]
+        return self._sorted[row][2]
+
+    def row_of(self, name):
+        """Return the row showing name, or None if it is not visible."""
+        if self._filter is not None:
+            return self._filter_rows.get(name)
+        key = self._keys.get(name)
+        if key is None:
+            return None
+        return bisect.bisect_left(self._sorted, key)
+
+    def index_of(self, name):
+        row = self.row_of(name)
+        return QModelIndex() if row is None else self.index(row)
+
+    def add(self, name):
+        """Insert a script that was added to the catalog."""
+        if name in self._keys:
+            self.refresh(name)
+            return
+        key = sort_key(name, self.catalog[name])
+        self._keys[name] = key
+        position = bisect.bisect_left(self._sorted, key)
+        if self._filter is None:
+            self.beginInsertRows(QModelIndex(), position, position)
+            self._sorted.insert(position, key)
+            self.endInsertRows()
+        else:
+            # Stays hidden until the next search decides whether it matches
+            self._sorted.insert(position, key)
+
+    def remove(self, name):
+        """Drop a script that was removed from the catalog."""
+        key = self._keys.pop(name, None)
+        if key is None:
+            return
+        position = bisect.bisect_left(self._sorted, key)
+        if self._filter is None:
+            self.beginRemoveRows(QModelIndex(), position, position)
+            del self._sorted[position]
+            self.endRemoveRows()
+            return
+        del self._sorted[position]
+        row = self._filter_rows.pop(name, None)
+        if row is not None:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._filter[row]
+            self._filter_rows = {entry: i for i, entry in enumerate(self._filter)}
+            self.endRemoveRows()
+
+    def rename(self, old_name, new_name):
+        """Move a script whose name changed; catalog must already be updated."""
+        filter_row = self._filter_rows.pop(old_name, None) if self._filter is not None else None
+        if filter_row is not None:
+            # Keep the entry where the search ranked it
+            self._filter[filter_row] = new_name
+            self._filter_rows[new_name] = filter_row
+            self._replace_key(old_name, new_name)
+            index = self.index(filter_row)
+            self.dataChanged.emit(index, index)
+            return
+        self.remove(old_name)
+        self.add(new_name)
+
+    def refresh(self, name):
+        """Re-sort and redraw a script whose info changed."""
+        if self._keys.get(name) != sort_key(name, self.catalog[name]):
+            self.rename(name, name)
+        else:
+            index = self.index_of(name)
+            if index.isValid():
+                self.dataChanged.emit(index, index)
+
+    def set_filter(self, names):
+        """Show only names, in the given order; None shows the whole catalog."""
+        self.beginResetModel()
+        if names is None:
+            self._filter = None
+            self._filter_rows = {}
+        else:
+            self._filter = [name for name in names if name in self._keys]
+            self._filter_rows = {name: row for row, name in enumerate(self._filter)}
+        self.endResetModel()
+
+    def _replace_key(self, old_name, new_name):
+        key = self._keys.pop(old_name)
+        del self._sorted[bisect.bisect_left(self._sorted, key)]
+        stale = self._keys.get(new_name)
+        if stale is not None:
+            # new_name replaced an existing script
+            del self._sorted[bisect.bisect_left(self._sorted, stale)]
+        key = sort_key(new_name, self.catalog[new_name])
+        self._keys[new_name] = key
+        bisect.insort(self._sorted, key)
@@ -0,0 +1,791 @@
+"""
+Headless command line interface for Script Runner Pro.
+
+Runs catalog entries from scripts.json without PyQt5 or a display:
+
+    python -m script_runner_gui run <name|category|glob> [...] [--jobs N]
+    python -m script_runner_gui list [pattern]
+    python -m script_runner_gui pipeline [name] [--jobs N]
+    python -m script_runner_gui history [--script NAME] [--category CAT] [--failed]
+    python -m script_runner_gui schedule [--list] [--jobs N]
+    python -m script_runner_gui import FILE [--on-conflict rename|skip|replace]
+    python -m script_runner_gui export FILE
+    python -m script_runner_gui agent [--listen HOST:PORT] [--slots N]
+    python -m script_runner_gui logs list|show|tail|grep ...
+
+Output of every run is streamed line by line with a "[name]" prefix; the
+scripts' stderr goes to stderr. Scripts with an output protocol have their
+progress shown at most once a second and their metrics when they finish.
+The exit status is 0 when every selected script succeeded and 1 otherwise.
+With --remote (or --agent HOST:PORT) the run, pipeline and schedule
+commands dispatch the scripts to worker agents instead of running them
+here. The logs of their runs go to the log archive (see archive.py) as the
+GUI's do, unless it is disabled in the settings; the logs command reads it.
+"""
+
+import argparse
+import fnmatch
+import ipaddress
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+
+from .archive import grep_archives
+from .catalog_io import CONFLICT_POLICIES, export_catalog, import_catalog
+from .commands import script_missing, submit_script
+from .engine import STDERR, STDOUT, ExecutionEngine
+from .events import format_metrics
+from .pipelines import SKIPPED, PipelineRun, load_pipelines, pipeline_steps, pipelines_path
+from .runlog import LogPager, output_encoding, prune_logs
+from .schedule import Scheduler, format_schedule_text, load_schedules
+from .settings import (agent_token, load_settings, open_archive, open_history,
+                       open_remote_pool, open_result_cache, open_warm_pool, schedule_state_path)
+from .stats import export_stats, format_bytes, format_timestamp
+from .store import default_catalog_path, open_store
+
+
+def select_scripts(catalog, patterns):
+    """Resolve patterns to catalog names, keeping catalog order.
+
+    A pattern matches a script by exact name, by category (case-insensitive)
+    or as a shell-style glob over names.
+    """
+    selected = []
+    for pattern in patterns:
+        if pattern in catalog:
+            matches = [pattern]
+        else:
+            lowered = pattern.lower()
+            matches = [name for name, info in catalog.items()
+                       if (info.get('category') or '').lower() == lowered]
+            if not matches:
+                matches = [name for name in catalog if fnmatch.fnmatchcase(name, pattern)]
+        if not matches:
+            raise LookupError(f"No scripts match '{pattern}'")
+        selected.extend(name for name in matches if name not in selected)
+    return selected
+
+
+# Seconds between progress lines of one run
+PROGRESS_INTERVAL = 1
+
+
+class PrefixedPrinter:
+    """Writes run output one whole line at a time, prefixed by name.
+
+    Lines a script writes to stderr go to err_stream, the rest to stream.
+    """
+
+    def __init__(self, stream=None, err_stream=None):
+        self.streams = {STDOUT: stream or sys.stdout, STDERR: err_stream or sys.stderr}
+        self.lock = threading.Lock()
+        self.partial = {}
+        self.progress_shown = {}
+
+    def write(self, run, text, stream=STDOUT):
+        key = (run.run_id, stream)
+        lines = (self.partial.pop(key, '') + text).split('\n')
+        self.partial[key] = lines.pop()
+        if lines:
+            self._emit(run.name, lines, stream)
+
+    def event(self, run, event):
+        """Show an event of a script's output protocol (see events.py)."""
+        if event["type"] == "artifact":
+            self.message(run.name, f"Artifact: {event['path']}")
+        elif event["type"] == "progress":
+            now = time.monotonic()
+            last = self.progress_shown.get(run.run_id)
+            if last is None or now - last >= PROGRESS_INTERVAL or event["progress"] >= 100:
+                self.progress_shown[run.run_id] = now
+                self.message(run.name, f"{event['progress']:.0f}% {event['message']}".rstrip())
+
+    def finish(self, run):
+        for stream in (STDOUT, STDERR):
+            rest = self.partial.pop((run.run_id, stream), '')
+            if rest:
+                self._emit(run.name, [rest], stream)
+        self.progress_shown.pop(run.run_id, None)
+        if run.events is not None and run.events.metrics:
+            self.message(run.name, f"Metrics: {format_metrics(run.events.metrics)}")
+
+    def message(self, name, text):
+        self._emit(name, [text])
+
+    def _emit(self, name, lines, stream=STDOUT):
+        prefix = f"[{name}] "
+        out = self.streams[stream]
+        with self.lock:
+            out.write(''.join(prefix + line + '\n' for line in lines))
+            out.flush()
+
+
+def finished_message(run):
+    if run.timed_out:
+        return f"--- Timed out, exit code: {run.exit_code} ---"
+    if run.cache_hit:
+        return f"--- Cached result replayed, exit code: {run.exit_code} ---"
+    return f"--- Script finished with exit code: {run.exit_code} ---"
+
+
+def run_scripts(catalog, names, jobs=1, printer=None, stats=None, history=None,
+                warm_pool=None, result_cache=None, remote_pool=None, encoding=None,
+                archive=None):
+    """Run the named catalog entries and return {name: exit code}.
+
+    If stats is a list, the resource statistics of every run are appended.
+    Finished runs are recorded in history when one is given, Python
+    scripts run in warm_pool when one is given, scripts marked "cache"
+    reuse earlier results from result_cache when one is given, and with
+    a remote_pool the scripts run on its agents. encoding overrides the
+    locale's for decoding the scripts' output. With an archive (a
+    LogArchive) the logs of the runs are archived before this returns.
+    """
+    printer = printer or PrefixedPrinter()
+    results = {}
+    done = threading.Event()
+    remaining = [len(names)]
+    lock = threading.Lock()
+
+    def on_finished(run):
+        printer.finish(run)
+        printer.message(run.name, finished_message(run))
+        with lock:
+            results[run.name] = run.exit_code
+            if stats is not None:
+                stats.append(run.stats())
+            remaining[0] -= 1
+            if not remaining[0]:
+                done.set()
+
+    engine = ExecutionEngine(max_workers=jobs, on_output=printer.write, on_finished=on_finished,
+                             on_event=printer.event, history=history, encoding=encoding,
+                             warm_pool=warm_pool, result_cache=result_cache,
+                             remote_pool=remote_pool, archive=archive,
+                             log_dir=archive.log_dir if archive is not None else None)
+    for name in names:
+        info = catalog[name]
+        if script_missing(engine, info):
+            printer.message(name, f"Script file not found: {info['path']}")
+            with lock:
+                results[name] = -1
+                remaining[0] -= 1
+            continue
+        submit_script(engine, name, info)
+
+    with lock:
+        if not remaining[0]:
+            done.set()
+    try:
+        # Wait in short slices so Ctrl+C is handled promptly
+        while not done.wait(0.2):
+            pass
+    except KeyboardInterrupt:
+        engine.shutdown()
+        done.wait()
+    finally:
+        engine.wait_archived()
+        if remote_pool is not None:
+            engine.shutdown()
+    return results
+
+
+def run_pipeline(catalog, name, pipeline, jobs=None, printer=None, history=None,
+                 warm_pool=None, result_cache=None, remote_pool=None, encoding=None,
+                 archive=None):
+    """Run a pipeline to completion and return its PipelineRun.
+
+    jobs overrides the pipeline's max_parallel. Raises ValueError if the
+    pipeline is invalid.
+    """
+    steps = pipeline_steps(pipeline, catalog)
+    printer = printer or PrefixedPrinter()
+    jobs = jobs or pipeline.get('max_parallel') or len(steps)
+    pipeline_run = None
+
+    def on_finished(run):
+        printer.finish(run)
+        printer.message(run.name, finished_message(run))
+        pipeline_run.step_finished(run)
+
+    engine = ExecutionEngine(max_workers=jobs, on_output=printer.write, on_finished=on_finished,
+                             on_event=printer.event, history=history, encoding=encoding,
+                             warm_pool=warm_pool, result_cache=result_cache,
+                             remote_pool=remote_pool, archive=archive,
+                             log_dir=archive.log_dir if archive is not None else None)
+
+    def submit(step, script):
+        info = catalog[script]
+        if script_missing(engine, info):
+            printer.message(script, f"Script file not found: {info['path']}")
+            return None
+        return submit_script(engine, script, info)
+
+    def on_change(step, state):
+        if state == SKIPPED:
+            printer.message(step, "--- Skipped ---")
+
+    pipeline_run = PipelineRun(name, steps, submit, jobs, on_change)
+    pipeline_run.start()
+    try:
+        while not pipeline_run.done.wait(0.2):
+            pass
+    except KeyboardInterrupt:
+        pipeline_run.cancel(engine.cancel)
+        pipeline_run.done.wait()
+    finally:
+        engine.wait_archived()
+        if remote_pool is not None:
+            engine.shutdown()
+    return pipeline_run
+
+
+def run_schedules(catalog, scheduler, jobs=1, printer=None, history=None, warm_pool=None,
+                  result_cache=None, stop=None, remote_pool=None, encoding=None, archive=None):
+    """Run scheduled catalog entries until stop (an Event) is set or Ctrl+C."""
+    printer = printer or PrefixedPrinter()
+    stop = stop or threading.Event()
+    engine = None
+
+    def submit(name):
+        info = catalog[name]
+        if script_missing(engine, info):
+            printer.message(name, f"Script file not found: {info['path']}")
+            return None
+        return submit_script(engine, name, info)
+
+    def on_finished(run):
+        printer.finish(run)
+        printer.message(run.name, finished_message(run))
+        scheduler.run_finished(run.run_id, submit)
+        engine.forget(run.run_id)
+
+    engine = ExecutionEngine(max_workers=jobs, on_output=printer.write, on_finished=on_finished,
+                             on_event=printer.event, history=history, encoding=encoding,
+                             warm_pool=warm_pool, result_cache=result_cache,
+                             remote_pool=remote_pool, archive=archive,
+                             log_dir=archive.log_dir if archive is not None else None)
+    try:
+        while not stop.is_set():
+            if scheduler.dispatch(submit):
+                scheduler.save_state()
+            next_fire = scheduler.next_fire_time()
+            # Sleep in short slices so Ctrl+C is handled promptly
+            delay = 0.5 if next_fire is None else next_fire - time.time()
+            stop.wait(min(max(delay, 0.0), 0.5))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.shutdown()
+        scheduler.save_state()
+        engine.wait_archived()
+
+
+def remote_pool_for(args, settings):
+    """The RemotePool requested by --remote/--agent, or None to run locally."""
+    if args.agents:
+        return open_remote_pool(settings, agents=args.agents)
+    if not args.remote:
+        return None
+    try:
+        pool = open_remote_pool(settings)
+    except ValueError as e:
+        raise LookupError(f"Invalid remote_agents setting: {e}") from None
+    if not pool.enabled:
+        raise LookupError("No remote agents are configured (set remote_agents in the "
+                          "settings or use --agent HOST:PORT)")
+    return pool
+
+
+def open_run_archive(settings):
+    """Open the log archive for headless runs, pruning it as the GUI does at startup."""
+    archive = open_archive(settings)
+    if archive is not None:
+        prune_logs(archive.log_dir, settings['max_log_files'])
+        archive.prune(settings['archive_max_age_days'], settings['archive_max_mb'] * 1024 * 1024)
+    return archive
+
+
+def cmd_run(args, catalog):
+    names = select_scripts(catalog, args.patterns)
+    stats = [] if args.stats else None
+    settings = load_settings()
+    if args.warm:
+        settings["warm_pool_enabled"] = True
+    history = None if args.no_history else open_history(settings)
+    try:
+        results = run_scripts(catalog, names, jobs=args.jobs, stats=stats, history=history,
+                              warm_pool=open_warm_pool(settings),
+                              result_cache=None if args.no_cache else open_result_cache(settings),
+                              remote_pool=remote_pool_for(args, settings),
+                              encoding=settings.get('output_encoding'),
+                              archive=open_run_archive(settings))
+    finally:
+        if history is not None:
+            history.close()
+    if args.stats:
+        export_stats(sorted(stats, key=lambda entry: entry["run_id"]), args.stats)
+    failed = sorted(name for name, code in results.items() if code != 0)
+    print(f"{len(results) - len(failed)} succeeded, {len(failed)} failed"
+          + (f": {', '.join(failed)}" if failed else ""))
+    return 1 if failed else 0
+
+
+def cmd_pipeline(args, catalog):
+    pipelines = load_pipelines(pipelines_path(args.catalog_path))
+    if not args.name:
+        for name, pipeline in pipelines.items():
+            print(f"{name}\t{len(pipeline.get('steps') or [])} steps")
+        return 0
+    if args.name not in pipelines:
+        raise LookupError(f"No pipeline named '{args.name}'")
+    settings = load_settings()
+    if args.warm:
+        settings["warm_pool_enabled"] = True
+    history = None if args.no_history else open_history(settings)
+    try:
+        pipeline_run = run_pipeline(
+            catalog, args.name, pipelines[args.name], jobs=args.jobs, history=history,
+            warm_pool=open_warm_pool(settings),
+            result_cache=None if args.no_cache else open_result_cache(settings),
+            remote_pool=remote_pool_for(args, settings), encoding=settings.get('output_encoding'),
+            archive=open_run_archive(settings))
+    except ValueError as e:
+        print(f"Error: Invalid pipeline '{args.name}': {e}", file=sys.stderr)
+        return 2
+    finally:
+        if history is not None:
+            history.close()
+    for line in pipeline_run.summary():
+        print(line)
+    return 0 if pipeline_run.succeeded else 1
+
+
+def cmd_schedule(args, catalog):
+    scheduler = Scheduler(str(schedule_state_path()))
+    printer = PrefixedPrinter()
+    for name, error in load_schedules(scheduler, catalog):
+        printer.message(name, f"Invalid schedule: {error}")
+    if not scheduler.upcoming():
+        print("No scripts in the catalog have a schedule.", file=sys.stderr)
+        return 2
+    if args.list:
+        for fire, name, spec in scheduler.upcoming():
+            print(f"{format_timestamp(fire)}\t{name}\t{format_schedule_text(spec)}\t"
+                  f"overlap={spec.get('overlap', 'skip')}\tcatch_up={spec.get('catch_up', 'skip')}")
+        return 0
+    settings = load_settings()
+    if args.warm:
+        settings["warm_pool_enabled"] = True
+    history = None if args.no_history else open_history(settings)
+    print(f"Running {len(scheduler.upcoming())} schedules, press Ctrl+C to stop", file=sys.stderr)
+    try:
+        run_schedules(catalog, scheduler, jobs=args.jobs, printer=printer, history=history,
+                      warm_pool=open_warm_pool(settings), result_cache=open_result_cache(settings),
+                      remote_pool=remote_pool_for(args, settings),
+                      encoding=settings.get('output_encoding'),
+                      archive=open_run_archive(settings))
+    finally:
+        if history is not None:
+            history.close()
+    return 0
+
+
+def cmd_agent(args, catalog):
+    from .agent import Agent
+    from .remote import parse_address
+
+    host, port = parse_address(args.listen)
+    token = args.token or agent_token()
+    try:
+        loopback = ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        loopback = host == 'localhost'
+    if not token and not loopback:
+        print("Error: An agent listening beyond this machine needs a token (--token or "
+              "SCRIPT_RUNNER_AGENT_TOKEN)", file=sys.stderr)
+        return 2
+    settings = load_settings()
+    if args.warm:
+        settings["warm_pool_enabled"] = True
+    agent = Agent(slots=args.slots, token=token, warm_pool=open_warm_pool(settings))
+    try:
+        addresses = agent.serve(host, port).result()
+    except OSError as e:
+        print(f"Error: Could not listen on {host}:{port}: {e}", file=sys.stderr)
+        return 2
+    listening = ", ".join(f"{address[0]}:{address[1]}" for address in addresses)
+    print(f"Agent listening on {listening} with {agent.engine.max_workers} slots, "
+          f"press Ctrl+C to stop", file=sys.stderr)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        agent.close()
+    return 0
+
+
+def show_progress(fraction):
+    print(f"\r{fraction * 100:5.1f}%", end="", file=sys.stderr, flush=True)
+
+
+def cmd_import(args, catalog):
+    store = args.store
+    try:
+        if store is None:
+            store = open_store(args.catalog_path)
+            store.load()
+        counts = import_catalog(store, args.file, on_conflict=args.on_conflict,
+                                progress=show_progress if sys.stderr.isatty() else None)
+        store.flush()
+    except (OSError, ValueError) as e:
+        print(f"\nError: Could not import {args.file}: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if store is not None:
+            store.close()
+    print("\r" + ", ".join(f"{count} {key}" for key, count in counts.items()), file=sys.stderr)
+    return 0
+
+
+def cmd_export(args, catalog):
+    try:
+        count = export_catalog(catalog, args.file,
+                               progress=show_progress if sys.stderr.isatty() else None)
+    except (OSError, ValueError) as e:
+        print(f"\nError: Could not export to {args.file}: {e}", file=sys.stderr)
+        return 2
+    print(f"\rExported {count} scripts to {args.file}", file=sys.stderr)
+    return 0
+
+
+def cmd_list(args, catalog):
+    names = select_scripts(catalog, [args.pattern]) if args.pattern else list(catalog)
+    for name in names:
+        info = catalog[name]
+        print(f"{name}\t{info.get('type', '')}\t{info.get('category', '')}\t{info.get('path', '')}")
+    return 0
+
+
+def cmd_history(args, catalog):
+    history = open_history(load_settings())
+    if history is None:
+        print("Run history is disabled in the settings.", file=sys.stderr)
+        return 2
+    try:
+        runs = history.query(script=args.script, category=args.category,
+                             failed=True if args.failed else None, limit=args.limit)
+    finally:
+        history.close()
+    for run in reversed(runs):
+        duration = "" if run["duration"] is None else f"{run['duration']:.2f}s"
+        rss = "" if run["max_rss"] is None else format_bytes(run["max_rss"])
+        metrics = format_metrics((run["events"] or {}).get("metrics"))
+        print(f"{format_timestamp(run['started_at'])}\t{run['script']}\t{run['category']}\t"
+              f"{run['exit_code']}\t{duration}\t{rss}\t{metrics}")
+    return 0
+
+
+def cmd_logs(args, catalog):
+    archive = open_archive(load_settings(), enabled_only=False)
+    return args.logs_handler(args, archive)
+
+
+def find_log(archive, pattern):
+    """Stem of the newest run log matching pattern."""
+    stems = archive.find(pattern)
+    if not stems:
+        raise LookupError(f"No run logs match '{pattern}'")
+    return stems[0]
+
+
+def open_archived(archive, pattern):
+    stem = find_log(archive, pattern)
+    archived = archive.open(stem)
+    if archived is None:
+        raise LookupError(f"{stem} has not been archived yet (follow it with 'logs tail -f')")
+    return archived
+
+
+def parse_log_time(text, started_at):
+    """--at as seconds since the epoch, or None if malformed.
+
+    Accepts +SECONDS after the run started, HH:MM[:SS] on the day it
+    started, or YYYY-MM-DD HH:MM[:SS].
+    """
+    if text.startswith('+'):
+        try:
+            return (started_at or 0) + float(text[1:])
+        except ValueError:
+            return None
+    day = time.localtime(started_at)
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%H:%M:%S", "%H:%M"):
+        try:
+            parsed = time.strptime(text, fmt)
+        except ValueError:
+            continue
+        date = parsed[:3] if fmt.startswith("%Y") else day[:3]
+        return time.mktime(date + parsed[3:6] + (0, 0, -1))
+    return None
+
+
+def print_log_lines(lines, encoding):
+    for line in lines:
+        sys.stdout.write(line.decode(encoding, 'replace') + '\n')
+    sys.stdout.flush()
+
+
+def cmd_logs_list(args, archive):
+    for stem in reversed(archive.find(args.pattern)[:args.limit]):
+        entry = archive.open(stem)
+        if entry is None:
+            path = archive.live_log(stem)
+            size = format_bytes(os.path.getsize(path)) if path else ""
+            print(f"\t{stem}\t\t\t{size}\tnot archived")
+            continue
+        print(f"{format_timestamp(entry.meta.get('started_at'))}\t{stem}\t"
+              f"{entry.meta.get('exit_code', '')}\t{entry.line_count} lines\t"
+              f"{format_bytes(entry.size)}\t{format_bytes(entry.stored_size)} stored")
+    return 0
+
+
+def cmd_logs_show(args, archive):
+    archived = open_archived(archive, args.run)
+    start = 0
+    if args.at is not None:
+        timestamp = parse_log_time(args.at, archived.meta.get("started_at"))
+        if timestamp is None:
+            print(f"Error: Unrecognised time '{args.at}' (use +SECONDS, HH:MM[:SS] or "
+                  f"YYYY-MM-DD HH:MM[:SS])", file=sys.stderr)
+            return 2
+        start = archived.line_at(timestamp)
+    elif args.line is not None:
+        start = max(0, args.line - 1)
+    lines = archived.lines(start)
+    if args.count is not None:
+        lines = itertools.islice(lines, args.count)
+    print_log_lines(lines, archived.encoding())
+    return 0
+
+
+def cmd_logs_tail(args, archive):
+    stem = find_log(archive, args.run)
+    encoding = output_encoding(load_settings().get("output_encoding"))
+    archived = archive.open(stem)
+    if archived is not None:
+        # Finished: there is nothing left to follow
+        print_log_lines(archived.tail(args.count), archived.encoding(encoding))
+        return 0
+    path = archive.live_log(stem)
+    if path is None:
+        raise LookupError(f"The log of {stem} has been deleted")
+    if not args.follow:
+        pager = LogPager(path, encoding)
+        sys.stdout.write(pager.read_before(pager.size(), args.count)[1])
+        return 0
+    try:
+        for line in archive.follow(path, args.count):
+            print_log_lines([line], encoding)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def cmd_logs_grep(args, archive):
+    stems = []
+    for pattern in args.runs or [None]:
+        stems += [stem for stem in archive.find(pattern) if stem not in stems]
+    # Oldest first, like the other listings
+    archives = [entry for entry in map(archive.open, reversed(stems)) if entry is not None]
+    if not archives:
+        raise LookupError("No archived run logs to search")
+    try:
+        re.compile(args.pattern)
+    except re.error as e:
+        print(f"Error: Invalid pattern: {e}", file=sys.stderr)
+        return 2
+    found = False
+    for entry, line, text in grep_archives(archives, args.pattern, args.ignore_case, args.jobs):
+        found = True
+        sys.stdout.write(f"{entry.stem}:{line + 1}:{text.decode(entry.encoding(), 'replace')}\n")
+    sys.stdout.flush()
+    return 0 if found else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="script_runner_gui",
+        description="Run Script Runner Pro catalog entries without the GUI.")
+    parser.add_argument("--catalog", help="catalog file (default: scripts.json)")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    run_parser = subparsers.add_parser("run", help="run scripts by name, category or glob")
+    run_parser.add_argument("patterns", nargs="+", metavar="name|category|glob")
+    run_parser.add_argument("-j", "--jobs", type=int, default=1,
+                            help="number of scripts to run in parallel (default: 1)")
+    run_parser.add_argument("--stats", metavar="FILE",
+                            help="write per-run resource usage to FILE (.json or .csv)")
+    run_parser.add_argument("--warm", action="store_true",
+                            help="run Python scripts in warm interpreters (POSIX only)")
+    run_parser.add_argument("--no-history", action="store_true",
+                            help="do not record these runs in the run history")
+    run_parser.add_argument("--no-cache", action="store_true",
+                            help="ignore the result cache for these runs")
+    add_remote_arguments(run_parser)
+    run_parser.set_defaults(handler=cmd_run)
+
+    list_parser = subparsers.add_parser("list", help="list catalog entries")
+    list_parser.add_argument("pattern", nargs="?", metavar="name|category|glob")
+    list_parser.set_defaults(handler=cmd_list)
+
+    pipeline_parser = subparsers.add_parser(
+        "pipeline", help="run a pipeline from pipelines.json (lists them without a name)")
+    pipeline_parser.add_argument("name", nargs="?")
+    pipeline_parser.add_argument("-j", "--jobs", type=int,
+                                 help="steps to run in parallel (default: the pipeline's "
+                                      "max_parallel)")
+    pipeline_parser.add_argument("--warm", action="store_true",
+                                 help="run Python scripts in warm interpreters (POSIX only)")
+    pipeline_parser.add_argument("--no-history", action="store_true",
+                                 help="do not record these runs in the run history")
+    pipeline_parser.add_argument("--no-cache", action="store_true",
+                                 help="ignore the result cache for these runs")
+    add_remote_arguments(pipeline_parser)
+    pipeline_parser.set_defaults(handler=cmd_pipeline)
+
+    history_parser = subparsers.add_parser("history", help="show recorded runs, newest last")
+    history_parser.add_argument("--script", help="only runs of this script")
+    history_parser.add_argument("--category", help="only runs of scripts in this category")
+    history_parser.add_argument("--failed", action="store_true", help="only failed runs")
+    history_parser.add_argument("-n", "--limit", type=int, default=20,
+                                help="number of runs to show (default: 20)")
+    history_parser.set_defaults(handler=cmd_history)
+
+    schedule_parser = subparsers.add_parser(
+        "schedule", help="run scheduled scripts until interrupted")
+    schedule_parser.add_argument("--list", action="store_true",
+                                 help="show the next fire time of every schedule and exit")
+    schedule_parser.add_argument("-j", "--jobs", type=int, default=4,
+                                 help="scripts to run in parallel (default: 4)")
+    schedule_parser.add_argument("--warm", action="store_true",
+                                 help="run Python scripts in warm interpreters (POSIX only)")
+    schedule_parser.add_argument("--no-history", action="store_true",
+                                 help="do not record these runs in the run history")
+    add_remote_arguments(schedule_parser)
+    schedule_parser.set_defaults(handler=cmd_schedule)
+
+    import_parser = subparsers.add_parser(
+        "import", help="merge a catalog file (.json, .ndjson or .csv) into the catalog")
+    import_parser.add_argument("file")
+    import_parser.add_argument("--on-conflict", choices=CONFLICT_POLICIES, default="rename",
+                               help="when a name is taken by another script (default: rename)")
+    import_parser.set_defaults(handler=cmd_import)
+
+    export_parser = subparsers.add_parser(
+        "export", help="write the catalog to a file (.json, .ndjson or .csv)")
+    export_parser.add_argument("file")
+    export_parser.set_defaults(handler=cmd_export)
+
+    agent_parser = subparsers.add_parser(
+        "agent", help="run scripts sent by other consoles until interrupted")
+    agent_parser.add_argument("--listen", type=agent_address, default="127.0.0.1:7800",
+                              metavar="HOST:PORT",
+                              help="address to listen on (default: 127.0.0.1:7800)")
+    agent_parser.add_argument("--slots", type=int,
+                              help="scripts to run at once (default: CPU count)")
+    agent_parser.add_argument("--token",
+                              help="token consoles must present (default: "
+                                   "$SCRIPT_RUNNER_AGENT_TOKEN); required beyond localhost")
+    agent_parser.add_argument("--warm", action="store_true",
+                              help="run Python scripts in warm interpreters (POSIX only)")
+    agent_parser.set_defaults(handler=cmd_agent)
+
+    logs_parser = subparsers.add_parser(
+        "logs", help="read and search the archived output of runs")
+    logs_parser.set_defaults(handler=cmd_logs)
+    logs_subparsers = logs_parser.add_subparsers(dest="logs_command")
+    logs_subparsers.required = True
+    run_help = "run log: script name, log name or glob (the newest match is used)"
+
+    logs_list_parser = logs_subparsers.add_parser("list", help="list run logs, newest last")
+    logs_list_parser.add_argument("pattern", nargs="?", metavar="name|glob")
+    logs_list_parser.add_argument("-n", "--limit", type=int, default=20,
+                                  help="number of logs to show (default: 20)")
+    logs_list_parser.set_defaults(logs_handler=cmd_logs_list)
+
+    logs_show_parser = logs_subparsers.add_parser("show", help="print an archived run's output")
+    logs_show_parser.add_argument("run", help=run_help)
+    position = logs_show_parser.add_mutually_exclusive_group()
+    position.add_argument("--line", type=int, metavar="N", help="start at line N")
+    position.add_argument("--at", metavar="TIME",
+                          help="start at the output from TIME: +SECONDS after the run "
+                               "started, HH:MM[:SS] or YYYY-MM-DD HH:MM[:SS]")
+    logs_show_parser.add_argument("-n", "--count", type=int, help="print at most N lines")
+    logs_show_parser.set_defaults(logs_handler=cmd_logs_show)
+
+    logs_tail_parser = logs_subparsers.add_parser(
+        "tail", help="print the end of a run's output, following it while it runs")
+    logs_tail_parser.add_argument("run", help=run_help)
+    logs_tail_parser.add_argument("-n", "--count", type=int, default=10,
+                                  help="lines to print (default: 10)")
+    logs_tail_parser.add_argument("-f", "--follow", action="store_true",
+                                  help="keep printing output until the run has finished")
+    logs_tail_parser.set_defaults(logs_handler=cmd_logs_tail)
+
+    logs_grep_parser = logs_subparsers.add_parser(
+        "grep", help="search archived output, in parallel")
+    logs_grep_parser.add_argument("pattern", help="regular expression")
+    logs_grep_parser.add_argument("runs", nargs="*", metavar="run",
+                                  help="run logs to search (default: all archived runs)")
+    logs_grep_parser.add_argument("-i", "--ignore-case", action="store_true")
+    logs_grep_parser.add_argument("-j", "--jobs", type=int,
+                                  help="processes to search with (default: CPU count)")
+    logs_grep_parser.set_defaults(logs_handler=cmd_logs_grep)
+    return parser
+
+
+def agent_address(text):
+    from .remote import parse_address
+    try:
+        parse_address(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+    return text
+
+
+def add_remote_arguments(parser):
+    parser.add_argument("--remote", action="store_true",
+                        help="run the scripts on the worker agents from the settings")
+    parser.add_argument("--agent", dest="agents", action="append", type=agent_address,
+                        metavar="HOST:PORT",
+                        help="run the scripts on this worker agent (repeatable)")
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    catalog_path = args.catalog or default_catalog_path(load_settings())
+    args.catalog_path = catalog_path
+    args.store = None
+    try:
+        if os.path.exists(catalog_path):
+            args.store = open_store(catalog_path)
+            catalog = args.store.load()
+        else:
+            catalog = {}
+    except Exception as e:
+        print(f"Error: Could not load scripts: {e}", file=sys.stderr)
+        return 2
+    try:
+        return args.handler(args, catalog)
+    except LookupError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
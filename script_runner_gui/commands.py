@@ -0,0 +1,225 @@
+"""
+Command building for Script Runner Pro.
+
+Maps catalog entries to the argument list that runs them. Commands are
+executed directly rather than through a shell, so there is no extra shell
+process per run and no quoting to get wrong. The exception is "Other"
+entries on Windows, which go through cmd /c so that files that aren't
+executables still open with their associated program. This module has no Qt
+dependency so the GUI, the CLI and anything else can share it.
+
+A catalog entry may carry, besides path/type/category:
+  args         list of extra arguments passed to the script
+  env          dict of environment variables set for the run
+  interpreter  program used instead of the default for the script type
+  cache        true, or {"inputs": [globs]}, to reuse the output of earlier
+               identical runs (see cache.py)
+  limits       timeout and resource limits for each run (see limits.py)
+  output_protocol
+               "markers" or "jsonl": the script reports progress, metrics and
+               artifacts on stdout (see events.py)
+"""
+
+import os
+import shlex
+import shutil
+import sys
+from pathlib import Path
+
+SCRIPT_TYPES = ["Python", "PowerShell", "Batch", "CMD", "Shell", "Other"]
+
+EXTENSION_TYPES = {
+    '.py': "Python",
+    '.ps1': "PowerShell",
+    '.bat': "Batch",
+    '.cmd': "CMD",
+    '.sh': "Shell",
+}
+
+# Interpreter candidates per script type, tried in order
+INTERPRETERS = {
+    "Python": ("python", "python3"),
+    "PowerShell": ("pwsh", "powershell"),
+    "Batch": ("cmd",),
+    "CMD": ("cmd",),
+    "Shell": ("bash", "sh"),
+}
+
+# Arguments placed between the interpreter and the script path
+INTERPRETER_ARGS = {
+    "PowerShell": ["-ExecutionPolicy", "Bypass", "-File"],
+    "Batch": ["/c"],
+    "CMD": ["/c"],
+}
+
+_interpreter_cache = {}
+
+
+def detect_script_type(script_path):
+    """Determine script type based on extension."""
+    return EXTENSION_TYPES.get(Path(script_path).suffix.lower(), "Other")
+
+
+def resolve_interpreter(*names):
+    """Return the full path of the first of names found on PATH.
+
+    Lookups are cached, since walking PATH costs a stat per directory. An
+    entry is dropped when PATH changes or the cached file disappears.
+    Falls back to the first name (left for the OS to resolve) if none is found.
+    """
+    path_env = os.environ.get('PATH', '')
+    key = (names, path_env)
+    resolved = _interpreter_cache.get(key)
+    if resolved is not None and os.path.isfile(resolved):
+        return resolved
+    for name in names:
+        resolved = shutil.which(name, path=path_env)
+        if resolved:
+            break
+    else:
+        if names and names[0] in ('python', 'python3') and sys.executable:
+            resolved = sys.executable
+        else:
+            _interpreter_cache.pop(key, None)
+            return names[0]
+    _interpreter_cache[key] = resolved
+    return resolved
+
+
+def clear_interpreter_cache():
+    _interpreter_cache.clear()
+
+
+def build_command(script_info):
+    """Return the argument list that runs a catalog entry."""
+    script_path = script_info['path']
+    script_type = script_info.get('type', "Other")
+    args = list(script_info.get('args') or [])
+
+    interpreter = script_info.get('interpreter')
+    if interpreter:
+        program = resolve_interpreter(interpreter)
+    elif script_type in INTERPRETERS:
+        program = resolve_interpreter(*INTERPRETERS[script_type])
+    elif os.name == 'nt':
+        # As through the shell: cmd runs an executable, and opens any other
+        # file with the program associated with its extension
+        return [resolve_interpreter("cmd"), "/c", script_path] + args
+    else:
+        # Run directly
+        return [script_path] + args
+    return [program] + INTERPRETER_ARGS.get(script_type, []) + [script_path] + args
+
+
+def warm_job(script_info):
+    """Return the warm pool job for a catalog entry, or None if it must start cold.
+
+    Only Python scripts without an interpreter override can run in the
+    pool, whose workers use the interpreter Script Runner itself runs on,
+    and only without limits, which apply to a whole process.
+    """
+    if (script_info.get('type') != "Python" or script_info.get('interpreter')
+            or script_info.get('limits')):
+        return None
+    return {"path": script_info['path'], "args": list(script_info.get('args') or [])}
+
+
+def remote_job(script_info):
+    """Return the job a worker agent needs to run a catalog entry (see agent.py).
+
+    The agent builds the command itself, so interpreters are found on its
+    PATH and env overrides apply on top of its own environment.
+    """
+    job = {"path": script_info['path'], "type": script_info.get('type', "Other"),
+           "category": script_info.get('category', ''),
+           "args": list(script_info.get('args') or [])}
+    for field in ('interpreter', 'env', 'limits'):
+        if script_info.get(field):
+            job[field] = script_info[field]
+    return job
+
+
+def build_env(script_info):
+    """Return the environment for a run, or None to inherit ours unchanged."""
+    overrides = script_info.get('env')
+    if not overrides:
+        return None
+    env = dict(os.environ)
+    env.update({str(key): str(value) for key, value in overrides.items()})
+    return env
+
+
+def cache_spec(script_info):
+    """Return the result cache key material for an entry, or None if it isn't cached."""
+    cache = script_info.get('cache')
+    if not cache:
+        return None
+    inputs = cache.get('inputs') or [] if isinstance(cache, dict) else []
+    return {
+        "script": script_info['path'],
+        "inputs": list(inputs),
+        "command": build_command(script_info),
+        "cwd": working_dir(script_info),
+        "env": {str(key): str(value) for key, value in (script_info.get('env') or {}).items()},
+    }
+
+
+def working_dir(script_info):
+    """Scripts run from the directory they live in."""
+    return os.path.dirname(script_info['path'])
+
+
+def script_missing(engine, script_info):
+    """True if the script file doesn't exist where engine would run it.
+
+    Runs dispatched to worker agents are checked by the agent instead.
+    """
+    remote_pool = engine.remote_pool
+    if remote_pool is not None and remote_pool.enabled:
+        return False
+    return not os.path.exists(script_info['path'])
+
+
+def submit_script(engine, name, script_info):
+    """Queue a catalog entry on an ExecutionEngine and return its ScriptRun."""
+    return engine.submit(name, build_command(script_info), working_dir(script_info),
+                         script_info.get('category', ''), build_env(script_info),
+                         warm_job(script_info), cache_spec(script_info),
+                         remote_job(script_info), script_info.get('limits'),
+                         script_info.get('output_protocol'))
+
+
+def split_args(text):
+    """Split a command-line style string into arguments.
+
+    Quotes group words on every platform; backslashes are only escapes on
+    POSIX, so Windows paths can be typed as they are.
+    """
+    lexer = shlex.shlex(text, posix=True)
+    lexer.whitespace_split = True
+    if os.name == 'nt':
+        lexer.escape = ''
+    return list(lexer)
+
+
+def join_args(args):
+    """Inverse of split_args, for showing arguments in an editor."""
+    if os.name != 'nt':
+        return ' '.join(shlex.quote(arg) for arg in args)
+    return ' '.join(f'"{arg}"' if not arg or any(c.isspace() for c in arg) else arg
+                    for arg in args)
+
+
+def parse_env(text):
+    """Parse "NAME=value NAME2='other value'" into a dict."""
+    env = {}
+    for item in split_args(text):
+        name, sep, value = item.partition('=')
+        if not sep or not name:
+            raise ValueError(f"Expected NAME=value, got '{item}'")
+        env[name] = value
+    return env
+
+
+def format_env(env):
+    return join_args(f"{name}={value}" for name, value in (env or {}).items())
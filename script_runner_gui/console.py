@@ -0,0 +1,570 @@
+"""
+Bounded-memory output console for Script Runner Pro.
+
+The console keeps only the last `max_lines` lines in its text widget, and
+inserts at most that many lines (and `max_chars` characters) of a batch. Everything a run prints is also
+in the run's log file, so older output can be paged back in from disk on
+demand without keeping it in memory.
+
+Live output shows stderr in red and can prefix each line with the time it
+arrived. Pages read back from the log are plain text: the log holds the
+raw bytes of both streams, without stream markers or times.
+
+The search bar finds a pattern in the whole log and can show only the lines
+matching (or not matching) a filter. The log is scanned by a LogSearch on a
+worker thread, incrementally while the run is writing it.
+
+For scripts with an output protocol, a bar above the output shows what the
+run reported: its progress, metrics and links to its artifacts.
+"""
+
+import html
+import queue
+import time
+
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QPushButton, QLabel,
+                             QLineEdit, QCheckBox, QTextEdit, QProgressBar)
+from PyQt5.QtCore import Qt, QThread, QTimer, QUrl, pyqtSignal
+from PyQt5.QtGui import QColor, QTextCharFormat, QTextCursor, QTextFormat
+
+from .engine import STDERR
+from .events import format_metrics
+from .logsearch import LogSearch, Query
+from .runlog import LogPager, output_encoding
+
+STDERR_COLOR = "#c42b1c"
+MATCH_COLOR = "#fff59d"
+CURRENT_MATCH_COLOR = "#ffcc80"
+
+# Pause in typing before a search is started
+QUERY_DEBOUNCE_MS = 300
+
+# How often the search catches up with new output while a run is writing
+SEARCH_REFRESH_MS = 500
+
+# Matches highlighted on one page at most
+MAX_HIGHLIGHTS = 1000
+
+
+def _timestamp(stamp):
+    return time.strftime('%H:%M:%S', time.localtime(stamp)) + f".{int(stamp * 1000) % 1000:03d} "
+
+
+class LogSearchThread(QThread):
+    """Scans one log for a console's query off the GUI thread.
+
+    Only the newest query matters: a search still running when another
+    query (or more output) arrives stops at the next chunk and picks up
+    the new job.
+    """
+    updated = pyqtSignal(object)   # SearchView
+    failed = pyqtSignal(str)
+
+    def __init__(self, path, encoding):
+        super().__init__()
+        self.path = path
+        self.encoding = encoding
+        self.jobs = queue.Queue()
+
+    def set_query(self, query):
+        self.jobs.put(("query", query))
+
+    def refresh(self, final=False):
+        self.jobs.put(("update", final))
+
+    def stop(self):
+        self.jobs.put(None)
+        self.wait()
+
+    def run(self):
+        search = None
+        final = False
+        while True:
+            job = self.jobs.get()
+            query = None
+            # Coalesce everything queued meanwhile
+            while True:
+                if job is None:
+                    return
+                if job[0] == "query":
+                    query = job[1]
+                else:
+                    final = final or job[1]
+                try:
+                    job = self.jobs.get_nowait()
+                except queue.Empty:
+                    break
+            if query is not None:
+                try:
+                    search = LogSearch(self.path, query, self.encoding) if query else None
+                except ValueError as e:
+                    search = None
+                    self.failed.emit(str(e))
+            if search is None:
+                continue
+            last_emit = [time.monotonic()]
+
+            def cancelled():
+                # Called between chunks: show partial results of long scans
+                if time.monotonic() - last_emit[0] > 0.25:
+                    last_emit[0] = time.monotonic()
+                    self.updated.emit(search.view())
+                return not self.jobs.empty()
+
+            if search.update(final, cancelled):
+                self.updated.emit(search.view())
+
+
+class OutputConsole(QWidget):
+    """Live tail of a run's output with paging through its log file."""
+
+    def __init__(self, max_lines=5000, max_chars=4 * 1024 * 1024, timestamps=False,
+                 encoding=None, parent=None):
+        super().__init__(parent)
+        self.max_lines = max_lines
+        self.max_chars = max_chars
+        self.timestamps = timestamps
+        self.encoding = encoding
+        self.pager = None
+        self.at_line_start = True
+        self.last_stream = None
+        self.plain_format = QTextCharFormat()
+        self.stderr_format = QTextCharFormat()
+        self.stderr_format.setForeground(QColor(STDERR_COLOR))
+        self.following = True
+        self.page_start = 0
+        self.page_end = 0
+        self.finished = False
+        self.search_thread = None
+        self.query = Query()
+        self.view = None          # SearchView of self.query, once scanned
+        self.search_error = None
+        self.row_start = 0        # first row shown while filtering
+        self.match_index = -1
+        self.current_line = -1    # block of the current match on the page
+        self.events_version = 0
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.events_bar = QWidget()
+        events_layout = QHBoxLayout(self.events_bar)
+        events_layout.setContentsMargins(0, 0, 0, 0)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setMaximumWidth(200)
+        events_layout.addWidget(self.progress_bar)
+        self.progress_label = QLabel()
+        events_layout.addWidget(self.progress_label)
+        self.metrics_label = QLabel()
+        self.metrics_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        events_layout.addWidget(self.metrics_label, 1)
+        self.artifacts_label = QLabel()
+        self.artifacts_label.setOpenExternalLinks(True)
+        events_layout.addWidget(self.artifacts_label)
+        layout.addWidget(self.events_bar)
+        self.events_bar.setVisible(False)
+
+        self.search_bar = QWidget()
+        search_layout = QHBoxLayout(self.search_bar)
+        search_layout.setContentsMargins(0, 0, 0, 0)
+        self.find_edit = QLineEdit()
+        self.find_edit.setPlaceholderText("Find in output...")
+        self.find_edit.returnPressed.connect(self.next_match)
+        search_layout.addWidget(self.find_edit, 2)
+        self.prev_btn = QPushButton("◀")
+        self.prev_btn.clicked.connect(self.previous_match)
+        search_layout.addWidget(self.prev_btn)
+        self.next_btn = QPushButton("▶")
+        self.next_btn.clicked.connect(self.next_match)
+        search_layout.addWidget(self.next_btn)
+        self.include_edit = QLineEdit()
+        self.include_edit.setPlaceholderText("Show only lines with...")
+        search_layout.addWidget(self.include_edit, 1)
+        self.exclude_edit = QLineEdit()
+        self.exclude_edit.setPlaceholderText("Hide lines with...")
+        search_layout.addWidget(self.exclude_edit, 1)
+        self.regex_check = QCheckBox("Regex")
+        search_layout.addWidget(self.regex_check)
+        self.case_check = QCheckBox("Match case")
+        search_layout.addWidget(self.case_check)
+        self.search_label = QLabel()
+        search_layout.addWidget(self.search_label)
+        layout.addWidget(self.search_bar)
+
+        self.query_timer = QTimer(self)
+        self.query_timer.setSingleShot(True)
+        self.query_timer.setInterval(QUERY_DEBOUNCE_MS)
+        self.query_timer.timeout.connect(self.apply_query)
+        for edit in (self.find_edit, self.include_edit, self.exclude_edit):
+            edit.textChanged.connect(lambda text: self.query_timer.start())
+        for check in (self.regex_check, self.case_check):
+            check.toggled.connect(self.apply_query)
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(SEARCH_REFRESH_MS)
+        self.refresh_timer.timeout.connect(self.refresh_search)
+
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        # Qt drops the oldest blocks once this many are held: the ring buffer
+        self.text.setMaximumBlockCount(max_lines)
+        layout.addWidget(self.text)
+
+        nav_layout = QHBoxLayout()
+        self.older_btn = QPushButton("▲ Older")
+        self.older_btn.clicked.connect(self.show_older)
+        nav_layout.addWidget(self.older_btn)
+
+        self.newer_btn = QPushButton("▼ Newer")
+        self.newer_btn.clicked.connect(self.show_newer)
+        nav_layout.addWidget(self.newer_btn)
+
+        self.follow_btn = QPushButton("⤓ Follow")
+        self.follow_btn.clicked.connect(self.follow)
+        nav_layout.addWidget(self.follow_btn)
+
+        self.position_label = QLabel()
+        nav_layout.addWidget(self.position_label)
+        nav_layout.addStretch()
+        layout.addLayout(nav_layout)
+
+        self.search_bar.setVisible(False)
+        self.update_navigation()
+
+    def set_log_path(self, path):
+        self.pager = LogPager(path, self.encoding) if path else None
+        self.search_bar.setVisible(self.pager is not None)
+        self.update_navigation()
+
+    def run_finished(self):
+        """The log is complete: let the search take in a last unterminated line."""
+        self.finished = True
+        self.refresh_search()
+
+    def shutdown(self):
+        if self.search_thread is not None:
+            self.search_thread.stop()
+            self.search_thread = None
+
+    def show_events(self, events):
+        """Show what a run reported through its output protocol (an OutputEvents)."""
+        if events is None or events.version == self.events_version:
+            return
+        self.events_version = events.version
+        self.events_bar.setVisible(True)
+        self.progress_bar.setVisible(events.progress is not None)
+        if events.progress is not None:
+            self.progress_bar.setValue(int(events.progress * 10))
+            self.progress_bar.setFormat(f"{events.progress:.0f}%")
+        self.progress_label.setText(events.message)
+        self.metrics_label.setText(format_metrics(events.metrics))
+        links = []
+        for artifact in events.artifacts:
+            path = artifact["path"]
+            url = path if '://' in path else QUrl.fromLocalFile(path).toString()
+            links.append(f'<a href="{html.escape(url)}">{html.escape(artifact["label"])}</a>')
+        self.artifacts_label.setText(' · '.join(links))
+        self.artifacts_label.setToolTip('\n'.join(artifact["path"] for artifact in events.artifacts))
+
+    @property
+    def filtering(self):
+        return self.view is not None and self.view.filtered
+
+    def append_text(self, text):
+        """Append a plain message; ignored while paging through history."""
+        if text:
+            self.append_segments([(None, None, text)])
+
+    def append_segments(self, segments):
+        """Append drained (stream, timestamp, text) output segments."""
+        if segments and self.query and not self.refresh_timer.isActive():
+            self.refresh_timer.start()
+        if not segments or not self.following or self.filtering:
+            return
+        segments = self._trim(segments)
+        cursor = QTextCursor(self.text.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        for stream, stamp, text in segments:
+            if stream != self.last_stream and not self.at_line_start:
+                # Don't glue a partial line of one stream to the other
+                cursor.insertText('\n', self.plain_format)
+                self.at_line_start = True
+            self.last_stream = stream
+            if self.timestamps and stamp is not None:
+                text = self._stamp(text, _timestamp(stamp))
+            cursor.insertText(text, self.stderr_format if stream == STDERR else self.plain_format)
+            self.at_line_start = text.endswith('\n')
+        cursor.endEditBlock()
+        # Auto-scroll to bottom
+        scrollbar = self.text.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+
+    def _trim(self, segments):
+        # The head of a batch of more than max_lines lines or max_chars
+        # characters would be trimmed right away
+        chars = lines = 0
+        for index in range(len(segments) - 1, -1, -1):
+            text = segments[index][2]
+            chars += len(text)
+            lines += text.count('\n')
+            if chars > self.max_chars or lines > self.max_lines:
+                break
+        else:
+            return segments
+        stream, stamp, text = segments[index]
+        # Line ends of this segment that still fit
+        room = self.max_lines - (lines - text.count('\n'))
+        if chars > self.max_chars:
+            text = text[chars - self.max_chars:]
+        cut = len(text)
+        for _ in range(room + 1):
+            cut = text.rfind('\n', 0, cut)
+            if cut < 0:
+                break
+        if cut < 0 and chars > self.max_chars:
+            # Don't start with the tail of a cut line
+            cut = text.find('\n')
+        text = text[cut + 1:]
+        return ([(stream, stamp, text)] if text else []) + segments[index + 1:]
+
+    def _stamp(self, text, prefix):
+        body = text[:-1] if text.endswith('\n') else text
+        body = body.replace('\n', '\n' + prefix)
+        if self.at_line_start:
+            body = prefix + body
+        return body + '\n' if text.endswith('\n') else body
+
+    def clear(self):
+        self.text.clear()
+        self.at_line_start = True
+        self.last_stream = None
+
+    def show_older(self):
+        if self.pager is None:
+            return
+        if self.filtering:
+            if self.row_start > 0:
+                self.show_rows(max(0, self.row_start - self.max_lines))
+            return
+        if self.following:
+            # Start paging from just before what the live view is showing
+            self.page_start, _ = self.pager.read_before(
+                self.pager.size(), self.text.document().blockCount())
+            self.following = False
+        if self.page_start <= 0:
+            return
+        end = self.page_start
+        self.page_start, text = self.pager.read_before(end, self.max_lines)
+        self.page_end = end
+        self.show_page(text, scroll_to_end=True)
+
+    def show_newer(self):
+        if self.pager is None or self.following:
+            return
+        if self.filtering:
+            if self.row_start + self.max_lines >= self.view.row_count:
+                self.follow()
+            else:
+                self.show_rows(self.row_start + self.max_lines)
+            return
+        if self.page_end >= self.pager.size():
+            self.follow()
+            return
+        start = self.page_end
+        self.page_end, text = self.pager.read_after(start, self.max_lines)
+        self.page_start = start
+        self.show_page(text, scroll_to_end=False)
+
+    def follow(self):
+        """Return to the live tail, reloading it from the log."""
+        self.following = True
+        self.current_line = -1
+        if self.filtering:
+            self.show_rows(max(0, self.view.row_count - self.max_lines))
+            return
+        if self.pager is not None:
+            _, text = self.pager.read_before(self.pager.size(), self.max_lines)
+            self.text.setPlainText(text)
+            self.at_line_start = not text or text.endswith('\n')
+            self.last_stream = None
+            scrollbar = self.text.verticalScrollBar()
+            scrollbar.setValue(scrollbar.maximum())
+        self.highlight_matches()
+        self.update_navigation()
+
+    def show_page(self, text, scroll_to_end):
+        self.text.setPlainText(text)
+        scrollbar = self.text.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum() if scroll_to_end else 0)
+        self.highlight_matches()
+        self.update_navigation()
+
+    def show_rows(self, first):
+        """Show filtered rows from `first`; following if they reach the end."""
+        self.row_start = first
+        self.following = first + self.max_lines >= self.view.row_count
+        self.show_page(self.view.read_rows(first, self.max_lines), scroll_to_end=self.following)
+
+    # Search
+
+    def apply_query(self, *args):
+        query = Query(self.find_edit.text(), self.include_edit.text(), self.exclude_edit.text(),
+                      self.regex_check.isChecked(), self.case_check.isChecked())
+        if query == self.query or self.pager is None:
+            return
+        was_filtering = self.filtering
+        self.query = query
+        self.view = None
+        self.search_error = None
+        self.match_index = -1
+        self.current_line = -1
+        if query and self.search_thread is None:
+            self.search_thread = LogSearchThread(self.pager.path, output_encoding(self.encoding))
+            self.search_thread.updated.connect(self.on_search_updated)
+            self.search_thread.failed.connect(self.on_search_failed)
+            self.search_thread.start()
+        if self.search_thread is not None:
+            self.search_thread.set_query(query)
+            self.search_thread.refresh(self.finished)
+        if was_filtering:
+            # Back to the unfiltered log until the new results arrive
+            self.follow()
+        self.highlight_matches()
+        self.update_navigation()
+
+    def refresh_search(self):
+        if self.search_thread is not None and self.query:
+            self.search_thread.refresh(self.finished)
+
+    def on_search_updated(self, view):
+        if view.query != self.query:
+            return
+        first = self.view is None or self.view.filtered != view.filtered
+        self.view = view
+        if view.filtered and (first or self.following):
+            self.show_rows(max(0, view.row_count - self.max_lines))
+        elif first or self.following:
+            self.highlight_matches()
+        self.update_navigation()
+
+    def on_search_failed(self, message):
+        self.search_error = message
+        self.update_search_label()
+
+    def next_match(self):
+        self.step_match(1)
+
+    def previous_match(self):
+        self.step_match(-1)
+
+    def step_match(self, step):
+        if self.query_timer.isActive():
+            self.query_timer.stop()
+            self.apply_query()
+        if self.view is None or not self.view.match_count:
+            return
+        if self.match_index < 0:
+            # Start from what is on screen
+            offset = self.view.row_offset(self.row_start) if (
+                self.filtering and self.row_start < self.view.row_count) else self.page_start
+            if self.following:
+                index = self.view.match_count if step < 0 else -1
+            else:
+                index = self.view.match_at_or_after(offset) - (1 if step > 0 else 0)
+        else:
+            index = self.match_index
+        self.show_match((index + step) % self.view.match_count)
+
+    def show_match(self, index):
+        """Show the page around match `index` (O(1) from the match array)."""
+        self.match_index = index
+        offset = self.view.match_offset(index)
+        half = self.max_lines // 2
+        if self.filtering:
+            row = self.view.row_of_offset(offset)
+            first = max(0, row - half)
+            self.current_line = row - first
+            self.row_start = first
+            self.following = False
+            self.show_page(self.view.read_rows(first, self.max_lines), scroll_to_end=False)
+        else:
+            self.page_start, before = self.pager.read_before(offset, half)
+            self.page_end, after = self.pager.read_after(offset, half)
+            self.current_line = before.count('\n')
+            self.following = False
+            self.show_page(before + after, scroll_to_end=False)
+        block = self.text.document().findBlockByNumber(self.current_line)
+        if block.isValid():
+            self.text.setTextCursor(QTextCursor(block))
+            self.text.centerCursor()
+
+    def highlight_matches(self):
+        """Mark the find pattern on the page shown, and the current match line."""
+        selections = []
+        try:
+            pattern = self.query.text_pattern()
+        except ValueError:
+            pattern = None
+        document = self.text.document()
+        if pattern is not None:
+            match_format = QTextCharFormat()
+            match_format.setBackground(QColor(MATCH_COLOR))
+            for count, match in enumerate(pattern.finditer(document.toPlainText())):
+                if count >= MAX_HIGHLIGHTS:
+                    break
+                if match.end() == match.start():
+                    continue
+                selection = QTextEdit.ExtraSelection()
+                selection.cursor = QTextCursor(document)
+                selection.cursor.setPosition(match.start())
+                selection.cursor.setPosition(match.end(), QTextCursor.KeepAnchor)
+                selection.format = match_format
+                selections.append(selection)
+        if self.current_line >= 0:
+            block = document.findBlockByNumber(self.current_line)
+            if block.isValid():
+                selection = QTextEdit.ExtraSelection()
+                selection.cursor = QTextCursor(block)
+                selection.format.setBackground(QColor(CURRENT_MATCH_COLOR))
+                selection.format.setProperty(QTextFormat.FullWidthSelection, True)
+                selections.insert(0, selection)
+        self.text.setExtraSelections(selections)
+
+    def update_navigation(self):
+        has_log = self.pager is not None
+        if self.filtering:
+            self.older_btn.setEnabled(self.row_start > 0)
+        else:
+            self.older_btn.setEnabled(has_log and (self.following or self.page_start > 0))
+        self.newer_btn.setEnabled(has_log and not self.following)
+        self.follow_btn.setEnabled(has_log and not self.following)
+        if self.filtering:
+            last = min(self.row_start + self.max_lines, self.view.row_count)
+            self.position_label.setText(
+                f"{'Live · ' if self.following else ''}Lines {self.row_start + 1:,}-{last:,} "
+                f"of {self.view.row_count:,} shown")
+        elif self.following:
+            self.position_label.setText("Live")
+        else:
+            self.position_label.setText(
+                f"Bytes {self.page_start:,}-{self.page_end:,} of {self.pager.size():,}")
+        self.update_search_label()
+
+    def update_search_label(self):
+        has_matches = self.view is not None and self.view.match_count > 0
+        self.prev_btn.setEnabled(has_matches)
+        self.next_btn.setEnabled(has_matches)
+        if not self.query:
+            self.search_label.clear()
+        elif self.search_error:
+            self.search_label.setText(self.search_error)
+        elif self.view is None:
+            self.search_label.setText("Searching...")
+        elif self.query.find:
+            position = f"{self.match_index + 1:,} of " if self.match_index >= 0 else ""
+            self.search_label.setText(f"{position}{self.view.match_count:,} matches in "
+                                      f"{self.view.line_count:,} lines")
+        else:
+            self.search_label.setText(f"{self.view.line_count:,} lines")
@@ -0,0 +1,820 @@
+"""
+Headless execution engine for Script Runner Pro.
+
+All child processes are supervised by a single asyncio event loop running
+on one background thread, so hundreds of concurrent runs cost no OS thread
+each. At most max_workers runs execute at once; runs submitted beyond that
+wait in a FIFO queue and start as soon as a slot frees up. The engine has
+no Qt dependency; front ends observe runs through the callbacks passed to
+ExecutionEngine.
+
+stdout and stderr are kept as separate streams. Each is read in whatever
+chunks the pipe delivers and decoded incrementally, so a script that prints
+millions of lines costs a handful of reads and callbacks per second instead
+of one per line. When a log directory is configured the raw bytes of both
+streams are also written, in arrival order, to the run's log file. With
+a LogArchive (archive.py) the log of a finished run is then archived on a
+worker thread, with marks of when its output arrived.
+
+Every run records its start/end time, wall-clock duration and output size.
+On POSIX systems the child is reaped with wait4(), which also yields its
+CPU time. A child starts out with its parent's peak RSS as its own, so
+wait4()'s figure is only taken (covering any descendants it waited for)
+once it exceeds the engine process's own peak. Below that the peak is
+sampled from /proc while the child runs (Linux), and only kept if the
+child ran for RSS_SAMPLE_INTERVAL or more: the samples of a shorter run
+only show its start-up. Otherwise max_rss stays None.
+
+Every run is started in a process group of its own. Stopping a run sends
+SIGTERM to the whole group and SIGKILL KILL_GRACE seconds later if it is
+still running; a run's limits (limits.py) can stop it after a timeout.
+On POSIX a running run can also be suspended and resumed as a whole.
+
+Scripts with an output protocol (events.py) report progress, metrics and
+artifacts on stdout; the sink takes those lines out of the decoded output
+and keeps what they reported in the run's OutputEvents.
+
+Runs submitted with cache key material are looked up in the engine's
+ResultCache first; a hit replays the stored output through the same path
+as live output, so consoles, logs and history can't tell the difference.
+
+With a RemotePool (remote.py) that has agents configured, runs submitted
+with a remote job execute on worker agents instead. They don't take local
+worker slots: they wait in their own queue until the pool can place them
+on an agent with a free slot.
+"""
+
+import asyncio
+import codecs
+import collections
+import functools
+import io
+import itertools
+import os
+import signal
+import subprocess
+import threading
+import time
+
+from .archive import MARK_INTERVAL
+from .events import OutputEvents
+from .limits import KILL_GRACE, kill_tree, limited_command, normalize_limits, popen_options
+from .runlog import new_log_path, output_encoding
+from .stats import own_max_rss, process_max_rss, rusage_max_rss
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+CANCELLED = "cancelled"
+
+STDOUT = "stdout"
+STDERR = "stderr"
+
+# Seconds between samples of a running child's peak RSS: the first ones
+# come quickly, to catch start-up spikes, then the gap doubles
+RSS_FIRST_SAMPLE = 0.01
+RSS_SAMPLE_INTERVAL = 0.5
+
+
+def default_worker_count():
+    return os.cpu_count() or 1
+
+
+def _new_event_loop():
+    if os.name == 'nt':
+        # Only the proactor loop supports subprocesses on Windows
+        return asyncio.ProactorEventLoop()
+    return asyncio.new_event_loop()
+
+
+def _new_decoder(encoding):
+    return io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder(encoding)(errors='replace'),
+        translate=True
+    )
+
+
+class OutputBuffer:
+    """Thread-safe accumulator that hands output over to a consumer in batches.
+
+    The engine appends chunks as they arrive; the consumer drains everything
+    gathered since its last visit in one call, as a list of
+    (stream, timestamp, text) segments in arrival order. A buffer nobody
+    drains is closed, so it doesn't grow for as long as the run lasts.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._lock = threading.Lock()
+
+    def append(self, text, stream=STDOUT):
+        with self._lock:
+            if self._chunks is not None:
+                self._chunks.append((stream, time.time(), text))
+
+    def drain(self):
+        with self._lock:
+            chunks = self._chunks
+            if chunks is not None:
+                self._chunks = []
+        return chunks or []
+
+    def close(self):
+        """Drop what was gathered and ignore any further output."""
+        with self._lock:
+            self._chunks = None
+
+
+class ScriptRun:
+    """A single scheduled execution of a catalog script.
+
+    command is either an argument list, executed directly, or a command
+    line (str) run through the shell. env replaces the inherited environment
+    when given. warm, a dict with the script's "path" and "args", lets the
+    engine's warm pool run a Python script instead of starting command.
+    cache is the key material for the engine's result cache (see
+    commands.cache_spec); cache_hit tells afterwards whether it was used.
+    remote is the job sent to a worker agent (see commands.remote_job);
+    agent names the agent the run was placed on, if any. limits is the
+    catalog entry's "limits" (see limits.py); timed_out tells afterwards
+    whether its timeout stopped the run. suspended is set while the run is
+    stopped with ExecutionEngine.suspend(). output_protocol names the way
+    the script reports structured output (see events.py); events holds
+    what it reported once the run has started.
+    """
+
+    def __init__(self, run_id, name, command, working_dir=None, category='', env=None,
+                 warm=None, cache=None, remote=None, limits=None, output_protocol=None):
+        self.run_id = run_id
+        self.name = name
+        self.category = category
+        self.command = command
+        self.working_dir = working_dir
+        self.env = env
+        self.warm = warm
+        self.cache = cache
+        self.cache_hit = None
+        self.remote = remote
+        self.agent = None
+        self.limits = limits
+        self.timed_out = False
+        self.suspended = False
+        self.output_protocol = output_protocol
+        self.events = None
+        self.state = QUEUED
+        self.exit_code = None
+        self.process = None
+        self.cancel_requested = False
+        self.output = OutputBuffer()
+        self.log_path = None
+        self.started_at = None
+        self.ended_at = None
+        self.duration = None
+        self.cpu_user = None
+        self.cpu_system = None
+        self.max_rss = None
+        self.output_bytes = 0
+        self.history_id = None
+        self._sink = None
+        self._own_group = False
+
+    @property
+    def is_active(self):
+        return self.state in (QUEUED, RUNNING)
+
+    @property
+    def pid(self):
+        """Process id of the running script, or None if it has no local process."""
+        process = self.process
+        if process is None or self.state != RUNNING or self.agent is not None:
+            return None
+        if isinstance(process, subprocess.Popen):
+            return process.pid
+        return process.get_pid()
+
+    def stats(self):
+        """Resource usage of the run as a plain dict."""
+        return {
+            "run_id": self.run_id,
+            "name": self.name,
+            "exit_code": self.exit_code,
+            "started_at": self.started_at,
+            "ended_at": self.ended_at,
+            "duration": self.duration,
+            "cpu_user": self.cpu_user,
+            "cpu_system": self.cpu_system,
+            "max_rss": self.max_rss,
+            "output_bytes": self.output_bytes,
+            "agent": self.agent,
+            "timed_out": self.timed_out,
+            "metrics": self.events.metrics if self.events is not None else None,
+        }
+
+    def _terminate(self, force=False):
+        # Runs on the engine's event loop
+        process = self.process
+        if process is None:
+            return
+        try:
+            if isinstance(process, subprocess.Popen):
+                # Don't use Popen.poll()/terminate(): they may reap the child
+                # before wait4() gets to collect its resource usage. The pid
+                # (and so the process group id) can't be reused until the
+                # child is reaped, so signalling it directly is safe.
+                if process.returncode is None:
+                    if self._own_group:
+                        kill_tree(process.pid, force)
+                    else:
+                        os.kill(process.pid, signal.SIGKILL if force else signal.SIGTERM)
+            elif self._own_group and process.get_returncode() is None:
+                kill_tree(process.get_pid(), force)
+            elif force:
+                process.kill()
+            else:
+                process.terminate()
+        except OSError:
+            pass
+
+    def _signal(self, signum):
+        # Runs on the engine's event loop; POSIX only
+        pid = self.pid
+        if pid is None:
+            return False
+        try:
+            if self._own_group:
+                os.killpg(pid, signum)
+            else:
+                os.kill(pid, signum)
+        except OSError:
+            return False
+        return True
+
+
+class ExecutionEngine:
+    """Runs at most max_workers scripts at a time on one event loop thread.
+
+    Callbacks are invoked from the engine thread:
+      on_started(run), on_output(run, text, stream), on_finished(run),
+      on_raw_output(run, data, stream), on_event(run, event)
+
+    on_output receives decoded chunks of STDOUT or STDERR that may hold many
+    lines, or part of one; newlines are normalised to "\\n". on_raw_output
+    receives the same output as undecoded bytes. on_event receives the
+    events (see events.py) of runs with an output protocol as they are
+    parsed; like the lines they came from, they need on_output.
+
+    encoding overrides the locale's preferred encoding for decoding child
+    output. warm_pool (a WarmPool) runs the runs submitted with warm=...,
+    result_cache (a ResultCache) serves those submitted with cache=... and
+    remote_pool (a RemotePool) those submitted with remote=... . archive
+    (a LogArchive) keeps the logs of finished runs; it needs log_dir.
+    """
+
+    def __init__(self, max_workers=None, on_started=None, on_output=None,
+                 on_finished=None, log_dir=None, history=None, encoding=None,
+                 warm_pool=None, result_cache=None, remote_pool=None, on_raw_output=None,
+                 on_event=None, archive=None):
+        self.max_workers = max(1, max_workers or default_worker_count())
+        self.log_dir = log_dir
+        self.history = history
+        self.archive = archive
+        self.encoding = output_encoding(encoding)
+        self.on_started = on_started
+        self.on_output = on_output
+        self.on_finished = on_finished
+        self.on_raw_output = on_raw_output
+        self.on_event = on_event
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pending = collections.deque()
+        self._remote_pending = collections.deque()
+        self._runs = {}
+        self._busy = 0
+        self._tasks = set()
+        self._archiving = set()
+        self._loop = _new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever,
+                                        name="script-runner-engine", daemon=True)
+        self._thread.start()
+        self.result_cache = result_cache
+        self.warm_pool = warm_pool
+        if warm_pool is not None:
+            warm_pool.start(self._loop)
+        self.remote_pool = remote_pool
+        if remote_pool is not None:
+            remote_pool.start(self._loop, self._start_pending)
+
+    def submit(self, name, command, working_dir=None, category='', env=None, warm=None,
+               cache=None, remote=None, limits=None, output_protocol=None):
+        """Queue a command for execution and return its ScriptRun."""
+        run = ScriptRun(next(self._ids), name, command, working_dir, category, env, warm, cache,
+                        remote, limits, output_protocol)
+        if self.log_dir:
+            run.log_path = new_log_path(self.log_dir, run.run_id, name)
+        with self._lock:
+            self._runs[run.run_id] = run
+            if remote is not None and self.remote_pool is not None and self.remote_pool.enabled:
+                self._remote_pending.append(run)
+            else:
+                self._pending.append(run)
+        self._loop.call_soon_threadsafe(self._start_pending)
+        return run
+
+    def run_coroutine(self, coro):
+        """Run coro on the engine's event loop; returns a concurrent.futures.Future.
+
+        For front ends that serve runs over the network (see agent.py), so
+        they can react to output without hopping between threads.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def set_output_paused(self, run, paused):
+        """Stop or resume reading a running child's output (on the engine loop).
+
+        A paused child blocks once its pipe buffer is full, which is how a
+        slow consumer of on_raw_output pushes back on a fast script.
+        """
+        if run._sink is not None:
+            run._sink.set_paused(paused)
+
+    def cancel(self, run_id):
+        """Cancel a queued run or terminate a running one."""
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None or not run.is_active:
+                return False
+            run.cancel_requested = True
+            if run.state == QUEUED:
+                if run in self._remote_pending:
+                    self._remote_pending.remove(run)
+                else:
+                    self._pending.remove(run)
+                run.state = CANCELLED
+                run.exit_code = -1
+                queued = True
+            else:
+                queued = False
+        if queued:
+            self._notify(self.on_finished, run)
+        else:
+            self._loop.call_soon_threadsafe(self._stop, run)
+        return True
+
+    def suspend(self, run_id):
+        """Stop a running run and everything it started, until resume() (POSIX)."""
+        return self._send_signal(run_id, getattr(signal, 'SIGSTOP', None), True)
+
+    def resume(self, run_id):
+        return self._send_signal(run_id, getattr(signal, 'SIGCONT', None), False)
+
+    def _send_signal(self, run_id, signum, suspended):
+        run = self._runs.get(run_id)
+        if signum is None or run is None or run.pid is None:
+            return False
+
+        def send():
+            if run._signal(signum):
+                run.suspended = suspended
+        self._loop.call_soon_threadsafe(send)
+        return True
+
+    def set_max_workers(self, max_workers):
+        with self._lock:
+            self.max_workers = max(1, max_workers or default_worker_count())
+        self._loop.call_soon_threadsafe(self._start_pending)
+
+    def get_run(self, run_id):
+        return self._runs.get(run_id)
+
+    def forget(self, run_id):
+        """Drop bookkeeping for a run that is no longer active."""
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None and not run.is_active:
+                del self._runs[run_id]
+
+    def running_runs(self):
+        """The runs executing right now, in the order they were submitted."""
+        with self._lock:
+            return [run for run in self._runs.values() if run.state == RUNNING]
+
+    @property
+    def running_count(self):
+        with self._lock:
+            return sum(1 for run in self._runs.values() if run.state == RUNNING)
+
+    @property
+    def queued_count(self):
+        with self._lock:
+            return len(self._pending) + len(self._remote_pending)
+
+    def shutdown(self):
+        """Cancel everything that is queued or running."""
+        with self._lock:
+            active = [run_id for run_id, run in self._runs.items() if run.is_active]
+        for run_id in active:
+            self.cancel(run_id)
+        if self.warm_pool is not None:
+            self._loop.call_soon_threadsafe(self.warm_pool.close)
+        if self.remote_pool is not None:
+            self._loop.call_soon_threadsafe(self.remote_pool.close)
+
+    def wait_archived(self):
+        """Block until the logs of all finished runs are archived.
+
+        For front ends that exit once their runs finish (see cli.py).
+        """
+        async def archived():
+            while self._archiving:
+                await asyncio.wait(set(self._archiving))
+        asyncio.run_coroutine_threadsafe(archived(), self._loop).result()
+
+    def _stop(self, run):
+        # Runs on the event loop: ask nicely, then make sure
+        run._terminate()
+        if run.suspended:
+            # A stopped process only acts on SIGTERM once it is continued
+            run._signal(signal.SIGCONT)
+            run.suspended = False
+        self._loop.call_later(KILL_GRACE, self._kill_if_running, run)
+
+    def _kill_if_running(self, run):
+        if run.state == RUNNING:
+            run._terminate(force=True)
+
+    def _time_out(self, run, timeout):
+        run.timed_out = True
+        self._notify(self.on_output, run, f"Timed out after {timeout:g} s, stopping the script\n",
+                     STDERR)
+        self._stop(run)
+
+    def _start_pending(self):
+        # Runs on the event loop
+        started = []
+        with self._lock:
+            while self._pending and self._busy < self.max_workers:
+                run = self._pending.popleft()
+                run.state = RUNNING
+                self._busy += 1
+                started.append(run)
+            while self._remote_pending:
+                # Placement reserves a slot on the chosen agent
+                if not self.remote_pool.place(self._remote_pending[0]):
+                    break
+                run = self._remote_pending.popleft()
+                run.state = RUNNING
+                started.append(run)
+        for run in started:
+            task = self._loop.create_task(self._execute(run))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, run):
+        run.started_at = time.time()
+        started = time.perf_counter()
+        self._notify(self.on_started, run)
+        marks = None
+        try:
+            if run.cancel_requested:
+                raise _Cancelled()
+            sink = _OutputSink(self, run)
+            marks = sink.marks
+            run._sink = sink
+            try:
+                key = await self._cache_lookup(run, sink)
+                if not run.cache_hit:
+                    run.exit_code = await self._launch_limited(run, sink)
+                    if (key is not None and run.exit_code == 0 and not run.cancel_requested
+                            and sink.captured is not None):
+                        await self._cache_store(run, key, sink.captured)
+            finally:
+                run._sink = None
+                sink.close()
+        except _Cancelled:
+            run.exit_code = -1
+        except Exception as e:
+            self._notify(self.on_output, run, f"Error: {str(e)}\n", STDERR)
+            run.exit_code = -1
+
+        run.ended_at = time.time()
+        run.duration = time.perf_counter() - started
+        run.state = CANCELLED if run.cancel_requested else FINISHED
+        if self.history is not None:
+            try:
+                # Compressing and storing the output must not stall the loop
+                run.history_id = await self._loop.run_in_executor(
+                    None, self.history.record, run, run.category)
+            except Exception as e:
+                self._notify(self.on_output, run,
+                             f"Could not record run history: {str(e)}\n", STDERR)
+        if marks is not None:
+            # Compressing a large log takes a while; nothing waits for it
+            archived = self._loop.run_in_executor(None, self.archive.add, run.log_path, marks, {
+                "name": run.name, "run_id": run.run_id, "category": run.category,
+                "started_at": run.started_at, "ended_at": run.ended_at,
+                "exit_code": run.exit_code, "encoding": self.encoding})
+            self._archiving.add(archived)
+            archived.add_done_callback(functools.partial(self._archive_done, run))
+        if run.agent is None:
+            with self._lock:
+                self._busy -= 1
+        else:
+            self.remote_pool.release(run)
+        self._notify(self.on_finished, run)
+        self._start_pending()
+
+    def _archive_done(self, run, future):
+        self._archiving.discard(future)
+        if not future.cancelled() and future.exception() is not None:
+            self._notify(self.on_output, run,
+                         f"Could not archive the run's output: {str(future.exception())}\n",
+                         STDERR)
+
+    async def _launch_limited(self, run, sink):
+        if run.agent is not None:
+            # The agent applies the limits, timeout included
+            return await self._launch(run, sink)
+        run.limits = normalize_limits(run.limits)
+        timeout = run.limits.get("timeout")
+        timer = None
+        if timeout:
+            timer = self._loop.call_later(timeout, self._time_out, run, timeout)
+        try:
+            return await self._launch(run, sink)
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+    async def _launch(self, run, sink):
+        if run.agent is not None:
+            return await self.remote_pool.run(run, sink)
+        if run.warm is not None and self.warm_pool is not None:
+            job = dict(run.warm, cwd=run.working_dir, env=run.env)
+            return await self.warm_pool.run(run, sink, job)
+        if hasattr(os, 'wait4'):
+            return await self._run_posix(run, sink)
+        return await self._run_transport(run, sink)
+
+    async def _cache_lookup(self, run, sink):
+        """Replay a cached result if there is one; returns the run's cache key.
+
+        Hashing inputs and reading the entry happen off the loop. On a miss
+        the sink starts capturing output so a successful run can be stored.
+        """
+        if run.cache is None or self.result_cache is None:
+            return None
+        try:
+            key = await self._loop.run_in_executor(None, self.result_cache.key, run.cache)
+            entry = await self._loop.run_in_executor(None, self.result_cache.get, key)
+        except OSError as e:
+            self._notify(self.on_output, run, f"Result cache unavailable: {str(e)}\n", STDERR)
+            return None
+        run.cache_hit = entry is not None
+        if entry is None:
+            sink.captured = []
+            sink.capture_limit = self.result_cache.max_entry_bytes
+            return key
+        run.exit_code, chunks = entry
+        for stream, data in chunks:
+            sink.feed(stream, data)
+        return key
+
+    async def _cache_store(self, run, key, chunks):
+        try:
+            await self._loop.run_in_executor(
+                None, self.result_cache.put, key, run.exit_code, chunks)
+        except OSError as e:
+            # The run itself succeeded; only the next one misses out
+            self._notify(self.on_output, run, f"Could not cache the result: {str(e)}\n", STDERR)
+
+    async def _run_posix(self, run, sink):
+        # asyncio's own subprocess support reaps children in its child
+        # watcher, which would lose their rusage; spawn with Popen and let
+        # the loop watch only the pipes.
+        process = subprocess.Popen(
+            limited_command(run.command, run.limits),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=run.working_dir,
+            env=run.env,
+            shell=isinstance(run.command, str),
+            **popen_options(run.limits)
+        )
+        # An upper bound of the peak RSS the child inherited from us
+        inherited = own_max_rss()
+        run.process = process
+        run._own_group = True
+        sampled = {}
+        sampler = self._loop.create_task(self._sample_rss(process.pid, sampled))
+        try:
+            closed = [await sink.watch_pipe(STDOUT, process.stdout),
+                      await sink.watch_pipe(STDERR, process.stderr)]
+            await asyncio.gather(*closed)
+        finally:
+            sampler.cancel()
+        return await self._wait(run, inherited, sampled)
+
+    @staticmethod
+    async def _sample_rss(pid, sampled):
+        # Records the highest peak seen and whether the child was still
+        # running after RSS_SAMPLE_INTERVAL
+        delay = RSS_FIRST_SAMPLE
+        elapsed = 0
+        while True:
+            peak = process_max_rss(pid)
+            if peak is not None:
+                sampled["peak"] = max(sampled.get("peak", 0), peak)
+                sampled["settled"] = elapsed >= RSS_SAMPLE_INTERVAL
+            await asyncio.sleep(delay)
+            elapsed += delay
+            delay = min(delay * 2, RSS_SAMPLE_INTERVAL)
+
+    async def _wait(self, run, inherited, sampled):
+        process = run.process
+        try:
+            pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+            if not pid:
+                # The child closed its pipes but is still running
+                pid, status, rusage = await self._loop.run_in_executor(
+                    None, os.wait4, process.pid, 0)
+        except ChildProcessError:
+            # Already reaped elsewhere; the resource usage is lost
+            return await self._loop.run_in_executor(None, process.wait)
+        if os.WIFSIGNALED(status):
+            process.returncode = -os.WTERMSIG(status)
+        else:
+            process.returncode = os.WEXITSTATUS(status)
+        run.cpu_user = rusage.ru_utime
+        run.cpu_system = rusage.ru_stime
+        peak = rusage_max_rss(rusage)
+        if peak > inherited:
+            # Not just what the child inherited: its own or a descendant's
+            run.max_rss = max(sampled.get("peak", 0), peak)
+        elif sampled.get("settled"):
+            run.max_rss = sampled["peak"]
+        return process.returncode
+
+    async def _run_transport(self, run, sink):
+        done = self._loop.create_future()
+        protocol = _SubprocessProtocol(sink, done)
+        kwargs = dict(stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                      cwd=run.working_dir, env=run.env, **popen_options(run.limits))
+        command = limited_command(run.command, run.limits)
+        if isinstance(command, str):
+            transport, _ = await self._loop.subprocess_shell(
+                lambda: protocol, command, **kwargs)
+        else:
+            transport, _ = await self._loop.subprocess_exec(
+                lambda: protocol, *command, **kwargs)
+        run.process = transport
+        run._own_group = True
+        for fd in (1, 2):
+            sink.add_transport(transport.get_pipe_transport(fd))
+        try:
+            await done
+            return transport.get_returncode()
+        finally:
+            transport.close()
+
+    @staticmethod
+    def _notify(callback, *args):
+        if callback is not None:
+            callback(*args)
+
+
+class _OutputSink:
+    """Decodes a run's stdout and stderr incrementally and spools them to its log."""
+
+    def __init__(self, engine, run):
+        self.engine = engine
+        self.run = run
+        self.decoders = {STDOUT: _new_decoder(engine.encoding),
+                         STDERR: _new_decoder(engine.encoding)}
+        self.captured = None      # [(stream, bytes)] while capturing for the cache
+        self.capture_limit = 0
+        self.transports = []      # pipe transports, paused together for backpressure
+        self.paused = False
+        self.events = None
+        if run.output_protocol:
+            run.events = self.events = OutputEvents(run.output_protocol, run.working_dir)
+        self.log_file = None
+        if run.log_path:
+            try:
+                # Unbuffered so pagers see output as soon as it arrives
+                self.log_file = open(run.log_path, 'wb', buffering=0)
+            except OSError as e:
+                self._emit(STDERR, f"Could not open log file: {str(e)}\n")
+        # (log offset, time) of the output, for the archive
+        self.marks = [] if self.log_file is not None and engine.archive is not None else None
+
+    async def watch_pipe(self, stream, pipe):
+        """Feed everything read from pipe; returns a future resolved at EOF."""
+        loop = self.engine._loop
+        done = loop.create_future()
+        protocol = _PipeProtocol(functools.partial(self.feed, stream), done)
+        transport, _ = await loop.connect_read_pipe(lambda: protocol, pipe)
+        self.add_transport(transport)
+        return done
+
+    def add_transport(self, transport):
+        if transport is None:
+            return
+        self.transports.append(transport)
+        if self.paused:
+            transport.pause_reading()
+
+    def set_paused(self, paused):
+        if paused == self.paused:
+            return
+        self.paused = paused
+        for transport in self.transports:
+            if transport.is_closing():
+                continue
+            if paused:
+                transport.pause_reading()
+            else:
+                transport.resume_reading()
+
+    def feed(self, stream, data):
+        self.run.output_bytes += len(data)
+        if self.captured is not None:
+            if self.run.output_bytes > self.capture_limit:
+                # Too large to be worth caching
+                self.captured = None
+            elif self.captured and self.captured[-1][0] == stream:
+                self.captured[-1][1].extend(data)
+            else:
+                self.captured.append((stream, bytearray(data)))
+        if self.log_file is not None:
+            self.log_file.write(data)
+            if self.marks is not None:
+                now = time.time()
+                if not self.marks or now - self.marks[-1][1] >= MARK_INTERVAL:
+                    self.marks.append((self.run.output_bytes - len(data), now))
+        if self.engine.on_raw_output is not None:
+            self.engine.on_raw_output(self.run, data, stream)
+        if self.engine.on_output is not None:
+            text = self.decoders[stream].decode(data)
+            if stream == STDOUT and self.events is not None:
+                text = self._take_events(*self.events.feed(text))
+            self._emit(stream, text)
+
+    def close(self):
+        for stream, decoder in self.decoders.items():
+            text = decoder.decode(b'', final=True)
+            if stream == STDOUT and self.events is not None and self.engine.on_output is not None:
+                text = self._take_events(*self.events.feed(text))
+                text += self._take_events(*self.events.finish())
+            self._emit(stream, text)
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+
+    def _take_events(self, text, events):
+        for event in events:
+            self.engine._notify(self.engine.on_event, self.run, event)
+        return text
+
+    def _emit(self, stream, text):
+        if text:
+            if '\0' in text:
+                # Binary output: NULs would truncate the text in most widgets
+                text = text.replace('\0', '�')
+            self.engine._notify(self.engine.on_output, self.run, text, stream)
+
+
+class _PipeProtocol(asyncio.Protocol):
+    """Forwards whatever one child pipe delivers, resolving `done` at EOF."""
+
+    def __init__(self, on_data, done):
+        self.on_data = on_data
+        self.done = done
+
+    def data_received(self, data):
+        self.on_data(data)
+
+    def connection_lost(self, exc):
+        if not self.done.done():
+            self.done.set_result(None)
+
+
+class _SubprocessProtocol(asyncio.SubprocessProtocol):
+    """Transport-based supervision, used where wait4() is unavailable."""
+
+    STREAMS = {1: STDOUT, 2: STDERR}
+
+    def __init__(self, sink, done):
+        self.sink = sink
+        self.done = done
+
+    def pipe_data_received(self, fd, data):
+        self.sink.feed(self.STREAMS[fd], data)
+
+    def connection_lost(self, exc):
+        # Called once the process has exited and all its pipes are closed
+        if not self.done.done():
+            self.done.set_result(None)
+
+
+class _Cancelled(Exception):
+    pass
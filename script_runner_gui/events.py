@@ -0,0 +1,218 @@
+"""
+Structured output for Script Runner Pro.
+
+A catalog entry with "output_protocol" set lets its script report
+progress, metrics and artifacts on stdout instead of printing them as
+text. Two protocols are understood:
+
+  markers  lines starting with ##:
+             ##progress 42%              (also 42, or 420/1000, then an optional message)
+             ##metric rows=1200 rate=350.5
+             ##artifact out/report.html Nightly report
+  jsonl    JSON objects, one per line:
+             {"progress": 42, "message": "loading"}    ("total" makes progress a count)
+             {"metrics": {"rows": 1200, "rate": 350.5}}
+             {"artifact": "out/report.html", "label": "Nightly report"}
+
+Event lines are taken out of the output while it streams in and never
+reach the console; everything else, malformed events included, is shown
+as usual. Only lines that start like an event are looked at, so plain
+output passes through in whole chunks. The run's log file keeps every
+line. This module has no Qt dependency.
+"""
+
+import json
+import os
+
+from .commands import parse_env, split_args
+
+PROTOCOLS = ["markers", "jsonl"]
+
+# How an event line starts; other lines are never parsed
+EVENT_PREFIXES = {"markers": '##', "jsonl": '{'}
+
+# A partial line longer than this is shown as text rather than held back
+MAX_EVENT_LINE = 64 * 1024
+
+
+def _number(text):
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+
+def _percent(value, total=None):
+    """Percentage of value ("42%", 42, "3/10" or value/total), or None if malformed."""
+    if isinstance(value, str):
+        value = value.strip()
+        if value.endswith('%'):
+            value = value[:-1]
+        elif '/' in value:
+            value, _, total = value.partition('/')
+    try:
+        value = float(value)
+        if total is not None:
+            value = value / float(total) * 100
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    if value != value:
+        # NaN
+        return None
+    return min(100.0, max(0.0, value))
+
+
+def format_metrics(metrics):
+    return ' '.join(f"{name}={value:g}" if isinstance(value, float) else f"{name}={value}"
+                    for name, value in (metrics or {}).items())
+
+
+class OutputEvents:
+    """Parses the stdout of one run and keeps the latest of what it reported.
+
+    progress is a percentage (None until reported) and message the text
+    that came with it; metrics is a dict and artifacts a list of
+    {"path", "label"} dicts, relative paths resolved against working_dir
+    (in the artifact events too).
+    These are replaced rather than changed in place, so another thread may
+    read them while the run is writing; version counts the events seen.
+    """
+
+    def __init__(self, protocol, working_dir=None):
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"Unknown output protocol '{protocol}' (use {', '.join(PROTOCOLS)})")
+        self.protocol = protocol
+        self.working_dir = working_dir
+        self.prefix = EVENT_PREFIXES[protocol]
+        self.progress = None
+        self.message = ''
+        self.metrics = {}
+        self.artifacts = []
+        self.version = 0
+        self.pending = ''       # start of a line that may turn out to be an event
+        self.mid_line = False   # inside a line already passed on as text
+
+    def feed(self, text):
+        """Return (text without its event lines, [events parsed from it])."""
+        text = self.pending + text
+        self.pending = ''
+        pos = search = 0
+        if self.mid_line:
+            # The rest of that line is text, whatever it looks like
+            search = text.find('\n') + 1
+            if not search:
+                return text, []
+            self.mid_line = False
+        kept = []
+        events = []
+        while True:
+            # search is always at the start of a line
+            if text.startswith(self.prefix, search):
+                start = search
+            else:
+                start = text.find('\n' + self.prefix, search) + 1
+                if not start:
+                    break
+            end = text.find('\n', start)
+            if end < 0:
+                break
+            event = self._parse(text[start:end])
+            if event is not None:
+                kept.append(text[pos:start])
+                events.append(event)
+                self._apply(event)
+                pos = end + 1
+            search = end + 1
+
+        tail = text[pos:]
+        partial = tail[tail.rfind('\n') + 1:]
+        if partial and len(partial) <= MAX_EVENT_LINE and self._may_be_event(partial):
+            self.pending = partial
+            tail = tail[:len(tail) - len(partial)]
+        elif partial:
+            self.mid_line = True
+        kept.append(tail)
+        return ''.join(kept), events
+
+    def finish(self):
+        """Flush a held-back last line once the output has ended; same as feed()."""
+        line, self.pending = self.pending, ''
+        event = self._parse(line) if line else None
+        if event is None:
+            return line, []
+        self._apply(event)
+        return '', [event]
+
+    def summary(self):
+        """What the run reported, as a plain dict (None if nothing)."""
+        if not self.version:
+            return None
+        summary = {"metrics": self.metrics, "artifacts": self.artifacts}
+        if self.progress is not None:
+            summary["progress"] = self.progress
+            summary["message"] = self.message
+        return summary
+
+    def _may_be_event(self, partial):
+        return partial.startswith(self.prefix) or self.prefix.startswith(partial)
+
+    def _parse(self, line):
+        try:
+            if self.protocol == "markers":
+                return self._parse_marker(line)
+            return self._parse_json(line)
+        except ValueError:
+            return None
+
+    def _parse_marker(self, line):
+        kind, _, rest = line[2:].partition(' ')
+        rest = rest.strip()
+        if kind == "progress":
+            value, _, message = rest.partition(' ')
+            percent = _percent(value)
+            if percent is None:
+                return None
+            return {"type": "progress", "progress": percent, "message": message.strip()}
+        if kind in ("metric", "metrics"):
+            metrics = {name: _number(value) for name, value in parse_env(rest).items()}
+            return {"type": "metrics", "metrics": metrics} if metrics else None
+        if kind == "artifact":
+            parts = split_args(rest)
+            if not parts:
+                return None
+            return {"type": "artifact", "path": parts[0], "label": ' '.join(parts[1:])}
+        return None
+
+    def _parse_json(self, line):
+        message = json.loads(line)
+        if not isinstance(message, dict):
+            return None
+        if "progress" in message:
+            percent = _percent(message["progress"], message.get("total"))
+            if percent is None:
+                return None
+            return {"type": "progress", "progress": percent,
+                    "message": str(message.get("message") or '')}
+        if isinstance(message.get("metrics"), dict) and message["metrics"]:
+            return {"type": "metrics", "metrics": message["metrics"]}
+        artifact = message.get("artifact")
+        if isinstance(artifact, str) and artifact:
+            return {"type": "artifact", "path": artifact,
+                    "label": str(message.get("label") or '')}
+        return None
+
+    def _apply(self, event):
+        self.version += 1
+        if event["type"] == "progress":
+            self.progress = event["progress"]
+            self.message = event["message"]
+        elif event["type"] == "metrics":
+            self.metrics = dict(self.metrics, **event["metrics"])
+        else:
+            path = event["path"]
+            if '://' not in path and self.working_dir and not os.path.isabs(path):
+                path = event["path"] = os.path.normpath(os.path.join(self.working_dir, path))
+            event["label"] = event["label"] or os.path.basename(path.rstrip('/\\'))
+            self.artifacts = self.artifacts + [{"path": path, "label": event["label"]}]
@@ -0,0 +1,1703 @@
+"""
+Main window of Script Runner Pro.
+
+Only what the first frame needs is imported and built up front; dialogs
+are imported when first used, and the menu bar and the script catalog are
+set up once the window has been painted.
+"""
+
+import collections
+import subprocess
+import os
+import platform
+import queue
+import threading
+import time
+from pathlib import Path
+from PyQt5.QtWidgets import (QMainWindow, QPushButton, QHBoxLayout, QVBoxLayout, QWidget,
+                            QAction, QLabel, QLineEdit, QComboBox, QMessageBox, QSplitter,
+                            QListView, QGroupBox, QGridLayout, QTabWidget, QCheckBox)
+from PyQt5.QtCore import Qt, QEvent, QObject, QThread, pyqtSignal, QTimer, QFileSystemWatcher
+
+from .catalog_io import (CONFLICT_POLICIES, apply_import, detect_format, export_catalog,
+                         plan_import, read_catalog)
+from .catalog_model import NAME_ROLE, ScriptListModel
+from .commands import (SCRIPT_TYPES, detect_script_type, format_env, join_args, parse_env,
+                       script_missing, split_args, submit_script)
+from .console import OutputConsole
+from .engine import ExecutionEngine
+from .limits import format_limits, parse_limits
+from .pipelines import STATE_SYMBOLS, PipelineRun, load_pipelines, pipeline_steps, pipelines_path
+from .runlog import prune_logs
+from .schedule import (CATCH_UP_POLICIES, OVERLAP_POLICIES, Scheduler, format_schedule_text,
+                       load_schedules, parse_schedule_text)
+from .search import SearchIndex
+from .settings import (load_settings, save_settings, log_dir, open_archive, open_history,
+                       open_remote_pool, open_result_cache, open_warm_pool, schedule_state_path)
+from .stats import export_stats, format_stats, format_timestamp
+from .store import atomic_write_text, default_catalog_path, open_store
+from .watch import DirectoryIndex, path_key, sync_catalog
+
+# How often buffered script output is flushed into the output tabs
+OUTPUT_FLUSH_INTERVAL_MS = 30
+
+# Quiet period after the last edit before the catalog is written to disk
+SAVE_DEBOUNCE_MS = 500
+
+# Pause in typing before a search is started
+SEARCH_DEBOUNCE_MS = 150
+
+# Deferred startup work runs after the first paint, or after this long at most
+STARTUP_FALLBACK_MS = 250
+
+# Quiet period after the last file system notification before rescanning
+WATCH_DEBOUNCE_MS = 300
+
+# Catalog changes beyond this many are shown by reloading the list
+WATCH_BULK_CHANGES = 200
+
+# Longest the schedule timer sleeps, so wall-clock jumps (suspend, DST) are noticed
+SCHEDULE_MAX_SLEEP_MS = 60000
+
+# Statistics of this many finished runs are kept for export
+RUN_STATS_HISTORY = 10000
+
+# Choices of the Output field: label and the entry's "output_protocol"
+OUTPUT_PROTOCOLS = [("Plain text", ''), ("Progress markers (##progress 42%)", "markers"),
+                    ("JSON lines", "jsonl")]
+
+APP_STYLESHEET = """
+    QMainWindow {
+        background-color: #f0f0f0;
+    }
+    QPushButton {
+        background-color: #0078d4;
+        color: white;
+        border: none;
+        padding: 8px 16px;
+        border-radius: 4px;
+        font-weight: bold;
+    }
+    QPushButton:hover {
+        background-color: #106ebe;
+    }
+    QPushButton:pressed {
+        background-color: #005a9e;
+    }
+    QPushButton:disabled {
+        background-color: #cccccc;
+        color: #666666;
+    }
+    QLineEdit {
+        padding: 8px;
+        border: 2px solid #ddd;
+        border-radius: 4px;
+        background-color: white;
+    }
+    QLineEdit:focus {
+        border-color: #0078d4;
+    }
+    QComboBox {
+        padding: 8px;
+        border: 2px solid #ddd;
+        border-radius: 4px;
+        background-color: white;
+    }
+    QTextEdit, QPlainTextEdit {
+        border: 2px solid #ddd;
+        border-radius: 4px;
+        background-color: white;
+        font-family: 'Consolas', 'Courier New', monospace;
+    }
+    QGroupBox {
+        font-weight: bold;
+        border: 2px solid #ddd;
+        border-radius: 8px;
+        margin-top: 10px;
+        padding-top: 10px;
+    }
+    QGroupBox::title {
+        subcontrol-origin: margin;
+        left: 10px;
+        padding: 0 5px 0 5px;
+    }
+"""
+
+class EngineSignals(QObject):
+    """Re-emits ExecutionEngine callbacks as Qt signals on the GUI thread."""
+    run_started = pyqtSignal(int)
+    run_finished = pyqtSignal(int, int)
+
+    def __init__(self, settings, history=None, archive=None):
+        super().__init__()
+        try:
+            remote_pool = open_remote_pool(settings)
+        except ValueError:
+            # A hand-edited setting; Tools > Remote Agents shows and fixes it
+            remote_pool = open_remote_pool(settings, agents=[])
+        self.engine = ExecutionEngine(
+            max_workers=settings.get('max_workers'),
+            log_dir=str(log_dir()),
+            history=history,
+            archive=archive,
+            encoding=settings.get('output_encoding'),
+            warm_pool=open_warm_pool(settings),
+            result_cache=open_result_cache(settings),
+            remote_pool=remote_pool,
+            on_started=lambda run: self.run_started.emit(run.run_id),
+            # Output is not signalled per chunk; the GUI drains each run's
+            # buffer on a timer so bursts are coalesced into one insert
+            on_output=lambda run, text, stream: run.output.append(text, stream),
+            on_finished=lambda run: self.run_finished.emit(run.run_id, run.exit_code),
+        )
+
+class SearchThread(QThread):
+    """Runs catalog searches and index rebuilds off the GUI thread.
+
+    Only the newest query is answered; queries superseded while waiting in
+    the queue are dropped without being run.
+    """
+    results_ready = pyqtSignal(int, object)
+
+    def __init__(self, index):
+        super().__init__()
+        self.index = index
+        self.jobs = queue.Queue()
+        self.latest_generation = 0
+
+    def search(self, generation, text):
+        self.latest_generation = generation
+        self.jobs.put(('search', (generation, text)))
+
+    def rebuild(self, catalog):
+        self.jobs.put(('rebuild', dict(catalog)))
+
+    def stop(self):
+        self.jobs.put(None)
+        self.wait()
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            kind, payload = job
+            if kind == 'rebuild':
+                self.index.rebuild(payload)
+                continue
+            generation, text = payload
+            if generation != self.latest_generation:
+                continue
+            names = self.index.search(text) if text.strip() else None
+            self.results_ready.emit(generation, names)
+
+
+class WatchThread(QThread):
+    """Scans watched directories off the GUI thread.
+
+    Every scan or rescan emits changes_ready(root, changes, full, dirs_added,
+    dirs_removed): the script files that changed under root (all of them
+    when full is True) and the directories to start and stop watching.
+    """
+    changes_ready = pyqtSignal(str, object, bool, object, object)
+
+    def __init__(self):
+        super().__init__()
+        self.jobs = queue.Queue()
+        self.indexes = {}  # root -> DirectoryIndex, only touched by this thread
+
+    def scan(self, root):
+        self.jobs.put(('scan', root))
+
+    def rescan(self, root, dirs):
+        self.jobs.put(('rescan', (root, dirs)))
+
+    def poll(self):
+        self.jobs.put(('poll', None))
+
+    def unwatch(self, root):
+        self.jobs.put(('unwatch', root))
+
+    def stop(self):
+        self.jobs.put(None)
+        self.wait()
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            kind, payload = job
+            if kind == 'scan':
+                index = DirectoryIndex(payload)
+                self.indexes[payload] = index
+                changes = index.scan()
+                self.changes_ready.emit(payload, changes, True, list(index.mtimes), [])
+            elif kind == 'rescan':
+                root, dirs = payload
+                if root in self.indexes:
+                    self.rescan_index(root, dirs)
+            elif kind == 'poll':
+                for root, index in list(self.indexes.items()):
+                    dirs = index.changed_dirs()
+                    if dirs:
+                        self.rescan_index(root, dirs)
+            elif kind == 'unwatch':
+                self.indexes.pop(payload, None)
+
+    def rescan_index(self, root, dirs):
+        index = self.indexes[root]
+        before = set(index.mtimes)
+        changes = index.rescan(dirs)
+        after = set(index.mtimes)
+        if changes or before != after:
+            self.changes_ready.emit(root, changes, False, sorted(after - before),
+                                    sorted(before - after))
+
+
+class CatalogTransfer(QThread):
+    """Runs a catalog import or export off the GUI thread.
+
+    job(progress) does the work; progress(fraction) is forwarded as a
+    percentage.
+    """
+    progress = pyqtSignal(int)
+    done = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, job):
+        super().__init__()
+        self.job = job
+
+    def run(self):
+        try:
+            result = self.job(lambda fraction: self.progress.emit(int(fraction * 100)))
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.done.emit(result)
+
+
+class CatalogLoader(QThread):
+    """Opens and parses the script catalog off the GUI thread."""
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+
+    def run(self):
+        try:
+            store = open_store(self.path)
+            store.load()
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.loaded.emit(store)
+
+
+class ScriptRunnerGUI(QMainWindow):
+    def __init__(self, profiler=None):
+        super().__init__()
+        self.profiler = profiler
+        self.startup_done = False
+        self.catalog_loader = None
+        self.catalog_transfer = None
+        self.monitor_dialog = None
+        self.script_data = {}  # Store script metadata
+        self.current_script = None
+        self.output_panes = {}  # run_id -> OutputConsole
+        self.pipeline_runs = {}  # pipeline OutputConsole -> active PipelineRun
+        self.run_stats = collections.deque(maxlen=RUN_STATS_HISTORY)
+        self.settings = load_settings()
+        prune_logs(log_dir(), self.settings['max_log_files'])
+        self.log_archive = self.open_log_archive()
+        self.history = self.open_run_history()
+        self.engine_signals = EngineSignals(self.settings, self.history, self.log_archive)
+        self.engine_signals.run_started.connect(self.on_script_started)
+        self.engine_signals.run_finished.connect(self.on_script_finished)
+        self.engine = self.engine_signals.engine
+        self.output_timer = QTimer(self)
+        self.output_timer.setInterval(OUTPUT_FLUSH_INTERVAL_MS)
+        self.output_timer.timeout.connect(self.flush_output)
+        self.store = None
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(SAVE_DEBOUNCE_MS)
+        self.save_timer.timeout.connect(self.save_scripts)
+        self.search_index = SearchIndex(index_contents=self.settings['search_contents'])
+        self.search_generation = 0
+        self.search_thread = SearchThread(self.search_index)
+        self.search_thread.results_ready.connect(self.on_search_results)
+        self.search_thread.start()
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.run_search)
+        # One timer for all schedules, always set to the earliest fire time
+        self.scheduler = Scheduler(str(schedule_state_path()))
+        self.schedule_timer = QTimer(self)
+        self.schedule_timer.setSingleShot(True)
+        self.schedule_timer.timeout.connect(self.fire_schedules)
+        # Watched directories; started once the catalog is loaded
+        self.watch_thread = None
+        self.fs_watcher = None
+        self.pending_watch_dirs = set()
+        self.watch_timer = QTimer(self)
+        self.watch_timer.setSingleShot(True)
+        self.watch_timer.setInterval(WATCH_DEBOUNCE_MS)
+        self.watch_timer.timeout.connect(self.rescan_watched_dirs)
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(max(1, self.settings['watch_poll_interval_s']) * 1000)
+        self.poll_timer.timeout.connect(self.poll_watched_dirs)
+        self.is_windows = platform.system() == "Windows"
+        self.initUI()
+        self.mark_startup("build window")
+
+        # The menu bar and the catalog are set up once the window is on screen
+        self.installEventFilter(self)
+        QTimer.singleShot(STARTUP_FALLBACK_MS, self.finish_startup)
+
+    def mark_startup(self, phase):
+        if self.profiler is not None:
+            self.profiler.mark(phase)
+
+    def eventFilter(self, obj, event):
+        if obj is self and event.type() == QEvent.Paint and not self.startup_done:
+            self.mark_startup("first paint")
+            QTimer.singleShot(0, self.finish_startup)
+        return super().eventFilter(obj, event)
+
+    def finish_startup(self):
+        if self.startup_done:
+            return
+        self.startup_done = True
+        self.removeEventFilter(self)
+        self.create_menu_bar()
+        self.mark_startup("menu bar")
+        self.load_scripts()
+
+    def initUI(self):
+        self.setWindowTitle("Script Runner Pro - Windows Edition")
+        self.setGeometry(100, 100, 1000, 700)
+        self.setAcceptDrops(True)
+        
+        # Set modern styling
+        self.setStyleSheet(APP_STYLESHEET)
+
+        # Create central widget and main layout
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        main_layout = QHBoxLayout(central_widget)
+
+        # Create splitter for resizable panels
+        splitter = QSplitter(Qt.Horizontal)
+        main_layout.addWidget(splitter)
+
+        # Left panel - Script list
+        left_panel = self.create_script_panel()
+        splitter.addWidget(left_panel)
+
+        # Right panel - Script details and output
+        right_panel = self.create_details_panel()
+        splitter.addWidget(right_panel)
+
+        # Set splitter proportions
+        splitter.setSizes([300, 700])
+
+        # Create status bar
+        self.statusBar().showMessage("Loading scripts...")
+
+    def create_script_panel(self):
+        panel = QWidget()
+        layout = QVBoxLayout(panel)
+
+        # Search box
+        search_layout = QHBoxLayout()
+        search_layout.addWidget(QLabel("Search:"))
+        self.search_box = QLineEdit()
+        self.search_box.textChanged.connect(self.filter_scripts)
+        search_layout.addWidget(self.search_box)
+        layout.addLayout(search_layout)
+
+        # Script list: a view over ScriptListModel, so only visible rows are
+        # ever materialised however large the catalog is
+        self.script_model = ScriptListModel(self)
+        self.script_list = QListView()
+        self.script_list.setModel(self.script_model)
+        self.script_list.setUniformItemSizes(True)
+        self.script_list.setLayoutMode(QListView.Batched)
+        self.script_list.setEditTriggers(QListView.NoEditTriggers)
+        self.script_list.clicked.connect(self.on_script_selected)
+        layout.addWidget(self.script_list)
+
+        # Add script button
+        add_btn = QPushButton("Add New Script")
+        add_btn.clicked.connect(self.add_script)
+        layout.addWidget(add_btn)
+
+        return panel
+
+    def create_details_panel(self):
+        panel = QWidget()
+        layout = QVBoxLayout(panel)
+
+        # Script info group
+        info_group = QGroupBox("Script Information")
+        info_layout = QGridLayout(info_group)
+
+        info_layout.addWidget(QLabel("Name:"), 0, 0)
+        self.name_edit = QLineEdit()
+        self.name_edit.textChanged.connect(self.update_script_name)
+        info_layout.addWidget(self.name_edit, 0, 1)
+
+        info_layout.addWidget(QLabel("Path:"), 1, 0)
+        self.path_edit = QLineEdit()
+        self.path_edit.textChanged.connect(self.update_script_path)
+        info_layout.addWidget(self.path_edit, 1, 1)
+
+        info_layout.addWidget(QLabel("Type:"), 2, 0)
+        self.type_combo = QComboBox()
+        self.type_combo.addItems(SCRIPT_TYPES)
+        self.type_combo.currentTextChanged.connect(self.update_script_type)
+        info_layout.addWidget(self.type_combo, 2, 1)
+
+        info_layout.addWidget(QLabel("Category:"), 3, 0)
+        self.category_edit = QLineEdit()
+        self.category_edit.setPlaceholderText("e.g., Development, Automation, Tools")
+        self.category_edit.textChanged.connect(self.update_script_category)
+        info_layout.addWidget(self.category_edit, 3, 1)
+
+        info_layout.addWidget(QLabel("Arguments:"), 4, 0)
+        self.args_edit = QLineEdit()
+        self.args_edit.setPlaceholderText('e.g., --verbose "C:\\My Data\\input.csv"')
+        self.args_edit.textChanged.connect(self.update_script_args)
+        info_layout.addWidget(self.args_edit, 4, 1)
+
+        info_layout.addWidget(QLabel("Environment:"), 5, 0)
+        self.env_edit = QLineEdit()
+        self.env_edit.setPlaceholderText("e.g., LOG_LEVEL=debug DATA_DIR=D:\\data")
+        self.env_edit.textChanged.connect(self.update_script_env)
+        info_layout.addWidget(self.env_edit, 5, 1)
+
+        info_layout.addWidget(QLabel("Interpreter:"), 6, 0)
+        self.interpreter_edit = QLineEdit()
+        self.interpreter_edit.setPlaceholderText("Default for the script type")
+        self.interpreter_edit.textChanged.connect(self.update_script_interpreter)
+        info_layout.addWidget(self.interpreter_edit, 6, 1)
+
+        info_layout.addWidget(QLabel("Schedule:"), 7, 0)
+        schedule_layout = QHBoxLayout()
+        self.schedule_edit = QLineEdit()
+        self.schedule_edit.setPlaceholderText("cron (*/15 * * * *, @daily) or interval (every 10m)")
+        # Applied when editing finishes, so a half-typed schedule never fires
+        self.schedule_edit.editingFinished.connect(self.update_script_schedule)
+        schedule_layout.addWidget(self.schedule_edit)
+        schedule_layout.addWidget(QLabel("If running:"))
+        self.overlap_combo = QComboBox()
+        self.overlap_combo.addItems(OVERLAP_POLICIES)
+        self.overlap_combo.currentTextChanged.connect(self.update_script_schedule)
+        schedule_layout.addWidget(self.overlap_combo)
+        schedule_layout.addWidget(QLabel("Missed:"))
+        self.catch_up_combo = QComboBox()
+        self.catch_up_combo.addItems(CATCH_UP_POLICIES)
+        self.catch_up_combo.currentTextChanged.connect(self.update_script_schedule)
+        schedule_layout.addWidget(self.catch_up_combo)
+        info_layout.addLayout(schedule_layout, 7, 1)
+
+        info_layout.addWidget(QLabel("Cache:"), 8, 0)
+        cache_layout = QHBoxLayout()
+        self.cache_check = QCheckBox("Reuse output while unchanged")
+        self.cache_check.setToolTip("Replay the last successful run's output instead of running "
+                                    "the script when it, its inputs, arguments and environment "
+                                    "are unchanged")
+        self.cache_check.toggled.connect(self.update_script_cache)
+        cache_layout.addWidget(self.cache_check)
+        self.cache_inputs_edit = QLineEdit()
+        self.cache_inputs_edit.setPlaceholderText("Input files or globs, e.g. data/*.csv config.yaml")
+        self.cache_inputs_edit.textChanged.connect(self.update_script_cache)
+        cache_layout.addWidget(self.cache_inputs_edit)
+        info_layout.addLayout(cache_layout, 8, 1)
+
+        info_layout.addWidget(QLabel("Limits:"), 9, 0)
+        self.limits_edit = QLineEdit()
+        self.limits_edit.setPlaceholderText("e.g., timeout=600 memory_mb=2048 cpu=300 nofile=1024 "
+                                            "nice=10 ionice=idle")
+        self.limits_edit.editingFinished.connect(self.update_script_limits)
+        info_layout.addWidget(self.limits_edit, 9, 1)
+
+        info_layout.addWidget(QLabel("Output:"), 10, 0)
+        self.protocol_combo = QComboBox()
+        for label, protocol in OUTPUT_PROTOCOLS:
+            self.protocol_combo.addItem(label, protocol)
+        self.protocol_combo.setToolTip("Scripts can report progress, metrics and artifacts in "
+                                       "their output; those lines are shown above the output "
+                                       "instead of in it")
+        self.protocol_combo.currentIndexChanged.connect(self.update_script_protocol)
+        info_layout.addWidget(self.protocol_combo, 10, 1)
+
+        layout.addWidget(info_group)
+
+        # Action buttons
+        button_layout = QHBoxLayout()
+        
+        self.run_btn = QPushButton("▶ Run Script")
+        self.run_btn.clicked.connect(self.run_script)
+        self.run_btn.setEnabled(False)
+        button_layout.addWidget(self.run_btn)
+
+        self.edit_btn = QPushButton("✏ Edit")
+        self.edit_btn.clicked.connect(self.edit_script)
+        self.edit_btn.setEnabled(False)
+        button_layout.addWidget(self.edit_btn)
+
+        self.stop_btn = QPushButton("⏹ Stop")
+        self.stop_btn.clicked.connect(self.stop_script)
+        self.stop_btn.setEnabled(False)
+        button_layout.addWidget(self.stop_btn)
+
+        self.delete_btn = QPushButton("🗑 Delete")
+        self.delete_btn.clicked.connect(self.delete_script)
+        self.delete_btn.setEnabled(False)
+        button_layout.addWidget(self.delete_btn)
+
+        layout.addLayout(button_layout)
+
+        # Output group
+        output_group = QGroupBox("Output")
+        output_layout = QVBoxLayout(output_group)
+        
+        # One tab per run so parallel runs don't interleave their output
+        self.output_tabs = QTabWidget()
+        self.output_tabs.setTabsClosable(True)
+        self.output_tabs.tabCloseRequested.connect(self.close_output_tab)
+        self.output_tabs.currentChanged.connect(self.update_stop_button)
+        self.output_tabs.currentChanged.connect(self.update_run_details)
+        output_layout.addWidget(self.output_tabs)
+
+        # Resource usage of the run shown in the current tab
+        self.run_details_label = QLabel()
+        self.run_details_label.setWordWrap(True)
+        self.run_details_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        output_layout.addWidget(self.run_details_label)
+
+        # Clear output button
+        clear_btn = QPushButton("Clear Output")
+        clear_btn.clicked.connect(self.clear_output)
+        output_layout.addWidget(clear_btn)
+
+        layout.addWidget(output_group)
+
+        return panel
+
+    def create_menu_bar(self):
+        menubar = self.menuBar()
+        
+        # File menu
+        file_menu = menubar.addMenu('File')
+        
+        add_action = QAction('Add Script', self)
+        add_action.setShortcut('Ctrl+N')
+        add_action.triggered.connect(self.add_script)
+        file_menu.addAction(add_action)
+
+        watch_action = QAction('Watch Directory...', self)
+        watch_action.triggered.connect(self.add_watched_directory)
+        file_menu.addAction(watch_action)
+
+        unwatch_action = QAction('Stop Watching Directory...', self)
+        unwatch_action.triggered.connect(self.remove_watched_directory)
+        file_menu.addAction(unwatch_action)
+
+        import_action = QAction('Import Catalog...', self)
+        import_action.triggered.connect(self.import_catalog)
+        file_menu.addAction(import_action)
+
+        export_action = QAction('Export Catalog...', self)
+        export_action.triggered.connect(self.export_catalog)
+        file_menu.addAction(export_action)
+
+        export_stats_action = QAction('Export Run Stats...', self)
+        export_stats_action.triggered.connect(self.export_run_stats)
+        file_menu.addAction(export_stats_action)
+        
+        file_menu.addSeparator()
+        
+        exit_action = QAction('Exit', self)
+        exit_action.setShortcut('Ctrl+Q')
+        exit_action.triggered.connect(self.close)
+        file_menu.addAction(exit_action)
+
+        # Tools menu
+        tools_menu = menubar.addMenu('Tools')
+        
+        settings_action = QAction('Settings', self)
+        settings_action.triggered.connect(self.show_settings)
+        tools_menu.addAction(settings_action)
+
+        workers_action = QAction('Worker Pool Size...', self)
+        workers_action.triggered.connect(self.set_worker_pool_size)
+        tools_menu.addAction(workers_action)
+
+        agents_action = QAction('Remote Agents...', self)
+        agents_action.triggered.connect(self.set_remote_agents)
+        tools_menu.addAction(agents_action)
+
+        monitor_action = QAction('Process Monitor...', self)
+        monitor_action.triggered.connect(self.show_process_monitor)
+        tools_menu.addAction(monitor_action)
+
+        history_action = QAction('Run History...', self)
+        history_action.triggered.connect(self.show_history)
+        tools_menu.addAction(history_action)
+
+        schedules_action = QAction('Upcoming Scheduled Runs...', self)
+        schedules_action.triggered.connect(self.show_schedules)
+        tools_menu.addAction(schedules_action)
+
+        clear_cache_action = QAction('Clear Result Cache', self)
+        clear_cache_action.triggered.connect(self.clear_result_cache)
+        tools_menu.addAction(clear_cache_action)
+
+        # Pipelines menu
+        pipelines_menu = menubar.addMenu('Pipelines')
+
+        run_pipeline_action = QAction('Run Pipeline...', self)
+        run_pipeline_action.triggered.connect(self.run_pipeline)
+        pipelines_menu.addAction(run_pipeline_action)
+
+        edit_pipelines_action = QAction('Edit Pipelines', self)
+        edit_pipelines_action.triggered.connect(self.edit_pipelines)
+        pipelines_menu.addAction(edit_pipelines_action)
+
+        # Help menu
+        help_menu = menubar.addMenu('Help')
+        
+        about_action = QAction('About', self)
+        about_action.triggered.connect(self.show_about)
+        help_menu.addAction(about_action)
+
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        if self.store is None:
+            return
+        for url in event.mimeData().urls():
+            if url.isLocalFile():
+                self.add_script_from_path(url.toLocalFile())
+
+    def add_script_from_path(self, script_path):
+        from PyQt5.QtWidgets import QInputDialog
+
+        script_name = Path(script_path).stem
+        script_name, ok = QInputDialog.getText(
+            self, 'Add Script', 
+            'Enter name for the script:', 
+            text=script_name
+        )
+        if ok and script_name:
+            script_type = detect_script_type(script_path)
+            self.add_script_to_list(script_name, script_path, script_type, "")
+
+    def add_script(self):
+        if self.store is None:
+            # Still loading the catalog
+            return
+        from PyQt5.QtWidgets import QFileDialog
+
+        file_dialog = QFileDialog(self)
+        file_dialog.setNameFilter(
+            "All Scripts (*.py *.ps1 *.bat *.cmd *.sh);;"
+            "Python (*.py);;"
+            "PowerShell (*.ps1);;"
+            "Batch (*.bat);;"
+            "CMD (*.cmd);;"
+            "Shell (*.sh)"
+        )
+        script_path, _ = file_dialog.getOpenFileName(
+            self, "Select Script", "", 
+            "All Scripts (*.py *.ps1 *.bat *.cmd *.sh)"
+        )
+        if script_path:
+            self.add_script_from_path(script_path)
+
+    def add_script_to_list(self, name, path, script_type="Other", category=""):
+        # Add to script data
+        self.store.put(name, {
+            'path': path,
+            'type': script_type,
+            'category': category
+        })
+        self.search_index.add(name, self.script_data[name])
+        
+        # Add to list
+        self.script_model.add(name)
+        
+        # Save to file
+        self.schedule_save()
+
+    def on_script_selected(self, index):
+        script_name = index.data(NAME_ROLE)
+        if script_name in self.script_data:
+            self.current_script = script_name
+            script_info = self.script_data[script_name]
+            
+            # Update detail panel
+            self.name_edit.setText(script_name)
+            self.path_edit.setText(script_info['path'])
+            self.type_combo.setCurrentText(script_info['type'])
+            self.category_edit.setText(script_info['category'])
+            self.args_edit.setText(join_args(script_info.get('args') or []))
+            self.env_edit.setText(format_env(script_info.get('env')))
+            self.interpreter_edit.setText(script_info.get('interpreter') or '')
+            schedule = script_info.get('schedule') or {}
+            # Filled in together; the edit handler would otherwise see a mix of
+            # this script's and the previous script's values
+            for widget in (self.schedule_edit, self.overlap_combo, self.catch_up_combo):
+                widget.blockSignals(True)
+            self.schedule_edit.setText(format_schedule_text(schedule))
+            self.schedule_edit.setToolTip('')
+            self.overlap_combo.setCurrentText(schedule.get('overlap', 'skip'))
+            self.catch_up_combo.setCurrentText(schedule.get('catch_up', 'skip'))
+            for widget in (self.schedule_edit, self.overlap_combo, self.catch_up_combo):
+                widget.blockSignals(False)
+            cache = script_info.get('cache')
+            for widget in (self.cache_check, self.cache_inputs_edit):
+                widget.blockSignals(True)
+            self.cache_check.setChecked(bool(cache))
+            self.cache_inputs_edit.setText(
+                join_args(cache.get('inputs') or []) if isinstance(cache, dict) else '')
+            for widget in (self.cache_check, self.cache_inputs_edit):
+                widget.blockSignals(False)
+            self.limits_edit.setText(format_limits(script_info.get('limits') or {}))
+            self.limits_edit.setToolTip('')
+            self.protocol_combo.blockSignals(True)
+            self.protocol_combo.setCurrentIndex(
+                max(0, self.protocol_combo.findData(script_info.get('output_protocol') or '')))
+            self.protocol_combo.blockSignals(False)
+            
+            # Enable buttons
+            self.run_btn.setEnabled(True)
+            self.edit_btn.setEnabled(True)
+            self.delete_btn.setEnabled(True)
+
+    def update_script_name(self, new_name):
+        if self.current_script and new_name != self.current_script:
+            # Update the data
+            self.store.rename(self.current_script, new_name)
+            self.search_index.rename(self.current_script, new_name, self.script_data[new_name])
+            self.scheduler.rename(self.current_script, new_name)
+            
+            # Update the list item
+            self.script_model.rename(self.current_script, new_name)
+            self.script_list.setCurrentIndex(self.script_model.index_of(new_name))
+            
+            self.current_script = new_name
+            self.schedule_save()
+
+    def update_script_path(self, new_path):
+        self.update_script_field('path', new_path)
+
+    def update_script_type(self, new_type):
+        self.update_script_field('type', new_type)
+
+    def update_script_category(self, new_category):
+        self.update_script_field('category', new_category)
+
+    def update_script_args(self, text):
+        try:
+            args = split_args(text)
+        except ValueError:
+            # Unbalanced quote while typing; keep the last valid arguments
+            return
+        self.update_optional_field('args', args)
+
+    def update_script_env(self, text):
+        try:
+            env = parse_env(text)
+        except ValueError:
+            return
+        self.update_optional_field('env', env)
+
+    def update_script_interpreter(self, text):
+        self.update_optional_field('interpreter', text.strip())
+
+    def update_script_schedule(self, *args):
+        if not self.current_script:
+            return
+        text = self.schedule_edit.text().strip()
+        schedule = {}
+        if text:
+            try:
+                schedule = parse_schedule_text(text)
+            except ValueError as e:
+                self.schedule_edit.setToolTip(str(e))
+                self.statusBar().showMessage(f"Invalid schedule: {str(e)}")
+                return
+            schedule["overlap"] = self.overlap_combo.currentText()
+            schedule["catch_up"] = self.catch_up_combo.currentText()
+        self.schedule_edit.setToolTip('')
+        if (self.script_data[self.current_script].get('schedule') or {}) == schedule:
+            return
+        self.update_optional_field('schedule', schedule)
+        self.scheduler.set(self.current_script, schedule)
+        self.arm_schedule_timer()
+
+    def update_script_cache(self, *args):
+        if not self.current_script:
+            return
+        try:
+            inputs = split_args(self.cache_inputs_edit.text())
+        except ValueError:
+            return
+        if not self.cache_check.isChecked():
+            cache = None
+        else:
+            cache = {"inputs": inputs} if inputs else True
+        self.update_optional_field('cache', cache)
+
+    def update_script_limits(self):
+        if not self.current_script:
+            return
+        try:
+            limits = parse_limits(self.limits_edit.text())
+        except ValueError as e:
+            self.limits_edit.setToolTip(str(e))
+            self.statusBar().showMessage(f"Invalid limits: {str(e)}")
+            return
+        self.limits_edit.setToolTip('')
+        self.update_optional_field('limits', limits)
+
+    def update_script_protocol(self, index):
+        self.update_optional_field('output_protocol', self.protocol_combo.itemData(index))
+
+    def update_optional_field(self, field, value):
+        """Store a field that is left out of the catalog while empty."""
+        if not self.current_script:
+            return
+        script_info = self.script_data[self.current_script]
+        if (script_info.get(field) or type(value)()) == value:
+            return
+        if value:
+            script_info[field] = value
+        else:
+            del script_info[field]
+        self.store.touch(self.current_script)
+        self.schedule_save()
+
+    def update_script_field(self, field, value):
+        if self.current_script:
+            self.script_data[self.current_script][field] = value
+            self.store.touch(self.current_script)
+            self.search_index.add(self.current_script, self.script_data[self.current_script])
+            self.script_model.refresh(self.current_script)
+            self.schedule_save()
+
+    def run_script(self):
+        if not self.current_script or self.current_script not in self.script_data:
+            return
+        
+        script_info = self.script_data[self.current_script]
+        script_path = script_info['path']
+        
+        if script_missing(self.engine, script_info):
+            QMessageBox.warning(self, "Error", f"Script file not found: {script_path}")
+            return
+        
+        # Queue the run; the engine starts it as soon as a worker is free
+        run = submit_script(self.engine, self.current_script, script_info)
+        self.create_output_pane(run)
+        self.update_run_status()
+
+    def arm_schedule_timer(self):
+        next_fire = self.scheduler.next_fire_time()
+        if next_fire is None:
+            self.schedule_timer.stop()
+            return
+        delay_ms = int(max(0.0, next_fire - time.time()) * 1000)
+        self.schedule_timer.start(min(delay_ms, SCHEDULE_MAX_SLEEP_MS))
+
+    def fire_schedules(self):
+        started = self.scheduler.dispatch(self.submit_scheduled)
+        if started:
+            self.statusBar().showMessage(f"Scheduled run started: {', '.join(started)}")
+            try:
+                self.scheduler.save_state()
+            except OSError:
+                # Only catch-up after a restart depends on it
+                pass
+        self.arm_schedule_timer()
+
+    def submit_scheduled(self, name):
+        # Scheduled runs get no output tab, so a frequent schedule can't
+        # bury the window in tabs; their output is in the run history and logs
+        script_info = self.script_data.get(name)
+        if script_info is None or script_missing(self.engine, script_info):
+            return None
+        run = submit_script(self.engine, name, script_info)
+        # Nothing drains its output, which is spooled to the run log anyway
+        run.output.close()
+        return run
+
+    def clear_result_cache(self):
+        try:
+            self.engine.result_cache.clear()
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Could not clear the result cache: {str(e)}")
+            return
+        self.statusBar().showMessage("Result cache cleared")
+
+    def show_schedules(self):
+        upcoming = self.scheduler.upcoming()
+        if not upcoming:
+            QMessageBox.information(self, "Scheduled Runs",
+                                    "No scripts have a schedule. Set one under Script Information.")
+            return
+        lines = [f"{format_timestamp(fire)}  {name}  ({format_schedule_text(spec)})"
+                 for fire, name, spec in upcoming[:30]]
+        if len(upcoming) > 30:
+            lines.append(f"... and {len(upcoming) - 30} more")
+        QMessageBox.information(self, "Scheduled Runs", "\n".join(lines))
+
+    def pipelines_file(self):
+        catalog_path = self.store.path if self.store is not None else default_catalog_path(self.settings)
+        return pipelines_path(catalog_path)
+
+    def run_pipeline(self):
+        from PyQt5.QtWidgets import QInputDialog
+
+        path = self.pipelines_file()
+        try:
+            pipelines = load_pipelines(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Error", f"Could not load pipelines: {str(e)}")
+            return
+        if not pipelines:
+            QMessageBox.information(self, "Run Pipeline",
+                                    f"No pipelines are defined yet. Add them to {path} "
+                                    "(Pipelines > Edit Pipelines).")
+            return
+        name, ok = QInputDialog.getItem(self, "Run Pipeline", "Pipeline:", sorted(pipelines), 0, False)
+        if not ok:
+            return
+        try:
+            steps = pipeline_steps(pipelines[name], self.script_data)
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", f"Invalid pipeline '{name}': {str(e)}")
+            return
+
+        console = OutputConsole(max_lines=self.settings['console_max_lines'])
+        console.setMaximumHeight(240)
+        pipeline_run = PipelineRun(
+            name, steps, self.submit_pipeline_step, pipelines[name].get('max_parallel'),
+            on_change=lambda step, state: console.append_text(
+                f"{STATE_SYMBOLS[state]} {step}: {state}\n")
+        )
+        self.pipeline_runs[console] = pipeline_run
+        index = self.output_tabs.addTab(console, f"⛓ {name}")
+        self.output_tabs.setCurrentIndex(index)
+        pipeline_run.start()
+        self.finish_pipeline_if_done(console)
+        self.update_run_status()
+
+    def submit_pipeline_step(self, step, script):
+        script_info = self.script_data.get(script)
+        if script_info is None or script_missing(self.engine, script_info):
+            return None
+        run = submit_script(self.engine, script, script_info)
+        self.create_output_pane(run)
+        return run
+
+    def finish_pipeline_if_done(self, console):
+        pipeline_run = self.pipeline_runs.get(console)
+        if pipeline_run is None or not pipeline_run.done.is_set():
+            return
+        del self.pipeline_runs[console]
+        console.append_text("\n" + "\n".join(pipeline_run.summary()) + "\n")
+        prefix = "✔" if pipeline_run.succeeded else "✘"
+        self.output_tabs.setTabText(self.output_tabs.indexOf(console), f"{prefix} {pipeline_run.name}")
+        self.statusBar().showMessage(f"Pipeline '{pipeline_run.name}' "
+                                     f"{'completed successfully' if pipeline_run.succeeded else 'failed'}")
+        self.update_stop_button()
+
+    def edit_pipelines(self):
+        path = self.pipelines_file()
+        if not os.path.exists(path):
+            try:
+                atomic_write_text(path, '{}\n')
+            except OSError as e:
+                QMessageBox.warning(self, "Error", f"Could not create {path}: {str(e)}")
+                return
+        self.open_in_editor(path)
+
+    def create_output_pane(self, run):
+        output_text = OutputConsole(max_lines=self.settings['console_max_lines'],
+                                    timestamps=self.settings['console_timestamps'],
+                                    encoding=self.engine.encoding)
+        output_text.setMaximumHeight(240)
+        output_text.set_log_path(run.log_path)
+        output_text.setProperty("run_id", run.run_id)
+        self.output_panes[run.run_id] = output_text
+
+        index = self.output_tabs.addTab(output_text, f"⏳ {run.name} #{run.run_id}")
+        self.output_tabs.setCurrentIndex(index)
+        if self.engine.running_count >= self.engine.max_workers:
+            self.append_output(run.run_id, "Queued - waiting for a free worker...\n")
+
+    def set_tab_title(self, run_id, prefix):
+        pane = self.output_panes.get(run_id)
+        run = self.engine.get_run(run_id)
+        if pane is None or run is None:
+            return
+        index = self.output_tabs.indexOf(pane)
+        self.output_tabs.setTabText(index, f"{prefix} {run.name} #{run_id}")
+
+    def on_script_started(self, run_id):
+        self.set_tab_title(run_id, "▶")
+        self.output_timer.start()
+        self.update_stop_button()
+        self.update_run_status()
+
+    def append_output(self, run_id, text):
+        pane = self.output_panes.get(run_id)
+        if pane is not None:
+            # A single insert per batch, however many lines it holds
+            pane.append_text(text)
+
+    def append_segments(self, run_id, segments):
+        pane = self.output_panes.get(run_id)
+        if pane is not None and segments:
+            pane.append_segments(segments)
+
+    def flush_output(self):
+        for run_id in self.output_panes:
+            run = self.engine.get_run(run_id)
+            if run is not None:
+                self.append_segments(run_id, run.output.drain())
+                self.output_panes[run_id].show_events(run.events)
+        if not self.engine.running_count:
+            self.output_timer.stop()
+
+    def on_script_finished(self, run_id, exit_code):
+        run = self.engine.get_run(run_id)
+        if run is None:
+            return
+
+        # Everything the run printed is buffered by now; show it before the footer
+        self.append_segments(run_id, run.output.drain())
+        pane = self.output_panes.get(run_id)
+        if pane is not None:
+            pane.show_events(run.events)
+            pane.run_finished()
+        if run.cancel_requested:
+            self.set_tab_title(run_id, "⏹")
+            self.append_output(run_id, "\n--- Script cancelled ---\n")
+        elif run.timed_out:
+            self.set_tab_title(run_id, "⏱")
+            self.append_output(run_id, f"\n--- Timed out, exit code: {exit_code} ---\n")
+        elif run.cache_hit:
+            self.set_tab_title(run_id, "✔" if exit_code == 0 else "✘")
+            self.append_output(run_id, f"\n--- Cached result replayed (script and inputs unchanged), "
+                                       f"exit code: {exit_code} ---\n")
+        else:
+            self.set_tab_title(run_id, "✔" if exit_code == 0 else "✘")
+            cache_note = " (cache miss)" if run.cache_hit is False else ""
+            self.append_output(run_id, f"\n--- Script finished with exit code: "
+                                       f"{exit_code}{cache_note} ---\n")
+
+        if exit_code == 0:
+            self.statusBar().showMessage(f"Script '{run.name}' completed successfully")
+        else:
+            self.statusBar().showMessage(f"Script '{run.name}' finished with exit code {exit_code}")
+
+        if run.started_at is not None:
+            self.run_stats.append(run.stats())
+        self.scheduler.run_finished(run_id, self.submit_scheduled)
+        for console, pipeline_run in list(self.pipeline_runs.items()):
+            if pipeline_run.owns(run_id):
+                pipeline_run.step_finished(run)
+                self.finish_pipeline_if_done(console)
+        if run_id not in self.output_panes:
+            self.engine.forget(run_id)
+        self.update_stop_button()
+        self.update_run_details()
+
+    def current_run_id(self):
+        pane = self.output_tabs.currentWidget()
+        return pane.property("run_id") if pane is not None else None
+
+    def stop_script(self):
+        run_id = self.current_run_id()
+        if run_id is not None:
+            self.engine.cancel(run_id)
+            return
+        console = self.output_tabs.currentWidget()
+        if console in self.pipeline_runs:
+            self.pipeline_runs[console].cancel(self.engine.cancel)
+            self.finish_pipeline_if_done(console)
+
+    def update_stop_button(self, *args):
+        if self.output_tabs.currentWidget() in self.pipeline_runs:
+            self.stop_btn.setEnabled(True)
+            return
+        run = self.engine.get_run(self.current_run_id())
+        self.stop_btn.setEnabled(run is not None and run.is_active)
+
+    def update_run_details(self, *args):
+        run = self.engine.get_run(self.current_run_id())
+        if run is None or run.is_active:
+            self.run_details_label.clear()
+            return
+        stats = run.stats()
+        cache = {True: " · cache hit, output replayed", False: " · cache miss"}.get(run.cache_hit, "")
+        self.run_details_label.setText(
+            f"Exit code {run.exit_code} · started {format_timestamp(stats['started_at'])} · "
+            f"{format_stats(stats)}{cache}")
+
+    def export_run_stats(self):
+        from PyQt5.QtWidgets import QFileDialog
+
+        if not self.run_stats:
+            QMessageBox.information(self, "Export Run Stats", "No finished runs to export yet.")
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Run Stats", "run-stats.json",
+            "JSON (*.json);;CSV (*.csv)"
+        )
+        if path:
+            try:
+                export_stats(self.run_stats, path)
+            except OSError as e:
+                QMessageBox.warning(self, "Error", f"Could not export run stats: {str(e)}")
+
+    def start_transfer(self, title, job, on_done):
+        from PyQt5.QtWidgets import QProgressDialog
+
+        if self.catalog_transfer is not None and self.catalog_transfer.isRunning():
+            QMessageBox.information(self, title, "Another import or export is still running.")
+            return
+        # Modal, so the catalog isn't edited while it is being read
+        dialog = QProgressDialog(f"{title}...", None, 0, 100, self)
+        dialog.setWindowTitle(title)
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(300)
+        self.catalog_transfer = CatalogTransfer(job)
+        self.catalog_transfer.progress.connect(dialog.setValue)
+        self.catalog_transfer.done.connect(on_done)
+        self.catalog_transfer.failed.connect(
+            lambda message: QMessageBox.warning(self, "Error", f"{title} failed: {message}"))
+        self.catalog_transfer.finished.connect(dialog.close)
+        self.catalog_transfer.start()
+
+    def import_catalog(self):
+        from PyQt5.QtWidgets import QFileDialog, QInputDialog
+
+        if self.store is None:
+            return
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Catalog", "",
+            "Catalogs (*.json *.ndjson *.jsonl *.csv);;All Files (*)"
+        )
+        if not path:
+            return
+        try:
+            format = detect_format(path)
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        policy, ok = QInputDialog.getItem(
+            self, "Import Catalog", "When a name is already used by another script:",
+            CONFLICT_POLICIES, 0, False
+        )
+        if not ok:
+            return
+        catalog = self.script_data
+
+        def job(progress):
+            return plan_import(read_catalog(path, format, progress), catalog, policy)
+
+        self.start_transfer("Import Catalog", job, self.on_catalog_imported)
+
+    def on_catalog_imported(self, result):
+        plan, counts = result
+        replaced = [name for name, _ in plan if name in self.script_data]
+        apply_import(self.store, plan)
+        self.apply_catalog_changes({
+            "added": [name for name, _ in plan if name not in replaced],
+            "removed": [], "renamed": [], "updated": replaced,
+        })
+        self.load_schedules()
+        self.statusBar().showMessage(
+            "Imported: " + ", ".join(f"{count} {key}" for key, count in counts.items() if count)
+            if any(counts.values()) else "Imported: nothing to import")
+
+    def export_catalog(self):
+        from PyQt5.QtWidgets import QFileDialog
+
+        if not self.script_data:
+            QMessageBox.information(self, "Export Catalog", "The catalog is empty.")
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Catalog", "scripts-export.json",
+            "JSON (*.json);;NDJSON (*.ndjson);;CSV (*.csv)"
+        )
+        if not path:
+            return
+        try:
+            format = detect_format(path)
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        # Shallow copies, so edits made meanwhile don't race the writer
+        catalog = {name: dict(info) for name, info in self.script_data.items()}
+        self.start_transfer(
+            "Export Catalog",
+            lambda progress: export_catalog(catalog, path, format, progress),
+            lambda count: self.statusBar().showMessage(f"Exported {count} scripts to {path}"))
+
+    def update_run_status(self):
+        running = self.engine.running_count
+        queued = self.engine.queued_count
+        message = f"{running} running"
+        if queued:
+            message += f", {queued} queued"
+        if self.engine.remote_pool.enabled:
+            message += f" · {self.engine.remote_pool.summary()}"
+        self.statusBar().showMessage(message)
+
+    def close_output_tab(self, index):
+        pane = self.output_tabs.widget(index)
+        run_id = pane.property("run_id")
+        if run_id is None:
+            # A pipeline's summary tab: closing it stops the pipeline
+            pipeline_run = self.pipeline_runs.pop(pane, None)
+            if pipeline_run is not None:
+                pipeline_run.cancel(self.engine.cancel)
+            self.output_tabs.removeTab(index)
+            pane.deleteLater()
+            return
+        self.engine.cancel(run_id)
+        self.output_tabs.removeTab(index)
+        del self.output_panes[run_id]
+        self.engine.forget(run_id)
+        pane.shutdown()
+        pane.deleteLater()
+
+    def edit_script(self):
+        if not self.current_script or self.current_script not in self.script_data:
+            return
+        
+        script_path = self.script_data[self.current_script]['path']
+        
+        if not os.path.exists(script_path):
+            QMessageBox.warning(self, "Error", f"Script file not found: {script_path}")
+            return
+        
+        self.open_in_editor(script_path)
+
+    def open_in_editor(self, path):
+        # Open with default editor
+        try:
+            if self.is_windows:
+                os.startfile(path)
+            else:
+                subprocess.Popen(['xdg-open', path])
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Could not open {path}: {str(e)}")
+
+    def delete_script(self):
+        if not self.current_script:
+            return
+        
+        reply = QMessageBox.question(
+            self, 'Delete Script',
+            f'Are you sure you want to delete "{self.current_script}"?',
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        
+        if reply == QMessageBox.Yes:
+            # Remove from data
+            self.store.delete(self.current_script)
+            self.search_index.remove(self.current_script)
+            self.scheduler.remove(self.current_script)
+            
+            # Remove from list
+            self.script_model.remove(self.current_script)
+            
+            self.clear_details()
+            
+            # Save changes
+            self.schedule_save()
+
+    def clear_details(self):
+        self.current_script = None
+        self.name_edit.clear()
+        self.path_edit.clear()
+        self.category_edit.clear()
+        self.args_edit.clear()
+        self.env_edit.clear()
+        self.interpreter_edit.clear()
+        self.schedule_edit.clear()
+        self.cache_check.setChecked(False)
+        self.cache_inputs_edit.clear()
+        self.limits_edit.clear()
+        self.protocol_combo.blockSignals(True)
+        self.protocol_combo.setCurrentIndex(0)
+        self.protocol_combo.blockSignals(False)
+        self.run_btn.setEnabled(False)
+        self.edit_btn.setEnabled(False)
+        self.delete_btn.setEnabled(False)
+
+    def clear_output(self):
+        pane = self.output_tabs.currentWidget()
+        if pane is not None:
+            pane.clear()
+
+    def filter_scripts(self, text):
+        # Wait for a pause in typing, then search on the worker thread
+        self.search_timer.start()
+
+    def run_search(self):
+        self.search_generation += 1
+        self.search_thread.search(self.search_generation, self.search_box.text())
+
+    def on_search_results(self, generation, names):
+        if generation != self.search_generation:
+            return
+        self.script_model.set_filter(names)
+        if self.current_script:
+            self.script_list.setCurrentIndex(self.script_model.index_of(self.current_script))
+
+    def schedule_save(self):
+        # Restart the countdown so a burst of edits is written once
+        self.save_timer.start()
+
+    def save_scripts(self):
+        self.save_timer.stop()
+        try:
+            self.store.flush()
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Could not save scripts: {str(e)}")
+
+    def load_scripts(self):
+        # Parse the catalog on a worker thread so the window stays responsive
+        self.catalog_loader = CatalogLoader(default_catalog_path(self.settings))
+        self.catalog_loader.loaded.connect(self.on_catalog_loaded)
+        self.catalog_loader.failed.connect(self.on_catalog_failed)
+        self.catalog_loader.start()
+
+    def on_catalog_loaded(self, store):
+        self.mark_startup("load catalog")
+        self.store = store
+        self.script_data = store.data
+        self.search_thread.rebuild(self.script_data)
+        if self.search_box.text():
+            self.run_search()
+
+        # Populate list
+        self.script_model.load(self.script_data)
+        self.statusBar().showMessage(f"Ready - {len(self.script_data)} scripts")
+        self.load_schedules()
+        for entry in self.settings['watched_directories']:
+            self.start_watching(entry['path'])
+        self.mark_startup("populate list")
+        if self.profiler is not None:
+            self.profiler.note("catalog_entries", len(self.script_data))
+            self.profiler.report()
+
+    def on_catalog_failed(self, message):
+        QMessageBox.warning(self, "Error", f"Could not load scripts: {message}")
+        self.store = open_store(default_catalog_path(self.settings))
+        self.script_data = self.store.data
+        self.statusBar().showMessage("Ready")
+
+    def load_schedules(self):
+        invalid = load_schedules(self.scheduler, self.script_data)
+        if invalid:
+            QMessageBox.warning(self, "Error", "Some schedules are invalid and will not run:\n"
+                                + "\n".join(f"{name}: {error}" for name, error in invalid[:20]))
+        self.arm_schedule_timer()
+
+    def watched_entry(self, root):
+        for entry in self.settings['watched_directories']:
+            if path_key(entry['path']) == path_key(root):
+                return entry
+        return None
+
+    def start_watching(self, root):
+        if self.watch_thread is None:
+            self.watch_thread = WatchThread()
+            self.watch_thread.changes_ready.connect(self.on_watch_changes)
+            self.watch_thread.start()
+            self.fs_watcher = QFileSystemWatcher(self)
+            self.fs_watcher.directoryChanged.connect(self.on_directory_changed)
+            if self.settings['watch_polling']:
+                self.poll_timer.start()
+        self.statusBar().showMessage(f"Scanning {root}...")
+        self.watch_thread.scan(root)
+
+    def add_watched_directory(self):
+        from PyQt5.QtWidgets import QFileDialog, QInputDialog
+
+        if self.store is None:
+            return
+        root = QFileDialog.getExistingDirectory(self, "Watch Directory")
+        if not root:
+            return
+        root = os.path.abspath(root)
+        if self.watched_entry(root) is not None:
+            QMessageBox.information(self, "Watch Directory", f"{root} is already watched.")
+            return
+        category, ok = QInputDialog.getText(
+            self, 'Watch Directory', 'Category for scripts found here:',
+            text=os.path.basename(root.rstrip(os.sep)) or root
+        )
+        if not ok:
+            return
+        self.settings['watched_directories'] = (self.settings['watched_directories']
+                                                + [{"path": root, "category": category}])
+        try:
+            save_settings(self.settings)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Could not save settings: {str(e)}")
+        self.start_watching(root)
+
+    def remove_watched_directory(self):
+        from PyQt5.QtWidgets import QInputDialog
+
+        roots = [entry['path'] for entry in self.settings['watched_directories']]
+        if not roots:
+            QMessageBox.information(self, "Stop Watching", "No directories are watched.")
+            return
+        root, ok = QInputDialog.getItem(self, "Stop Watching", "Directory (its scripts stay in "
+                                        "the catalog):", roots, 0, False)
+        if not ok:
+            return
+        self.settings['watched_directories'] = [
+            entry for entry in self.settings['watched_directories'] if entry['path'] != root]
+        try:
+            save_settings(self.settings)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Could not save settings: {str(e)}")
+        if self.watch_thread is None:
+            return
+        self.watch_thread.unwatch(root)
+        prefix = path_key(root).rstrip(os.sep) + os.sep
+        watched = [path for path in self.fs_watcher.directories()
+                   if path_key(path) == path_key(root) or path_key(path).startswith(prefix)]
+        if watched:
+            self.fs_watcher.removePaths(watched)
+
+    def on_directory_changed(self, path):
+        # Editors and copies touch a directory many times in a row
+        self.pending_watch_dirs.add(path)
+        self.watch_timer.start()
+
+    def rescan_watched_dirs(self):
+        by_root = {}
+        for path in self.pending_watch_dirs:
+            key = path_key(path)
+            for entry in self.settings['watched_directories']:
+                root_key = path_key(entry['path'])
+                if key == root_key or key.startswith(root_key.rstrip(os.sep) + os.sep):
+                    by_root.setdefault(entry['path'], []).append(path)
+                    break
+        self.pending_watch_dirs.clear()
+        for root, dirs in by_root.items():
+            self.watch_thread.rescan(root, dirs)
+
+    def poll_watched_dirs(self):
+        self.watch_thread.poll()
+
+    def on_watch_changes(self, root, changes, full, dirs_added, dirs_removed):
+        entry = self.watched_entry(root)
+        if entry is None or self.store is None:
+            # No longer watched
+            return
+        if dirs_removed:
+            self.fs_watcher.removePaths(dirs_removed)
+        if dirs_added and not self.poll_timer.isActive():
+            failed = self.fs_watcher.addPaths(dirs_added)
+            if failed:
+                # Out of notification handles (e.g. the inotify watch limit)
+                self.poll_timer.start()
+                self.statusBar().showMessage(
+                    f"Watching {len(failed)} directories by polling every "
+                    f"{self.poll_timer.interval() // 1000} s")
+
+        result = sync_catalog(self.store, root, changes, entry.get('category', ''), full)
+        self.apply_catalog_changes(result)
+        counts = [f"{len(result[key])} {key}" for key in ("added", "removed", "renamed", "updated")
+                  if result[key]]
+        if full or counts:
+            self.statusBar().showMessage(
+                f"{root}: {', '.join(counts) if counts else 'up to date'}")
+
+    def apply_catalog_changes(self, result):
+        """Show catalog entries added, removed or moved by a watched directory."""
+        if not any(result.values()):
+            return
+        for name in result["removed"]:
+            self.scheduler.remove(name)
+            if name == self.current_script:
+                self.clear_details()
+        for old_name, new_name in result["renamed"]:
+            self.scheduler.rename(old_name, new_name)
+        if sum(len(names) for names in result.values()) > WATCH_BULK_CHANGES:
+            self.script_model.load(self.script_data)
+            self.search_thread.rebuild(self.script_data)
+            if self.search_box.text():
+                self.run_search()
+        else:
+            for name in result["removed"]:
+                self.script_model.remove(name)
+                self.search_index.remove(name)
+            for old_name, new_name in result["renamed"]:
+                self.script_model.rename(old_name, new_name)
+                self.search_index.rename(old_name, new_name, self.script_data[new_name])
+            for name in result["added"]:
+                self.script_model.add(name)
+                self.search_index.add(name, self.script_data[name])
+            for name in result["updated"]:
+                self.script_model.refresh(name)
+                self.search_index.add(name, self.script_data[name])
+        renamed = dict(result["renamed"])
+        if self.current_script in renamed:
+            self.current_script = renamed[self.current_script]
+            self.name_edit.setText(self.current_script)
+        if self.current_script in result["updated"] or self.current_script in renamed.values():
+            self.path_edit.setText(self.script_data[self.current_script]['path'])
+        self.schedule_save()
+
+    def set_worker_pool_size(self):
+        from PyQt5.QtWidgets import QInputDialog
+
+        workers, ok = QInputDialog.getInt(
+            self, 'Worker Pool Size',
+            'Maximum number of scripts running at once:',
+            self.engine.max_workers, 1, 1024
+        )
+        if ok:
+            self.engine.set_max_workers(workers)
+            self.settings['max_workers'] = workers
+            try:
+                save_settings(self.settings)
+            except OSError as e:
+                QMessageBox.warning(self, "Error", f"Could not save settings: {str(e)}")
+
+    def set_remote_agents(self):
+        from PyQt5.QtWidgets import QInputDialog
+
+        text, ok = QInputDialog.getMultiLineText(
+            self, 'Remote Agents',
+            'Run scripts on these worker agents, one host:port per line\n'
+            '(leave empty to run scripts on this machine):',
+            '\n'.join(self.settings['remote_agents'])
+        )
+        if not ok:
+            return
+        agents = text.split()
+        try:
+            self.engine.remote_pool.set_agents(agents)
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        self.settings['remote_agents'] = self.engine.remote_pool.addresses
+        try:
+            save_settings(self.settings)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Could not save settings: {str(e)}")
+        self.update_run_status()
+
+    def open_run_history(self):
+        try:
+            history = open_history(self.settings)
+        except Exception as e:
+            # Runs still work without history; they just aren't recorded
+            QMessageBox.warning(self, "Error", f"Could not open run history: {str(e)}")
+            return None
+        if history is not None:
+            # Retention can take a while on a large history, so keep it off
+            # the GUI thread
+            threading.Thread(
+                target=history.prune,
+                args=(self.settings['history_max_age_days'],
+                      self.settings['history_max_mb'] * 1024 * 1024),
+                daemon=True
+            ).start()
+        return history
+
+    def open_log_archive(self):
+        try:
+            archive = open_archive(self.settings)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Could not open the log archive: {str(e)}")
+            return None
+        if archive is not None:
+            threading.Thread(
+                target=archive.prune,
+                args=(self.settings['archive_max_age_days'],
+                      self.settings['archive_max_mb'] * 1024 * 1024),
+                daemon=True
+            ).start()
+        return archive
+
+    def show_history(self):
+        if self.history is None:
+            QMessageBox.information(self, "Run History", "Run history is disabled in the settings.")
+            return
+        from .history_panel import HistoryDialog
+        HistoryDialog(self.history, self, self.engine.encoding).exec_()
+
+    def show_process_monitor(self):
+        from .procmon import monitor_supported
+        if not monitor_supported():
+            QMessageBox.information(self, "Process Monitor",
+                                    "The process monitor needs /proc, which this system lacks.")
+            return
+        if self.monitor_dialog is None:
+            from .monitor_panel import ProcessMonitorDialog
+            self.monitor_dialog = ProcessMonitorDialog(
+                self.engine, self.settings.get('monitor_interval_s', 1),
+                self.settings.get('monitor_history', 60), self)
+        self.monitor_dialog.show()
+        self.monitor_dialog.raise_()
+        self.monitor_dialog.activateWindow()
+
+    def closeEvent(self, event):
+        self.schedule_timer.stop()
+        if self.monitor_dialog is not None:
+            self.monitor_dialog.stop()
+        try:
+            self.scheduler.save_state()
+        except OSError:
+            pass
+        self.engine.shutdown()
+        self.search_thread.stop()
+        for pane in self.output_panes.values():
+            pane.shutdown()
+        if self.watch_thread is not None:
+            self.watch_thread.stop()
+        if self.catalog_loader is not None:
+            self.catalog_loader.wait()
+        if self.catalog_transfer is not None:
+            self.catalog_transfer.wait()
+        if self.store is not None:
+            self.save_scripts()
+        if self.history is not None:
+            self.history.close()
+        super().closeEvent(event)
+
+    def show_settings(self):
+        QMessageBox.information(self, "Settings", "Settings dialog will be implemented in a future version.")
+
+    def show_about(self):
+        QMessageBox.about(self, "About Script Runner Pro", 
+                         "Script Runner Pro - Windows Edition\n\n"
+                         "A modern script management and execution tool.\n"
+                         "Supports Python, PowerShell, Batch, and more.\n\n"
+                         "Version 2.0")
@@ -0,0 +1,191 @@
+"""
+Persistent run history for Script Runner Pro.
+
+Every finished run is recorded in a SQLite database together with its
+resource statistics, what it reported through its output protocol
+(progress, metrics and artifacts, see events.py) and, optionally, the tail
+of its output compressed with zlib. Indexes cover the common questions (runs of a script, recent runs,
+failures, failures of a category), so they stay fast with millions of rows.
+Retention is enforced by age and by the approximate total size of the
+database.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+# Rough per-row cost of the metadata columns, used for size-based retention
+ROW_OVERHEAD_BYTES = 200
+
+RUN_COLUMNS = [
+    "id", "script", "category", "started_at", "ended_at", "duration",
+    "exit_code", "cpu_user", "cpu_system", "max_rss", "output_bytes", "output_size", "events",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    script TEXT NOT NULL,
+    category TEXT NOT NULL DEFAULT '',
+    started_at REAL NOT NULL,
+    ended_at REAL,
+    duration REAL,
+    exit_code INTEGER,
+    failed INTEGER NOT NULL DEFAULT 0,
+    cpu_user REAL,
+    cpu_system REAL,
+    max_rss INTEGER,
+    output_bytes INTEGER,
+    output BLOB,
+    output_size INTEGER NOT NULL DEFAULT 0,
+    events TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_script_started ON runs (script, started_at);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started_at);
+CREATE INDEX IF NOT EXISTS runs_exit_code ON runs (exit_code, started_at);
+CREATE INDEX IF NOT EXISTS runs_failed_started ON runs (failed, started_at);
+CREATE INDEX IF NOT EXISTS runs_category_failed_started ON runs (category, failed, started_at);
+"""
+
+
+def read_output_tail(path, max_bytes):
+    """Return the last max_bytes of a run log, or b'' if unavailable."""
+    try:
+        with open(path, 'rb') as file:
+            file.seek(0, 2)
+            size = file.tell()
+            file.seek(max(0, size - max_bytes))
+            return file.read()
+    except (OSError, TypeError):
+        return b''
+
+
+class RunHistory:
+    """Thread-safe store of finished runs.
+
+    Queries page backwards in time with a (started_at, id) cursor rather
+    than OFFSET, so fetching page 1000 costs the same as page 1.
+    """
+
+    def __init__(self, path, store_output=True, max_output_bytes=1024 * 1024):
+        self.path = path
+        self.store_output = store_output
+        self.max_output_bytes = max_output_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # auto_vacuum only takes effect on a new database
+        self._db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.executescript(SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(runs)")}
+        if "events" not in columns:
+            # A database from before runs recorded their events
+            self._db.execute("ALTER TABLE runs ADD COLUMN events TEXT")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def record(self, run, category=''):
+        """Store a finished ScriptRun; returns the history id."""
+        blob = None
+        if self.store_output and run.log_path:
+            output = read_output_tail(run.log_path, self.max_output_bytes)
+            if output:
+                blob = zlib.compress(output, 6)
+        failed = int(run.exit_code != 0)
+        events = run.events.summary() if run.events is not None else None
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO runs (script, category, started_at, ended_at, duration,"
+                " exit_code, failed, cpu_user, cpu_system, max_rss, output_bytes,"
+                " output, output_size, events) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run.name, category or '', run.started_at or time.time(), run.ended_at,
+                 run.duration, run.exit_code, failed, run.cpu_user, run.cpu_system,
+                 run.max_rss, run.output_bytes, blob, len(blob) if blob else 0,
+                 json.dumps(events) if events else None))
+            return cursor.lastrowid
+
+    def query(self, script=None, category=None, failed=None, before=None, limit=50):
+        """Return up to limit runs, newest first, as dicts.
+
+        before is the (started_at, id) of the last row of the previous page.
+        "events" is what the run reported (OutputEvents.summary()), or None.
+        """
+        clauses = []
+        params = []
+        if script:
+            clauses.append("script = ?")
+            params.append(script)
+        if category:
+            clauses.append("category = ?")
+            params.append(category)
+        if failed is not None:
+            clauses.append("failed = ?")
+            params.append(int(bool(failed)))
+        if before is not None:
+            clauses.append("(started_at < ? OR (started_at = ? AND id < ?))")
+            params.extend([before[0], before[0], before[1]])
+        sql = f"SELECT {', '.join(RUN_COLUMNS)} FROM runs"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY started_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        runs = [dict(zip(RUN_COLUMNS, row)) for row in rows]
+        for run in runs:
+            if run["events"]:
+                run["events"] = json.loads(run["events"])
+        return runs
+
+    def get_output(self, run_id):
+        """Return the stored output of a run as bytes (b'' if none)."""
+        with self._lock:
+            row = self._db.execute("SELECT output FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if not row or not row[0]:
+            return b''
+        return zlib.decompress(row[0])
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def prune(self, max_age_days=None, max_bytes=None):
+        """Apply the retention policy; returns the number of deleted runs."""
+        deleted = 0
+        with self._lock:
+            if max_age_days:
+                cutoff = time.time() - max_age_days * 86400
+                with self._db:
+                    deleted += self._db.execute(
+                        "DELETE FROM runs WHERE started_at < ?", (cutoff,)).rowcount
+            if max_bytes:
+                deleted += self._prune_size(max_bytes)
+            if deleted:
+                self._db.execute("PRAGMA incremental_vacuum")
+        return deleted
+
+    def _prune_size(self, max_bytes):
+        # Caller must hold self._lock
+        rows, output = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(output_size), 0) FROM runs").fetchone()
+        excess = rows * ROW_OVERHEAD_BYTES + output - max_bytes
+        if excess <= 0:
+            return 0
+        # Walk from the oldest run until enough space has been accounted for
+        cutoff = None
+        freed = 0
+        for run_id, started_at, size in self._db.execute(
+                "SELECT id, started_at, output_size FROM runs ORDER BY started_at, id"):
+            freed += size + ROW_OVERHEAD_BYTES
+            cutoff = (started_at, run_id)
+            if freed >= excess:
+                break
+        with self._db:
+            return self._db.execute(
+                "DELETE FROM runs WHERE started_at < ? OR (started_at = ? AND id <= ?)",
+                (cutoff[0], cutoff[0], cutoff[1])).rowcount
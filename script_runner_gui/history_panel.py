@@ -0,0 +1,137 @@
+"""
+Run history browser for Script Runner Pro.
+
+Shows recorded runs one page at a time, newest first, filtered by script,
+category and outcome. Paging uses the history's (started_at, id) cursors,
+so every page is an indexed lookup however many runs are stored.
+"""
+
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QCheckBox,
+                             QPushButton, QTableWidget, QTableWidgetItem, QHeaderView,
+                             QPlainTextEdit, QMessageBox)
+
+from .events import format_metrics
+from .runlog import output_encoding
+from .stats import format_bytes, format_timestamp
+
+PAGE_SIZE = 50
+
+COLUMNS = ["Started", "Script", "Category", "Exit", "Duration", "CPU", "Peak RSS", "Output",
+           "Metrics"]
+
+
+def _seconds(value):
+    return "" if value is None else f"{value:.2f} s"
+
+
+class HistoryDialog(QDialog):
+
+    def __init__(self, history, parent=None, encoding=None):
+        super().__init__(parent)
+        self.history = history
+        self.encoding = output_encoding(encoding)
+        self.cursors = [None]   # cursor that produced each page visited so far
+        self.rows = []
+
+        self.setWindowTitle("Run History")
+        self.resize(900, 500)
+        layout = QVBoxLayout(self)
+
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("Script:"))
+        self.script_edit = QLineEdit()
+        self.script_edit.returnPressed.connect(self.apply_filters)
+        filter_layout.addWidget(self.script_edit)
+        filter_layout.addWidget(QLabel("Category:"))
+        self.category_edit = QLineEdit()
+        self.category_edit.returnPressed.connect(self.apply_filters)
+        filter_layout.addWidget(self.category_edit)
+        self.failed_check = QCheckBox("Failures only")
+        self.failed_check.toggled.connect(self.apply_filters)
+        filter_layout.addWidget(self.failed_check)
+        search_btn = QPushButton("Search")
+        search_btn.clicked.connect(self.apply_filters)
+        filter_layout.addWidget(search_btn)
+        layout.addLayout(filter_layout)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.cellDoubleClicked.connect(self.show_output)
+        layout.addWidget(self.table)
+
+        nav_layout = QHBoxLayout()
+        self.newer_btn = QPushButton("◀ Newer")
+        self.newer_btn.clicked.connect(self.show_newer)
+        nav_layout.addWidget(self.newer_btn)
+        self.older_btn = QPushButton("Older ▶")
+        self.older_btn.clicked.connect(self.show_older)
+        nav_layout.addWidget(self.older_btn)
+        self.page_label = QLabel()
+        nav_layout.addWidget(self.page_label)
+        nav_layout.addStretch()
+        layout.addLayout(nav_layout)
+
+        self.load_page()
+
+    def apply_filters(self, *args):
+        self.cursors = [None]
+        self.load_page()
+
+    def show_older(self):
+        if self.rows:
+            last = self.rows[-1]
+            self.cursors.append((last["started_at"], last["id"]))
+            self.load_page()
+
+    def show_newer(self):
+        if len(self.cursors) > 1:
+            self.cursors.pop()
+            self.load_page()
+
+    def load_page(self):
+        failed = True if self.failed_check.isChecked() else None
+        self.rows = self.history.query(
+            script=self.script_edit.text().strip() or None,
+            category=self.category_edit.text().strip() or None,
+            failed=failed,
+            before=self.cursors[-1],
+            limit=PAGE_SIZE
+        )
+        self.table.setRowCount(len(self.rows))
+        for row, run in enumerate(self.rows):
+            values = [
+                format_timestamp(run["started_at"]),
+                run["script"],
+                run["category"],
+                "" if run["exit_code"] is None else str(run["exit_code"]),
+                _seconds(run["duration"]),
+                "" if run["cpu_user"] is None else _seconds(run["cpu_user"] + run["cpu_system"]),
+                "" if run["max_rss"] is None else format_bytes(run["max_rss"]),
+                "" if run["output_bytes"] is None else format_bytes(run["output_bytes"]),
+                format_metrics((run["events"] or {}).get("metrics")),
+            ]
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+
+        self.newer_btn.setEnabled(len(self.cursors) > 1)
+        self.older_btn.setEnabled(len(self.rows) == PAGE_SIZE)
+        self.page_label.setText(f"Page {len(self.cursors)}")
+
+    def show_output(self, row, column):
+        run = self.rows[row]
+        output = self.history.get_output(run["id"])
+        if not output:
+            QMessageBox.information(self, "Run Output", "No output was stored for this run.")
+            return
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f"{run['script']} - {format_timestamp(run['started_at'])}")
+        dialog.resize(800, 500)
+        dialog_layout = QVBoxLayout(dialog)
+        text = QPlainTextEdit()
+        text.setReadOnly(True)
+        text.setPlainText(output.decode(self.encoding, errors='replace'))
+        dialog_layout.addWidget(text)
+        dialog.exec_()
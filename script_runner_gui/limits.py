@@ -0,0 +1,177 @@
+"""
+Per-run resource limits for Script Runner Pro.
+
+A catalog entry may carry "limits", a dict of:
+
+  timeout    wall-clock seconds before the run is stopped
+  cpu        CPU seconds (RLIMIT_CPU: SIGXCPU, then SIGKILL shortly after)
+  memory_mb  address space in MiB (RLIMIT_AS); allocations beyond it fail
+  nofile     open file descriptors (RLIMIT_NOFILE)
+  nice       niceness added to the run's priority (POSIX), or a lower
+             priority class on Windows
+  ionice     I/O scheduling class: "idle", "best-effort" or "best-effort:N"
+             with N from 0 (high) to 7 (low); Linux, via the ionice tool
+
+Every run gets a process group of its own (a new session on POSIX), so
+stopping a run - on timeout or by hand - reaches everything it started.
+rlimits and niceness are set in the child between fork and exec and are
+inherited by its children; note that rlimits count per process, not for
+the group as a whole. The timeout is enforced by the engine. This module
+has no Qt dependency.
+"""
+
+import os
+import shutil
+import signal
+import subprocess
+
+LIMIT_FIELDS = ["timeout", "cpu", "memory_mb", "nofile", "nice", "ionice"]
+
+IONICE_CLASSES = {"realtime": 1, "best-effort": 2, "idle": 3}
+
+# Seconds a stopped run gets to exit after SIGTERM before it is killed
+KILL_GRACE = 5
+
+# Seconds past the CPU limit before the kernel follows SIGXCPU with SIGKILL
+CPU_KILL_GRACE = 5
+
+
+def normalize_limits(spec):
+    """Validate a "limits" value; returns a dict with only the fields set.
+
+    Numbers may be given as strings. Raises ValueError for anything else.
+    """
+    if not spec:
+        return {}
+    if not isinstance(spec, dict):
+        raise ValueError("limits must be an object")
+    limits = {}
+    for field, value in spec.items():
+        if field not in LIMIT_FIELDS:
+            raise ValueError(f"Unknown limit '{field}' (use {', '.join(LIMIT_FIELDS)})")
+        if value is None or value == '':
+            continue
+        if field == "ionice":
+            _ionice_args(value)
+            limits[field] = str(value)
+            continue
+        try:
+            number = float(value) if field == "timeout" else int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Limit '{field}' must be a number, got '{value}'") from None
+        if field == "nice":
+            if not -20 <= number <= 19:
+                raise ValueError("nice must be between -20 and 19")
+        elif number <= 0:
+            raise ValueError(f"Limit '{field}' must be positive")
+        limits[field] = number
+    return limits
+
+
+def _ionice_args(value):
+    name, _, level = str(value).partition(':')
+    if name not in IONICE_CLASSES:
+        raise ValueError(f"Unknown ionice class '{name}' (use {', '.join(IONICE_CLASSES)})")
+    args = ["-c", str(IONICE_CLASSES[name])]
+    if level:
+        if not level.isdigit() or int(level) > 7 or name == "idle":
+            raise ValueError(f"Invalid ionice level '{level}' (0-7, not for idle)")
+        args += ["-n", level]
+    return args
+
+
+def parse_limits(text):
+    """Parse "timeout=600 memory_mb=2048 nice=10" into a limits dict."""
+    from .commands import parse_env
+    return normalize_limits(parse_env(text))
+
+
+def format_limits(limits):
+    """Inverse of parse_limits, for showing limits in an editor."""
+    return ' '.join(f"{field}={limits[field]:g}" if isinstance(limits[field], float)
+                    else f"{field}={limits[field]}"
+                    for field in LIMIT_FIELDS if field in (limits or {}))
+
+
+def limited_command(command, limits):
+    """command, run through ionice when an I/O class is set and ionice exists."""
+    if not limits.get("ionice") or not isinstance(command, list):
+        return command
+    ionice = shutil.which("ionice")
+    if ionice is None:
+        return command
+    return [ionice] + _ionice_args(limits["ionice"]) + command
+
+
+def popen_options(limits):
+    """Extra subprocess keyword arguments that apply limits to a new run."""
+    if os.name == 'nt':
+        flags = subprocess.CREATE_NEW_PROCESS_GROUP
+        nice = limits.get("nice", 0)
+        if nice >= 10:
+            flags |= subprocess.IDLE_PRIORITY_CLASS
+        elif nice > 0:
+            flags |= subprocess.BELOW_NORMAL_PRIORITY_CLASS
+        elif nice < 0:
+            flags |= subprocess.ABOVE_NORMAL_PRIORITY_CLASS
+        return {"creationflags": flags}
+    options = {"start_new_session": True}
+    rlimits = _rlimits(limits)
+    if rlimits or limits.get("nice"):
+        options["preexec_fn"] = _child_setup(rlimits, limits.get("nice", 0))
+    return options
+
+
+def _rlimits(limits):
+    """[(resource, (soft, hard))], computed here so the child only has to apply them."""
+    import resource
+
+    wanted = []
+    if "cpu" in limits:
+        wanted.append((resource.RLIMIT_CPU, limits["cpu"], limits["cpu"] + CPU_KILL_GRACE))
+    if "memory_mb" in limits:
+        size = limits["memory_mb"] * 1024 * 1024
+        wanted.append((resource.RLIMIT_AS, size, size))
+    if "nofile" in limits:
+        wanted.append((resource.RLIMIT_NOFILE, limits["nofile"], limits["nofile"]))
+    rlimits = []
+    for resource_id, soft, hard in wanted:
+        # An unprivileged process can lower its hard limit but not raise it
+        _, current_hard = resource.getrlimit(resource_id)
+        if current_hard != resource.RLIM_INFINITY:
+            hard = min(hard, current_hard)
+            soft = min(soft, hard)
+        rlimits.append((resource_id, (soft, hard)))
+    return rlimits
+
+
+def _child_setup(rlimits, nice):
+    import resource
+
+    # Runs in the forked child before exec: keep it to a few system calls
+    def setup():
+        for resource_id, values in rlimits:
+            resource.setrlimit(resource_id, values)
+        if nice:
+            try:
+                os.nice(nice)
+            except OSError:
+                # Raising the priority needs privileges; run at normal priority
+                pass
+    return setup
+
+
+def kill_tree(pid, force=False):
+    """Signal the process group led by pid (a run started with popen_options).
+
+    On Windows the whole tree is ended with taskkill, which has no gentle
+    mode for console programs.
+    """
+    try:
+        if os.name == 'nt':
+            subprocess.Popen(["taskkill", "/F", "/T", "/PID", str(pid)],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            os.killpg(pid, signal.SIGKILL if force else signal.SIGTERM)
+    except OSError:
+        pass
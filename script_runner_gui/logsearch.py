@@ -0,0 +1,267 @@
+"""
+Search and filtering over run logs for Script Runner Pro.
+
+LogSearch scans a run's log file as it grows and keeps, in arrays of byte
+offsets, where each line that passes the include/exclude filters starts and
+where each line matching the search pattern starts, so row N or match N is
+found in O(1). update() only reads what was appended since the previous
+call, so it can run as output arrives; a new query starts over.
+
+Patterns are matched against the raw bytes of the log (the pattern is
+encoded with the log's encoding). That keeps a search through millions of
+lines inside the regex engine, at the price that "." and "\\w" match bytes
+and ASCII word characters rather than any Unicode character. Patterns
+should match within a line; one spanning lines may be missed.
+"""
+
+import bisect
+import itertools
+import operator
+import re
+from array import array
+
+from .runlog import _MappedFile, output_encoding
+
+# Bytes of log processed per step; also how often a search checks for cancellation
+CHUNK_SIZE = 8 * 1024 * 1024
+
+# Hits in one chunk after which testing every line beats searching hit by hit
+DENSE_HITS = 2000
+
+# Escapes whose meaning changes if the text (but not the pattern) is lowercased
+_CASED_ESCAPES = re.compile(r'\\[xuUN0-7]')
+_ESCAPE_OR_UPPER = re.compile(r'\\.|[A-Z]')
+
+
+class Query:
+    """What to look for: a search pattern and include/exclude line filters."""
+
+    def __init__(self, find='', include='', exclude='', regex=False, case_sensitive=False):
+        self.find = find
+        self.include = include
+        self.exclude = exclude
+        self.regex = regex
+        self.case_sensitive = case_sensitive
+
+    def __bool__(self):
+        return bool(self.find or self.include or self.exclude)
+
+    def __eq__(self, other):
+        return isinstance(other, Query) and vars(self) == vars(other)
+
+    @property
+    def filtering(self):
+        return bool(self.include or self.exclude)
+
+    def text_pattern(self):
+        """The search pattern for decoded text (for highlighting a page), or None."""
+        if not self.find:
+            return None
+        flags = 0 if self.case_sensitive else re.IGNORECASE
+        try:
+            return re.compile(self.find if self.regex else re.escape(self.find), flags)
+        except re.error as e:
+            raise ValueError(f"Invalid pattern '{self.find}': {e}") from None
+
+    def compile(self, encoding):
+        """Return (lower, find, include, exclude) byte patterns.
+
+        Unused patterns are None. When lower is set, the patterns expect
+        text that was lowercased with bytes.lower(): much faster than a
+        case-insensitive pattern. Raises ValueError for an invalid pattern.
+        """
+        texts = [text if self.regex else re.escape(text)
+                 for text in (self.find, self.include, self.exclude)]
+        flags = re.MULTILINE
+        lower = False
+        if not self.case_sensitive:
+            if any(_CASED_ESCAPES.search(text) for text in texts):
+                flags |= re.IGNORECASE
+            else:
+                lower = True
+                texts = [_ESCAPE_OR_UPPER.sub(lambda m: m.group().lower() if len(m.group()) == 1
+                                              else m.group(), text) for text in texts]
+        patterns = []
+        for original, text in zip((self.find, self.include, self.exclude), texts):
+            if not original:
+                patterns.append(None)
+                continue
+            try:
+                patterns.append(re.compile(text.encode(encoding), flags))
+            except UnicodeEncodeError:
+                raise ValueError(f"'{original}' can't occur in {encoding} output") from None
+            except re.error as e:
+                raise ValueError(f"Invalid pattern '{original}': {e}") from None
+        return (lower,) + tuple(patterns)
+
+
+def _line_starts(parts, start):
+    """Offsets at which the lines of chunk.split(b'\\n') begin."""
+    lengths = map(operator.add, map(len, parts), itertools.repeat(1))
+    return itertools.accumulate(itertools.chain((start,), lengths))
+
+
+def _matching_lines(pattern, chunk, base, invert=False):
+    """Offsets (chunk offset + base) of the lines of chunk where pattern matches.
+
+    chunk ends with a newline unless it is the end of the log. With invert,
+    the lines where it doesn't match.
+    """
+    if invert:
+        parts = chunk.split(b'\n')
+        if chunk.endswith(b'\n'):
+            parts.pop()
+        return itertools.compress(_line_starts(parts, base),
+                                  map(operator.not_, map(pattern.search, parts)))
+    found = []
+    position = 0
+    end = len(chunk)
+    while position < end:
+        if len(found) >= DENSE_HITS:
+            # Frequent hits: test the remaining lines one by one in C
+            parts = chunk[position:].split(b'\n')
+            if chunk.endswith(b'\n'):
+                parts.pop()
+            found.extend(itertools.compress(_line_starts(parts, base + position),
+                                            map(pattern.search, parts)))
+            break
+        match = pattern.search(chunk, position)
+        if match is None or match.start() == end:
+            break
+        line_start = max(position, chunk.rfind(b'\n', position, match.start()) + 1)
+        found.append(base + line_start)
+        newline = chunk.find(b'\n', match.start())
+        if newline < 0:
+            break
+        position = newline + 1
+    return found
+
+
+class LogSearch:
+    """Filter and search results for one log file.
+
+    The arrays only ever grow, so the GUI thread may read them (through
+    view()) while a worker thread calls update().
+    """
+
+    def __init__(self, path, query, encoding=None):
+        self.path = path
+        self.query = query
+        self.encoding = encoding or output_encoding()
+        self.lower, self.find, self.include, self.exclude = query.compile(self.encoding)
+        self.visible = array('Q') if query.filtering else None   # row -> line offset
+        self.matches = array('Q')                                # match -> line offset
+        self.line_count = 0
+        self.scanned = 0
+        self.final = False
+
+    def update(self, final=False, cancelled=None):
+        """Scan what was appended to the log since the last call.
+
+        A trailing line without a newline is only scanned once final is set
+        (the run has finished). cancelled() is polled between chunks;
+        returns False if it stopped the update early.
+        """
+        with _MappedFile(self.path) as data:
+            size = 0 if data is None else len(data)
+            while self.scanned < size:
+                if cancelled is not None and cancelled():
+                    return False
+                end = min(size, self.scanned + CHUNK_SIZE)
+                if end < size or not final:
+                    # Stop at a line boundary; a line longer than a chunk is taken whole
+                    newline = data.rfind(b'\n', self.scanned, end)
+                    if newline < 0:
+                        newline = data.find(b'\n', end)
+                    if newline < 0 and not final:
+                        break
+                    end = size if newline < 0 else newline + 1
+                self._scan(data[self.scanned:end], self.scanned)
+        self.final = final
+        return True
+
+    def view(self):
+        """A consistent snapshot of the results so far."""
+        return SearchView(self)
+
+    def _scan(self, chunk, base):
+        lines = chunk.count(b'\n') + (0 if chunk.endswith(b'\n') else 1)
+        if self.lower:
+            chunk = chunk.lower()
+        visible = None
+        if self.include is not None:
+            visible = _matching_lines(self.include, chunk, base)
+            if self.exclude is not None:
+                visible = [offset for offset in visible if not self.exclude.search(
+                    chunk, offset - base, _line_end(chunk, offset - base))]
+        elif self.exclude is not None:
+            visible = array('Q', _matching_lines(self.exclude, chunk, base, invert=True))
+        matches = []
+        if self.find is not None:
+            matches = _matching_lines(self.find, chunk, base)
+            if visible is not None:
+                shown = set(visible)
+                matches = [offset for offset in matches if offset in shown]
+        # Results first: view() trusts everything below the scanned offset
+        if visible is not None:
+            self.visible.extend(visible)
+        self.matches.extend(matches)
+        self.line_count += lines
+        self.scanned = base + len(chunk)
+
+
+def _line_end(data, start):
+    newline = data.find(b'\n', start)
+    return len(data) if newline < 0 else newline + 1
+
+
+class SearchView:
+    """Rows (lines passing the filters) and matches of a LogSearch at one moment.
+
+    Without filters every line is a row, and rows aren't numbered: the
+    console pages through the log by byte offset instead.
+    """
+
+    def __init__(self, search):
+        self.search = search
+        # Read the end first: everything recorded before it is complete
+        self.end = search.scanned
+        self.line_count = search.line_count
+        self.filtered = search.visible is not None
+        self.row_count = bisect.bisect_left(search.visible, self.end) if self.filtered else None
+        self.match_count = bisect.bisect_left(search.matches, self.end)
+        self.final = search.final
+
+    @property
+    def query(self):
+        return self.search.query
+
+    def match_offset(self, index):
+        return self.search.matches[index]
+
+    def row_offset(self, row):
+        return self.search.visible[row]
+
+    def row_of_offset(self, offset):
+        """First row at or after a byte offset (filtered views)."""
+        return bisect.bisect_left(self.search.visible, offset, 0, self.row_count)
+
+    def match_at_or_after(self, offset):
+        """Index of the first match at or after a byte offset (may be match_count)."""
+        return bisect.bisect_left(self.search.matches, offset, 0, self.match_count)
+
+    def read_rows(self, first, count):
+        """Decoded text of rows [first, first + count) of a filtered view."""
+        last = min(first + count, self.row_count)
+        if first >= last:
+            return ''
+        parts = []
+        with _MappedFile(self.search.path) as data:
+            if data is None:
+                return ''
+            for row in range(first, last):
+                start = self.search.visible[row]
+                part = data[start:min(_line_end(data, start), self.end)]
+                parts.append(part if part.endswith(b'\n') else part + b'\n')
+        return (b''.join(parts).decode(self.search.encoding, errors='replace')
+                .replace('\r\n', '\n'))
@@ -0,0 +1,202 @@
+"""
+Live process monitor for Script Runner Pro.
+
+Shows the process tree of every running script with CPU%, RSS, threads,
+open files and sparklines of recent CPU and memory use, and lets a run or
+a single process be killed, suspended or resumed. /proc is sampled on a
+background thread, and only while the window is shown (see procmon.py).
+"""
+
+import threading
+
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                             QTreeWidget, QTreeWidgetItem, QHeaderView, QMessageBox)
+
+from .procmon import STATE_NAMES, ProcessMonitor, signal_process, sparkline
+from .stats import format_bytes
+
+COLUMNS = ["Process", "PID", "State", "CPU", "RSS", "Threads", "FDs", "CPU history",
+           "RSS history"]
+NUMERIC_COLUMNS = (1, 3, 4, 5, 6)
+
+
+class MonitorThread(QThread):
+    """Samples the engine's running scripts every `interval` seconds until stopped."""
+    samples_ready = pyqtSignal(object, object)
+
+    def __init__(self, engine, interval=1, history=60):
+        super().__init__()
+        self.engine = engine
+        self.interval = max(0.1, interval)
+        self.monitor = ProcessMonitor(history)
+        self.stopped = threading.Event()
+
+    def start_sampling(self):
+        self.stopped.clear()
+        self.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.wait()
+
+    def run(self):
+        while not self.stopped.is_set():
+            runs = {}
+            for run in self.engine.running_runs():
+                # Runs on worker agents have no local process
+                if run.pid is not None:
+                    runs[run.run_id] = run
+            samples = self.monitor.sample({run_id: run.pid for run_id, run in runs.items()})
+            self.samples_ready.emit(runs, samples)
+            self.stopped.wait(self.interval)
+
+
+class ProcessMonitorDialog(QDialog):
+
+    def __init__(self, engine, interval=1, history=60, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self.runs = {}
+        self.items = {}     # ("run", run_id) or (run_id, pid, start_time) -> item
+
+        self.setWindowTitle("Process Monitor")
+        self.resize(900, 450)
+        layout = QVBoxLayout(self)
+
+        self.tree = QTreeWidget()
+        self.tree.setColumnCount(len(COLUMNS))
+        self.tree.setHeaderLabels(COLUMNS)
+        self.tree.header().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.tree.currentItemChanged.connect(self.update_buttons)
+        layout.addWidget(self.tree)
+        self.root = self.tree.invisibleRootItem()
+
+        button_layout = QHBoxLayout()
+        self.summary_label = QLabel()
+        button_layout.addWidget(self.summary_label)
+        button_layout.addStretch()
+        self.kill_btn = QPushButton("⏹ Kill")
+        self.kill_btn.clicked.connect(lambda: self.apply_action("kill"))
+        button_layout.addWidget(self.kill_btn)
+        self.suspend_btn = QPushButton("⏸ Suspend")
+        self.suspend_btn.clicked.connect(lambda: self.apply_action("suspend"))
+        button_layout.addWidget(self.suspend_btn)
+        self.resume_btn = QPushButton("▶ Resume")
+        self.resume_btn.clicked.connect(lambda: self.apply_action("resume"))
+        button_layout.addWidget(self.resume_btn)
+        layout.addLayout(button_layout)
+        self.update_buttons()
+
+        self.thread = MonitorThread(engine, interval, history)
+        self.thread.samples_ready.connect(self.show_samples)
+
+    def showEvent(self, event):
+        if not self.thread.isRunning():
+            self.thread.start_sampling()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        # Nothing is sampled while the window is closed or minimized
+        self.thread.stop()
+        super().hideEvent(event)
+
+    def stop(self):
+        self.thread.stop()
+
+    def show_samples(self, runs, samples):
+        self.runs = runs
+        seen = set()
+        total_cpu = total_rss = processes = 0
+        for run_id, sample in samples.items():
+            run = runs[run_id]
+            run_item = self._item(("run", run_id), self.root, seen)
+            self._fill(run_item, f"{run.name} #{run_id}", run.pid,
+                       "suspended" if run.suspended else "", sample)
+            parents = {}
+            for process in sample["tree"]:
+                parent = parents.get(process["ppid"], run_item)
+                item = self._item((run_id, process["pid"], process["start_time"]), parent, seen)
+                self._fill(item, process["name"], process["pid"],
+                           STATE_NAMES.get(process["state"], process["state"]), process)
+                parents[process["pid"]] = item
+            total_cpu += sample["cpu"]
+            total_rss += sample["rss"]
+            processes += sample["processes"]
+
+        for key in set(self.items) - seen:
+            item = self.items.pop(key)
+            parent = item.parent()
+            (parent if parent is not None else self.root).removeChild(item)
+        self.summary_label.setText(f"{len(samples)} running, {processes} processes, "
+                                   f"{total_cpu:.0f}% CPU, {format_bytes(total_rss)}")
+        self.update_buttons()
+
+    def _item(self, key, parent, seen):
+        seen.add(key)
+        item = self.items.get(key)
+        if item is None:
+            item = QTreeWidgetItem()
+            for column in NUMERIC_COLUMNS:
+                item.setTextAlignment(column, Qt.AlignRight | Qt.AlignVCenter)
+            self.items[key] = item
+        else:
+            current = item.parent()
+            if (current if current is not None else self.root) is parent:
+                return item
+            # The process outlived its parent
+            (current if current is not None else self.root).removeChild(item)
+        parent.addChild(item)
+        item.setExpanded(True)
+        return item
+
+    @staticmethod
+    def _fill(item, name, pid, state, sample):
+        cpu_history = sample["cpu_history"]
+        rss_history = sample["rss_history"]
+        values = [
+            name,
+            str(pid),
+            state,
+            "" if sample["cpu"] is None else f"{sample['cpu']:.0f}%",
+            format_bytes(sample["rss"]),
+            str(sample["threads"]),
+            "" if sample["fds"] is None else str(sample["fds"]),
+            sparkline(cpu_history, max([100] + cpu_history)),
+            sparkline(rss_history),
+        ]
+        for column, value in enumerate(values):
+            item.setText(column, value)
+        item.setToolTip(len(COLUMNS) - 2, f"Last {len(cpu_history)} samples, "
+                                          f"peak {max(cpu_history):.0f}%")
+        item.setToolTip(len(COLUMNS) - 1, f"Last {len(rss_history)} samples, "
+                                          f"peak {format_bytes(max(rss_history))}")
+
+    def selected_key(self):
+        item = self.tree.currentItem()
+        for key, candidate in self.items.items():
+            if candidate is item:
+                return key
+        return None
+
+    def update_buttons(self, *args):
+        enabled = self.selected_key() is not None
+        for button in (self.kill_btn, self.suspend_btn, self.resume_btn):
+            button.setEnabled(enabled)
+
+    def apply_action(self, action):
+        key = self.selected_key()
+        if key is None:
+            return
+        run_id = key[1] if key[0] == "run" else key[0]
+        run = self.runs.get(run_id)
+        if key[0] == "run" or (run is not None and key[1] == run.pid):
+            # The whole run: the engine keeps track of it being stopped or suspended
+            done = {"kill": self.engine.cancel, "suspend": self.engine.suspend,
+                    "resume": self.engine.resume}[action](run_id)
+        else:
+            done = signal_process(key[1], key[2], action)
+        if not done:
+            QMessageBox.warning(self, "Process Monitor",
+                                f"Could not {action} the process: it has exited, or "
+                                f"belongs to another user.")
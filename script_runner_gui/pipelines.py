@@ -0,0 +1,256 @@
+"""
+Script pipelines for Script Runner Pro.
+
+A pipeline is a DAG of catalog scripts. Pipelines live in pipelines.json
+next to the script catalog:
+
+    {
+      "nightly": {
+        "max_parallel": 4,
+        "steps": [
+          {"name": "fetch", "script": "fetch_data"},
+          {"name": "transform", "script": "transform_data", "after": ["fetch"]},
+          {"name": "report", "script": "build_report", "after": ["transform"]}
+        ]
+      }
+    }
+
+"script" defaults to the step name and "after" lists the steps that must
+succeed first. PipelineRun starts every step whose dependencies have
+succeeded, up to max_parallel at a time, and skips everything downstream
+of a failed step. Once finished it reports the critical path: the chain
+of steps that determined the pipeline's wall time.
+"""
+
+import json
+import os
+import threading
+import time
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+STATE_SYMBOLS = {PENDING: "…", RUNNING: "▶", SUCCEEDED: "✔", FAILED: "✘", SKIPPED: "⏭"}
+
+
+def pipelines_path(catalog_path):
+    return os.path.join(os.path.dirname(os.path.abspath(catalog_path)), 'pipelines.json')
+
+
+def load_pipelines(path):
+    """Read pipelines.json; a missing file means no pipelines."""
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def pipeline_steps(pipeline, catalog):
+    """Validate a pipeline; returns {step: (script, [deps])} in dependency order.
+
+    Raises ValueError for unknown scripts or steps and for cycles.
+    """
+    steps = {}
+    for step in pipeline.get('steps') or []:
+        name = step.get('name') or step.get('script')
+        if not name:
+            raise ValueError("Every step needs a name or a script")
+        if name in steps:
+            raise ValueError(f"Duplicate step '{name}'")
+        script = step.get('script') or name
+        if script not in catalog:
+            raise ValueError(f"Step '{name}': no script named '{script}' in the catalog")
+        steps[name] = (script, list(step.get('after') or []))
+    if not steps:
+        raise ValueError("Pipeline has no steps")
+
+    for name, (_, deps) in steps.items():
+        for dep in deps:
+            if dep not in steps:
+                raise ValueError(f"Step '{name}' depends on unknown step '{dep}'")
+
+    # Kahn's algorithm: ordering doubles as the cycle check
+    waiting = {name: len(deps) for name, (_, deps) in steps.items()}
+    dependents = {name: [] for name in steps}
+    for name, (_, deps) in steps.items():
+        for dep in deps:
+            dependents[dep].append(name)
+    ready = [name for name, count in waiting.items() if not count]
+    order = []
+    while ready:
+        name = ready.pop(0)
+        order.append(name)
+        for child in dependents[name]:
+            waiting[child] -= 1
+            if not waiting[child]:
+                ready.append(child)
+    if len(order) != len(steps):
+        cycle = sorted(name for name, count in waiting.items() if count)
+        raise ValueError(f"Dependency cycle between steps: {', '.join(cycle)}")
+    return {name: steps[name] for name in order}
+
+
+class PipelineRun:
+    """Drives one execution of a pipeline.
+
+    submit(step, script) must start the script and return its ScriptRun,
+    or None if it could not be started; step_finished(run) must be called
+    with every run submitted this way.
+    on_change(step, state), if given, is called on every state change. All
+    methods are thread-safe.
+    """
+
+    def __init__(self, name, steps, submit, max_parallel=None, on_change=None):
+        self.name = name
+        self.steps = steps
+        self.submit = submit
+        self.max_parallel = max(1, max_parallel or len(steps))
+        self.on_change = on_change
+        self.states = {step: PENDING for step in steps}
+        self.runs = {}           # step -> ScriptRun
+        self.durations = {}      # step -> seconds
+        self.started_at = None
+        self.ended_at = None
+        self.cancelled = False
+        self.done = threading.Event()
+        self._by_run_id = {}
+        self._lock = threading.RLock()
+        self._dependents = {step: [] for step in steps}
+        for step, (_, deps) in steps.items():
+            for dep in deps:
+                self._dependents[dep].append(step)
+
+    @property
+    def succeeded(self):
+        return all(state == SUCCEEDED for state in self.states.values())
+
+    def owns(self, run_id):
+        return run_id in self._by_run_id
+
+    def start(self):
+        self.started_at = time.time()
+        self._schedule()
+
+    def step_finished(self, run):
+        with self._lock:
+            step = self._by_run_id.get(run.run_id)
+            if step is None:
+                return
+            self.durations[step] = run.duration or 0.0
+            ok = run.exit_code == 0 and not run.cancel_requested
+            self.states[step] = SUCCEEDED if ok else FAILED
+            changes = [(step, self.states[step])]
+            if not ok:
+                changes.extend((skipped, SKIPPED) for skipped in self._skip_downstream(step))
+        self._report(changes)
+        self._schedule()
+
+    def cancel(self, cancel_run):
+        """Skip every step not started yet and cancel the running ones."""
+        with self._lock:
+            self.cancelled = True
+            changes = []
+            for step, state in self.states.items():
+                if state == PENDING:
+                    self.states[step] = SKIPPED
+                    changes.append((step, SKIPPED))
+            running = [self.runs[step].run_id for step, state in self.states.items()
+                       if state == RUNNING]
+        self._report(changes)
+        for run_id in running:
+            cancel_run(run_id)
+        self._check_done()
+
+    def critical_path(self):
+        """Return (steps, seconds) of the longest chain of finished steps."""
+        finish = {}
+        previous = {}
+        for step, (_, deps) in self.steps.items():
+            if step not in self.durations:
+                continue
+            start, before = 0.0, None
+            for dep in deps:
+                if finish.get(dep, 0.0) > start:
+                    start, before = finish[dep], dep
+            finish[step] = start + self.durations[step]
+            previous[step] = before
+        if not finish:
+            return [], 0.0
+        step = max(finish, key=finish.get)
+        total = finish[step]
+        path = []
+        while step is not None:
+            path.append(step)
+            step = previous[step]
+        return path[::-1], total
+
+    def summary(self):
+        """Human readable report, one line per step plus timing totals."""
+        lines = []
+        for step, state in self.states.items():
+            duration = self.durations.get(step)
+            timing = f" ({duration:.2f} s)" if duration is not None else ""
+            lines.append(f"{STATE_SYMBOLS[state]} {step}: {state}{timing}")
+        path, critical = self.critical_path()
+        serial = sum(self.durations.values())
+        if self.started_at and self.ended_at:
+            lines.append(f"Wall time {self.ended_at - self.started_at:.2f} s, "
+                         f"sum of steps {serial:.2f} s")
+        if path:
+            lines.append(f"Critical path {critical:.2f} s: {' → '.join(path)}")
+        return lines
+
+    def _skip_downstream(self, step):
+        # Caller must hold self._lock
+        skipped = []
+        stack = list(self._dependents[step])
+        while stack:
+            child = stack.pop()
+            if self.states[child] == PENDING:
+                self.states[child] = SKIPPED
+                skipped.append(child)
+                stack.extend(self._dependents[child])
+        return skipped
+
+    def _schedule(self):
+        changes = []
+        with self._lock:
+            running = sum(1 for state in self.states.values() if state == RUNNING)
+            for step, (script, deps) in self.steps.items():
+                if running >= self.max_parallel:
+                    break
+                if (self.states[step] != PENDING
+                        or any(self.states[dep] != SUCCEEDED for dep in deps)):
+                    continue
+                # Submitting under the lock: a fast run must not report back
+                # before it is registered
+                run = self.submit(step, script)
+                if run is None:
+                    self.states[step] = FAILED
+                    changes.append((step, FAILED))
+                    changes.extend((skipped, SKIPPED) for skipped in self._skip_downstream(step))
+                    continue
+                self.states[step] = RUNNING
+                self.runs[step] = run
+                self._by_run_id[run.run_id] = step
+                changes.append((step, RUNNING))
+                running += 1
+        self._report(changes)
+        self._check_done()
+
+    def _check_done(self):
+        with self._lock:
+            if self.done.is_set() or any(state in (PENDING, RUNNING)
+                                         for state in self.states.values()):
+                return
+            self.ended_at = time.time()
+            self.done.set()
+
+    def _report(self, changes):
+        if self.on_change is not None:
+            for step, state in changes:
+                self.on_change(step, state)
@@ -0,0 +1,203 @@
+"""
+Process-tree sampling for Script Runner Pro.
+
+ProcessMonitor reads /proc (Linux) to find every process a running script
+has started and how much it uses: CPU%, RSS, thread count and open file
+descriptors. One sample reads each process's stat file once, which is
+enough to build the trees, and lists the fd directory only of processes
+in a tree, so sampling every second stays cheap on a busy machine.
+
+Each process and run keeps its last `history` CPU and RSS values in
+fixed-size ring buffers for sparklines. This module has no Qt dependency.
+"""
+
+import collections
+import os
+import signal
+import time
+
+PROC = '/proc'
+
+# Characters of a sparkline, lowest to highest
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+STATE_NAMES = {'R': "running", 'S': "sleeping", 'D': "disk wait", 'T': "stopped",
+               't': "traced", 'Z': "zombie", 'I': "idle"}
+
+ACTIONS = {"kill": "SIGKILL", "suspend": "SIGSTOP", "resume": "SIGCONT"}
+
+
+def monitor_supported():
+    return os.path.isfile(os.path.join(PROC, 'self', 'stat'))
+
+
+def read_stat(pid):
+    """Return the fields of /proc/<pid>/stat after the command name, and the name.
+
+    Field n of proc(5) is fields[n - 3]. Returns (None, None) for a process
+    that is gone.
+    """
+    try:
+        with open(f'{PROC}/{pid}/stat', 'rb') as file:
+            data = file.read()
+    except OSError:
+        return None, None
+    # The name is in parentheses and may itself contain spaces or ')'
+    start = data.find(b'(')
+    end = data.rfind(b')')
+    if start < 0 or end < 0:
+        return None, None
+    name = data[start + 1:end].decode('utf-8', 'replace')
+    return data[end + 2:].split(), name
+
+
+def count_fds(pid):
+    """Number of open file descriptors, or None if we may not look."""
+    try:
+        return len(os.listdir(f'{PROC}/{pid}/fd'))
+    except OSError:
+        return None
+
+
+def sparkline(values, top=None):
+    """Render values as a row of block characters scaled to top (default: max)."""
+    values = [value or 0 for value in values]
+    if not values:
+        return ''
+    top = top or max(values) or 1
+    last = len(SPARK_CHARS) - 1
+    return ''.join(SPARK_CHARS[min(last, max(0, int(value / top * last + 0.5)))]
+                   for value in values)
+
+
+def signal_process(pid, start_time, action):
+    """Send a process the signal for action ("kill", "suspend" or "resume").
+
+    start_time is the process's start time from its sample; a process that
+    has exited and whose pid was reused is left alone. Returns False if the
+    process is gone or may not be signalled.
+    """
+    fields, _ = read_stat(pid)
+    if fields is None or int(fields[19]) != start_time:
+        return False
+    try:
+        os.kill(pid, getattr(signal, ACTIONS[action]))
+    except OSError:
+        return False
+    return True
+
+
+class ProcessMonitor:
+    """Samples the process trees of running scripts.
+
+    history is the number of samples kept per process and run for sparklines.
+    """
+
+    def __init__(self, history=60):
+        self.history = max(2, history)
+        self.ticks = os.sysconf('SC_CLK_TCK')
+        self.page_size = os.sysconf('SC_PAGE_SIZE')
+        self.last_time = None
+        self.last_cpu = {}      # (pid, start_time) -> CPU ticks at the last sample
+        self.process_history = {}   # (pid, start_time) -> (cpu ring, rss ring)
+        self.run_history = {}       # run id -> (cpu ring, rss ring)
+
+    def _ring(self):
+        return (collections.deque(maxlen=self.history), collections.deque(maxlen=self.history))
+
+    def sample(self, roots):
+        """Sample the trees of roots, a {run_id: pid} dict.
+
+        Returns {run_id: run}, where run is a dict with the totals of the
+        tree ("cpu", "rss", "threads", "fds", "processes"), their
+        "cpu_history" and "rss_history", and "tree": a list of process dicts
+        in depth-first order, each with "depth", "pid", "ppid", "name",
+        "state", "start_time", "cpu" (percent of one CPU, None on the first
+        sample), "rss" (bytes), "threads", "fds" and the two histories.
+        """
+        now = time.monotonic()
+        elapsed = now - self.last_time if self.last_time is not None else None
+        self.last_time = now
+
+        # One pass over /proc: parent links of every process, and sessions,
+        # since a run's own session keeps processes that outlived their parent
+        stats = {}
+        children = collections.defaultdict(list)
+        sessions = collections.defaultdict(list)
+        root_pids = set(roots.values())
+        for entry in os.listdir(PROC):
+            if not entry.isdigit():
+                continue
+            pid = int(entry)
+            fields, name = read_stat(pid)
+            if fields is None:
+                continue
+            stats[pid] = (fields, name)
+            ppid, session = int(fields[1]), int(fields[3])
+            children[ppid].append(pid)
+            if session in root_pids and session != pid:
+                sessions[session].append(pid)
+
+        cpu_seen = {}
+        results = {}
+        for run_id, root in roots.items():
+            if root not in stats:
+                continue
+            tree = []
+            visited = set()
+            self._walk(root, 0, stats, children, visited, tree, elapsed, cpu_seen)
+            for pid in sessions.get(root, ()):
+                if pid not in visited:
+                    # Orphans of the run, listed under its root
+                    self._walk(pid, 1, stats, children, visited, tree, elapsed, cpu_seen)
+            cpu_ring, rss_ring = self.run_history.setdefault(run_id, self._ring())
+            cpu = sum(process["cpu"] or 0 for process in tree)
+            rss = sum(process["rss"] for process in tree)
+            cpu_ring.append(cpu)
+            rss_ring.append(rss)
+            results[run_id] = {
+                "cpu": cpu, "rss": rss,
+                "threads": sum(process["threads"] for process in tree),
+                "fds": sum(process["fds"] or 0 for process in tree),
+                "processes": len(tree),
+                "cpu_history": list(cpu_ring), "rss_history": list(rss_ring),
+                "tree": tree,
+            }
+
+        # Forget processes and runs that are gone
+        self.last_cpu = cpu_seen
+        for key in set(self.process_history) - set(cpu_seen):
+            del self.process_history[key]
+        for run_id in set(self.run_history) - set(results):
+            del self.run_history[run_id]
+        return results
+
+    def _walk(self, pid, depth, stats, children, visited, tree, elapsed, cpu_seen):
+        stack = [(pid, depth)]
+        while stack:
+            pid, depth = stack.pop()
+            if pid in visited or pid not in stats:
+                continue
+            visited.add(pid)
+            fields, name = stats[pid]
+            start_time = int(fields[19])
+            key = (pid, start_time)
+            ticks = int(fields[11]) + int(fields[12])
+            cpu_seen[key] = ticks
+            previous = self.last_cpu.get(key)
+            cpu = None
+            if previous is not None and elapsed:
+                cpu = (ticks - previous) / self.ticks / elapsed * 100
+            cpu_ring, rss_ring = self.process_history.setdefault(key, self._ring())
+            rss = int(fields[21]) * self.page_size
+            cpu_ring.append(cpu or 0)
+            rss_ring.append(rss)
+            tree.append({
+                "depth": depth, "pid": pid, "ppid": int(fields[1]), "name": name,
+                "state": fields[0].decode(), "start_time": start_time, "cpu": cpu,
+                "rss": rss, "threads": int(fields[17]), "fds": count_fds(pid),
+                "cpu_history": list(cpu_ring), "rss_history": list(rss_ring),
+            })
+            # Reversed so children come off the stack in pid order
+            for child in reversed(sorted(children.get(pid, ()))):
+                stack.append((child, depth + 1))
@@ -0,0 +1,77 @@
+"""
+Startup profiling for Script Runner Pro.
+
+Run the GUI with --profile-startup to print how long each startup phase
+took, measured from the moment main() was entered. Use
+--profile-startup=PATH to also write the numbers to a JSON file so they can
+be compared between versions.
+"""
+
+import json
+import sys
+import time
+
+FLAG = "--profile-startup"
+
+
+class StartupProfiler:
+    """Records named startup phases and reports how long each took."""
+
+    def __init__(self, enabled=False, output_path=None):
+        self.enabled = enabled
+        self.output_path = output_path
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.phases = []
+        self.notes = {}
+
+    @classmethod
+    def from_argv(cls, argv):
+        """Build a profiler from argv, removing the profiling flag from it."""
+        for i, arg in enumerate(argv):
+            if arg == FLAG or arg.startswith(FLAG + "="):
+                del argv[i]
+                return cls(enabled=True, output_path=arg.partition("=")[2] or None)
+        return cls()
+
+    def mark(self, phase):
+        """Close the current phase under the given name."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last, now - self.start))
+        self.last = now
+
+    def note(self, key, value):
+        self.notes[key] = value
+
+    def elapsed(self, phase):
+        """Seconds from start until phase ended, or None if not reached."""
+        for name, _, total in self.phases:
+            if name == phase:
+                return total
+        return None
+
+    def report(self, stream=None):
+        if not self.enabled:
+            return
+        stream = stream or sys.stderr
+        stream.write("Startup profile (ms):\n")
+        for phase, duration, total in self.phases:
+            stream.write(f"  {phase:<20} {duration * 1000:9.1f} {total * 1000:9.1f}\n")
+        for key, value in self.notes.items():
+            stream.write(f"  {key}: {value}\n")
+        first_paint = self.elapsed("first paint")
+        if first_paint is not None:
+            stream.write(f"  time to first paint: {first_paint * 1000:.1f} ms\n")
+        stream.flush()
+
+        if self.output_path:
+            with open(self.output_path, 'w', encoding='utf-8') as file:
+                json.dump({
+                    "phases": [{"phase": phase, "duration_ms": duration * 1000,
+                                "elapsed_ms": total * 1000}
+                               for phase, duration, total in self.phases],
+                    "time_to_first_paint_ms": None if first_paint is None else first_paint * 1000,
+                    "notes": self.notes,
+                }, file, indent=2)
@@ -0,0 +1,454 @@
+"""
+Remote worker agents for Script Runner Pro.
+
+An agent (agent.py, started with "python -m script_runner_gui agent") runs
+catalog scripts on its machine for any number of consoles. A RemotePool
+connects an ExecutionEngine to a set of agents and places each run on the
+agent with the most free slots, preferring the less loaded machine when
+they tie.
+
+Agents and consoles talk over TCP in frames: a 9 byte header (kind,
+channel, payload length) followed by the payload. Control frames carry
+JSON; output frames carry the raw bytes the script wrote, so the console's
+log and decoders see exactly what a local run would have produced. Flow
+control is TCP's own: when a console reads slowly, the agent's send buffer
+fills up and it stops reading the pipes of that console's runs, which in
+turn blocks the scripts.
+
+The agent builds each command with its own interpreters and environment
+(plus the entry's env overrides) from the catalog entry, so the scripts'
+paths must be valid on the agent too, e.g. a shared checkout. The token is
+sent in the clear: keep agents on a trusted network or behind a tunnel.
+"""
+
+import asyncio
+import itertools
+import json
+import struct
+
+PROTOCOL_VERSION = 1
+DEFAULT_PORT = 7800
+
+# Frame kinds
+HELLO = 1       # console -> agent: {"protocol", "token"}
+WELCOME = 2     # agent -> console: {"protocol", "host", "slots", "cpus"}
+STATUS = 3      # agent -> console: {"slots", "free", "running", "queued", "load", "received"}
+RUN = 4         # console -> agent, per channel: {"name", "job"}
+STDOUT = 5      # agent -> console, per channel: raw output bytes
+STDERR = 6
+EXIT = 7        # agent -> console, per channel: {"exit_code", "timed_out", "cpu_user", ...}
+CANCEL = 8      # console -> agent, per channel
+ERROR = 9       # either way: {"message"}; channel 0 means the connection
+
+HEADER = struct.Struct('!BII')
+MAX_PAYLOAD = 16 * 1024 * 1024
+
+DOWN = "down"
+CONNECTING = "connecting"
+UP = "up"
+
+# Seconds allowed for connecting and the handshake, and between reconnection attempts
+CONNECT_TIMEOUT = 10
+RECONNECT_DELAY = 5
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def parse_address(address):
+    """Split "host:port" (or "[v6 address]:port", or just a host) into (host, port)."""
+    address = address.strip()
+    if address.startswith('['):
+        host, _, rest = address[1:].partition(']')
+        port = rest[1:] if rest.startswith(':') else ''
+    elif address.count(':') == 1:
+        host, _, port = address.partition(':')
+    else:
+        host, port = address, ''
+    if not host:
+        raise ValueError(f"Invalid agent address '{address}'")
+    try:
+        return host, int(port) if port else DEFAULT_PORT
+    except ValueError:
+        raise ValueError(f"Invalid port in agent address '{address}'") from None
+
+
+def write_frame(transport, kind, channel=0, payload=b''):
+    # Header and payload are written separately so output isn't copied
+    transport.write(HEADER.pack(kind, channel, len(payload)))
+    if payload:
+        transport.write(payload)
+
+
+def write_message(transport, kind, channel=0, message=None):
+    write_frame(transport, kind, channel, json.dumps(message or {}).encode())
+
+
+class FrameDecoder:
+    """Splits a byte stream into (kind, channel, payload) frames."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """Return the frames completed by data; raises ProtocolError on garbage."""
+        buffer = self.buffer
+        buffer += data
+        frames = []
+        position = 0
+        while len(buffer) - position >= HEADER.size:
+            kind, channel, length = HEADER.unpack_from(buffer, position)
+            if length > MAX_PAYLOAD:
+                raise ProtocolError(f"Frame of {length} bytes exceeds the limit")
+            end = position + HEADER.size + length
+            if len(buffer) < end:
+                break
+            frames.append((kind, channel, bytes(buffer[position + HEADER.size:end])))
+            position = end
+        del buffer[:position]
+        return frames
+
+
+def decode_message(payload):
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        raise ProtocolError("Malformed control frame") from None
+    if not isinstance(message, dict):
+        raise ProtocolError("Malformed control frame")
+    return message
+
+
+class _RemoteProcess:
+    """Stands in for the child process of a run placed on an agent."""
+
+    returncode = None
+
+    def __init__(self, agent, channel):
+        self.agent = agent
+        self.channel = channel
+
+    def terminate(self):
+        self.agent.send(CANCEL, self.channel)
+
+    # The agent escalates to SIGKILL itself
+    kill = terminate
+
+
+class _Channel:
+    def __init__(self, run, sink, done):
+        self.run = run
+        self.sink = sink
+        self.done = done
+
+
+class _Agent(asyncio.Protocol):
+    """The console's connection to one agent, re-established when it drops."""
+
+    STREAMS = {STDOUT: "stdout", STDERR: "stderr"}
+
+    def __init__(self, pool, address):
+        self.pool = pool
+        self.address = address
+        self.host, self.port = parse_address(address)
+        self.state = DOWN
+        self.error = None
+        self.transport = None
+        self.decoder = None
+        self.welcome = None
+        self.connecting = None
+        self.retry = None
+        self.closed = False
+        self.channels = {}
+        self.channel_ids = itertools.count(1)
+        self.unsent = set()     # ids of runs placed here but not sent yet
+        self.sent = 0           # RUN frames sent on this connection
+        self.slots = 0
+        self.cpus = 1
+        self.free = 0
+        self.load = 0.0
+        self.received = 0
+
+    @property
+    def available(self):
+        """Free slots, less the runs this console placed that the agent hasn't counted yet."""
+        return self.free - (self.sent - self.received) - len(self.unsent)
+
+    @property
+    def load_per_cpu(self):
+        return self.load / max(1, self.cpus)
+
+    async def connect(self):
+        """Connect unless connected; raises ConnectionError if the agent can't be reached."""
+        if self.state == UP:
+            return
+        if self.closed:
+            raise ConnectionError(f"Agent {self.address} was removed")
+        self.start_connecting()
+        await asyncio.shield(self.connecting)
+
+    def start_connecting(self):
+        if self.connecting is None and not self.closed:
+            # Counted as connecting from now on, so runs wait for the outcome
+            self.state = CONNECTING
+            self.connecting = self.pool.loop.create_task(self._connect())
+            # Failures of background attempts are only recorded in self.error
+            self.connecting.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    def connect_later(self, delay):
+        if self.closed or self.retry is not None:
+            return
+        self.retry = self.pool.loop.call_later(delay, self._reconnect)
+
+    def _reconnect(self):
+        self.retry = None
+        if self.state == DOWN:
+            self.start_connecting()
+
+    async def _connect(self):
+        loop = self.pool.loop
+        self.welcome = loop.create_future()
+        try:
+            await asyncio.wait_for(loop.create_connection(lambda: self, self.host, self.port),
+                                   CONNECT_TIMEOUT)
+            write_message(self.transport, HELLO, 0,
+                          {"protocol": PROTOCOL_VERSION, "token": self.pool.token or ''})
+            await asyncio.wait_for(asyncio.shield(self.welcome), CONNECT_TIMEOUT)
+        except (OSError, asyncio.TimeoutError, ProtocolError) as e:
+            self.error = str(e) or "timed out"
+            self.state = DOWN
+            if not self.welcome.done():
+                self.welcome.cancel()
+            if self.transport is not None:
+                self.transport.abort()
+            self.connect_later(RECONNECT_DELAY)
+            self.pool.capacity_changed()
+            raise ConnectionError(f"Agent {self.address} is unreachable: {self.error}") from None
+        finally:
+            self.connecting = None
+        self.state = UP
+        self.error = None
+        self.pool.capacity_changed()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.error = None
+        self.decoder = FrameDecoder()
+        self.sent = 0
+        self.received = 0
+
+    def data_received(self, data):
+        try:
+            for kind, channel, payload in self.decoder.feed(data):
+                self._handle(kind, channel, payload)
+        except ProtocolError as e:
+            self.error = str(e)
+            self.transport.abort()
+
+    def connection_lost(self, exc):
+        self.transport = None
+        if self.welcome is not None and not self.welcome.done():
+            self.welcome.set_exception(ConnectionError(
+                self.error or str(exc or "connection closed by the agent")))
+        was_up = self.state == UP
+        self.state = DOWN
+        if exc is not None or self.error is None:
+            self.error = str(exc) if exc else "connection closed by the agent"
+        channels, self.channels = self.channels, {}
+        for channel in channels.values():
+            if not channel.done.done():
+                if self.closed:
+                    channel.done.set_result({"exit_code": -1})
+                else:
+                    channel.done.set_exception(ConnectionError(
+                        f"Lost connection to agent {self.address}: {self.error}"))
+        if was_up:
+            self.connect_later(RECONNECT_DELAY)
+            self.pool.capacity_changed()
+
+    def _handle(self, kind, channel, payload):
+        if kind == STDOUT or kind == STDERR:
+            target = self.channels.get(channel)
+            if target is not None:
+                target.sink.feed(self.STREAMS[kind], payload)
+        elif kind == EXIT:
+            target = self.channels.pop(channel, None)
+            if target is not None and not target.done.done():
+                target.done.set_result(decode_message(payload))
+        elif kind == STATUS:
+            message = decode_message(payload)
+            self.slots = message.get("slots", self.slots)
+            self.free = message.get("free", self.free)
+            self.load = message.get("load") or 0.0
+            self.received = message.get("received", self.received)
+            self.pool.capacity_changed()
+        elif kind == WELCOME:
+            message = decode_message(payload)
+            if message.get("protocol") != PROTOCOL_VERSION:
+                raise ProtocolError(f"Agent speaks protocol {message.get('protocol')}, "
+                                    f"expected {PROTOCOL_VERSION}")
+            self.slots = self.free = message.get("slots", 1)
+            self.cpus = message.get("cpus") or 1
+            if not self.welcome.done():
+                self.welcome.set_result(message)
+        elif kind == ERROR:
+            text = decode_message(payload).get("message", "Agent error")
+            target = self.channels.pop(channel, None) if channel else None
+            if target is not None:
+                if not target.done.done():
+                    target.done.set_exception(RuntimeError(text))
+            elif self.welcome is not None and not self.welcome.done():
+                self.welcome.set_exception(ProtocolError(text))
+            else:
+                raise ProtocolError(text)
+        else:
+            raise ProtocolError(f"Unknown frame kind {kind}")
+
+    def send(self, kind, channel=0, message=None):
+        if self.transport is not None and not self.transport.is_closing():
+            if message is None:
+                write_frame(self.transport, kind, channel)
+            else:
+                write_message(self.transport, kind, channel, message)
+
+    def start_run(self, run, sink):
+        """Send a run to the agent; returns a future for its EXIT message."""
+        channel = next(self.channel_ids)
+        done = self.pool.loop.create_future()
+        self.channels[channel] = _Channel(run, sink, done)
+        self.send(RUN, channel, {"name": run.name, "job": run.remote})
+        self.sent += 1
+        run.process = _RemoteProcess(self, channel)
+        return done
+
+    def close(self):
+        self.closed = True
+        if self.retry is not None:
+            self.retry.cancel()
+            self.retry = None
+        if self.transport is not None:
+            self.transport.close()
+
+
+def _valid_addresses(addresses):
+    addresses = [address.strip() for address in addresses if address.strip()]
+    for address in addresses:
+        parse_address(address)
+    return addresses
+
+
+class RemotePool:
+    """Places runs on a set of worker agents (see agent.py).
+
+    addresses are "host:port" strings. Runs the ExecutionEngine submits
+    with remote=... wait until some agent has a free slot; if no agent can
+    be reached at all they fail with the reason instead of waiting forever.
+    """
+
+    def __init__(self, addresses=(), token=None):
+        self.addresses = _valid_addresses(addresses)
+        self.token = token
+        self.loop = None
+        self.on_capacity = None
+        self.agents = {}
+        self.placed = {}    # run id -> _Agent
+
+    @property
+    def enabled(self):
+        return bool(self.addresses)
+
+    def start(self, loop, on_capacity=None):
+        """Attach to the engine's loop and connect to the agents.
+
+        on_capacity() is called on the loop whenever an agent may have
+        freed slots, so the engine can place waiting runs.
+        """
+        self.loop = loop
+        self.on_capacity = on_capacity
+        loop.call_soon_threadsafe(self._set_agents, list(self.addresses))
+
+    def set_agents(self, addresses):
+        """Replace the set of agents; may be called from any thread.
+
+        Raises ValueError for a malformed address.
+        """
+        self.addresses = _valid_addresses(addresses)
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._set_agents, list(self.addresses))
+
+    def summary(self):
+        """E.g. "2 of 3 agents up, 14 free slots"."""
+        agents = list(self.agents.values())
+        up = [agent for agent in agents if agent.state == UP]
+        free = sum(max(0, agent.available) for agent in up)
+        return f"{len(up)} of {len(agents)} agents up, {free} free slots"
+
+    def agent_states(self):
+        """[(address, state, error)] for every configured agent."""
+        return [(agent.address, agent.state, agent.error) for agent in list(self.agents.values())]
+
+    def place(self, run):
+        """Reserve a slot for run on the best agent; False to keep it waiting.
+
+        Called by the engine on the loop, with its lock held.
+        """
+        agents = list(self.agents.values())
+        ready = [agent for agent in agents if agent.state == UP and agent.available > 0]
+        if ready:
+            agent = max(ready, key=lambda agent: (agent.available, -agent.load_per_cpu))
+        elif any(agent.state != DOWN for agent in agents):
+            return False
+        elif agents:
+            # Nothing is reachable: let the run try to reconnect and fail with the reason
+            agent = min(agents, key=lambda agent: len(agent.unsent))
+        else:
+            agent = None
+        run.agent = agent.address if agent is not None else ''
+        self.placed[run.run_id] = agent
+        if agent is not None:
+            agent.unsent.add(run.run_id)
+        return True
+
+    async def run(self, run, sink):
+        """Execute a placed run on its agent; returns the exit code."""
+        agent = self.placed.get(run.run_id)
+        if agent is None:
+            raise ConnectionError("No remote agents are configured")
+        await agent.connect()
+        agent.unsent.discard(run.run_id)
+        done = agent.start_run(run, sink)
+        if run.cancel_requested:
+            run.process.terminate()
+        result = await done
+        run.cpu_user = result.get("cpu_user")
+        run.cpu_system = result.get("cpu_system")
+        run.max_rss = result.get("max_rss")
+        run.timed_out = bool(result.get("timed_out"))
+        return result.get("exit_code", -1)
+
+    def release(self, run):
+        """Forget a finished run's placement (on the loop)."""
+        agent = self.placed.pop(run.run_id, None)
+        if agent is not None:
+            agent.unsent.discard(run.run_id)
+
+    def capacity_changed(self):
+        if self.on_capacity is not None:
+            self.on_capacity()
+
+    def close(self):
+        """Disconnect from every agent; must be called on the pool's loop."""
+        for agent in self.agents.values():
+            agent.close()
+        self.agents = {}
+
+    def _set_agents(self, addresses):
+        for address in list(self.agents):
+            if address not in addresses:
+                self.agents.pop(address).close()
+        for address in addresses:
+            if address not in self.agents:
+                agent = self.agents[address] = _Agent(self, address)
+                agent.start_connecting()
+        self.capacity_changed()
@@ -0,0 +1,133 @@
+"""
+Per-run output logs for Script Runner Pro.
+
+The engine spills every byte a script prints to a log file on disk, so the
+output console only has to keep the tail in memory. LogPager reads older
+pages back from that file through a memory map, which costs no more memory
+than the page being shown however large the log grows.
+"""
+
+import codecs
+import locale
+import mmap
+import os
+import re
+import time
+
+
+def output_encoding(preferred=None):
+    """Encoding used to decode child output (preferred, else the locale's)."""
+    if preferred:
+        try:
+            return codecs.lookup(preferred).name
+        except LookupError:
+            pass
+    return locale.getpreferredencoding(False)
+
+
+def safe_log_name(name):
+    """The form of a script name used in its log file names."""
+    return re.sub(r'[^\w.-]+', '_', name)[:50]
+
+
+def new_log_path(log_dir, run_id, name):
+    filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{run_id}-{safe_log_name(name)}.log"
+    return os.path.join(log_dir, filename)
+
+
+def prune_logs(log_dir, keep):
+    """Delete all but the newest `keep` log files in log_dir."""
+    try:
+        entries = [entry for entry in os.scandir(log_dir)
+                   if entry.is_file() and entry.name.endswith('.log')]
+    except OSError:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in entries[keep:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+class LogPager:
+    """Reads whole lines from a (possibly still growing) log file.
+
+    Offsets are byte positions in the file. Each call maps the file as it
+    is at that moment, so pages can be read while the run is writing.
+    """
+
+    def __init__(self, path, encoding=None):
+        self.path = path
+        self.encoding = encoding or output_encoding()
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def read_before(self, end, max_lines):
+        """Return (start, text) for up to max_lines lines ending at `end`."""
+        with self._map() as data:
+            if data is None:
+                return 0, ''
+            end = min(end, len(data))
+            start = end
+            # The newline that terminates the last line doesn't start a new one
+            if start and data[start - 1:start] == b'\n':
+                start -= 1
+            for _ in range(max_lines):
+                newline = data.rfind(b'\n', 0, start)
+                if newline < 0:
+                    start = 0
+                    break
+                start = newline
+            else:
+                start += 1
+            return start, self._decode(data[start:end])
+
+    def read_after(self, begin, max_lines):
+        """Return (end, text) for up to max_lines lines starting at `begin`."""
+        with self._map() as data:
+            if data is None:
+                return begin, ''
+            end = min(begin, len(data))
+            for _ in range(max_lines):
+                newline = data.find(b'\n', end)
+                if newline < 0:
+                    end = len(data)
+                    break
+                end = newline + 1
+            return end, self._decode(data[begin:end])
+
+    def _decode(self, raw):
+        return raw.decode(self.encoding, errors='replace').replace('\r\n', '\n')
+
+    def _map(self):
+        return _MappedFile(self.path)
+
+
+class _MappedFile:
+    """Context manager yielding a read-only mmap, or None for empty files."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.map = None
+
+    def __enter__(self):
+        try:
+            self.file = open(self.path, 'rb')
+            if os.fstat(self.file.fileno()).st_size:
+                self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            pass
+        return self.map
+
+    def __exit__(self, *exc_info):
+        if self.map is not None:
+            self.map.close()
+        if self.file is not None:
+            self.file.close()
+        return False
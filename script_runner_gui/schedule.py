@@ -0,0 +1,365 @@
+"""
+Scheduled runs for Script Runner Pro.
+
+A catalog entry may carry a schedule:
+
+    "schedule": {"cron": "*/15 8-18 * * mon-fri", "overlap": "skip", "catch_up": "once"}
+    "schedule": {"interval": 600}
+
+Cron expressions have the usual five fields (minute hour day-of-month
+month day-of-week) with lists, ranges, steps and month/day names, plus the
+@hourly/@daily/@weekly/@monthly/@yearly shortcuts. Times are local.
+
+overlap decides what happens when a schedule fires while its previous run
+is still going: "skip" it (default), "queue" it until that run ends, or
+start it in "parallel". catch_up decides what happens to fire times missed
+while Script Runner was not running: "skip" them (default), run "once", or
+run "all" of them (at most MAX_CATCH_UP).
+
+Scheduler keeps the next fire time of every schedule in a min-heap, so a
+front end needs a single timer set to next_fire_time() however many
+schedules there are.
+"""
+
+import collections
+import datetime
+import heapq
+import json
+import re
+import threading
+import time
+
+from .store import atomic_write_text
+
+OVERLAP_POLICIES = ["skip", "queue", "parallel"]
+CATCH_UP_POLICIES = ["skip", "once", "all"]
+
+# Most missed fire times replayed for a schedule with catch_up "all"
+MAX_CATCH_UP = 100
+# Most fires held back by overlap "queue" while a run is still going
+MAX_QUEUED = 10
+
+CRON_SHORTCUTS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+MONTH_NAMES = {name: number for number, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1)}
+DAY_NAMES = {name: number for number, name in enumerate(
+    ["sun", "mon", "tue", "wed", "thu", "fri", "sat"])}
+
+INTERVAL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+class CronExpression:
+    """A parsed five-field cron expression."""
+
+    # (low, high, names) per field
+    FIELDS = [(0, 59, None), (0, 23, None), (1, 31, None), (1, 12, MONTH_NAMES), (0, 7, DAY_NAMES)]
+
+    def __init__(self, text):
+        self.text = text
+        fields = CRON_SHORTCUTS.get(text.strip().lower(), text).split()
+        if len(fields) != 5:
+            raise ValueError(f"Expected 5 cron fields, got {len(fields)}: '{text}'")
+        parsed = [self._parse_field(field, *spec) for field, spec in zip(fields, self.FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        # 0 and 7 both mean Sunday; datetime.weekday() has Monday = 0
+        self.weekdays = {(day - 1) % 7 for day in weekdays}
+        # Standard cron: if both day fields are restricted, either may match.
+        # Like cron, a field starting with * (*/2 too) counts as unrestricted
+        self.any_day = fields[2].startswith('*')
+        self.any_weekday = fields[4].startswith('*')
+
+    @staticmethod
+    def _parse_field(field, low, high, names):
+        values = set()
+        for part in field.lower().split(','):
+            range_part, _, step = part.partition('/')
+            if range_part == '*':
+                start, end = low, high
+            else:
+                start_text, _, end_text = range_part.partition('-')
+                start = CronExpression._value(start_text, names)
+                end = CronExpression._value(end_text, names) if end_text else (
+                    high if step else start)
+            step = int(step) if step else 1
+            if not (low <= start <= high and low <= end <= high) or start > end or step < 1:
+                raise ValueError(f"Invalid cron field '{field}'")
+            values.update(range(start, end + 1, step))
+        return values
+
+    @staticmethod
+    def _value(text, names):
+        if names and text in names:
+            return names[text]
+        if not text.isdigit():
+            raise ValueError(f"Invalid cron value '{text}'")
+        return int(text)
+
+    def _day_matches(self, moment):
+        day_ok = moment.day in self.days
+        weekday_ok = moment.weekday() in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, timestamp):
+        """First matching time strictly after timestamp, as a timestamp."""
+        moment = datetime.datetime.fromtimestamp(timestamp).replace(second=0, microsecond=0)
+        moment += datetime.timedelta(minutes=1)
+        limit = moment + datetime.timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                year, month = divmod(moment.month, 12)
+                moment = moment.replace(year=moment.year + year, month=month + 1, day=1,
+                                        hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = (moment + datetime.timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + datetime.timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += datetime.timedelta(minutes=1)
+            else:
+                return moment.timestamp()
+        raise ValueError(f"Cron expression '{self.text}' never fires")
+
+
+class Interval:
+    """Fires every `seconds` seconds."""
+
+    def __init__(self, seconds):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.seconds = seconds
+
+    def next_after(self, timestamp):
+        return timestamp + self.seconds
+
+
+def make_trigger(spec):
+    if spec.get("cron"):
+        return CronExpression(spec["cron"])
+    if spec.get("interval"):
+        return Interval(float(spec["interval"]))
+    raise ValueError("Schedule needs a cron expression or an interval")
+
+
+def parse_schedule_text(text):
+    """Turn "*/5 * * * *", "@daily" or "every 10m" into a schedule spec
+    (without policies). Raises ValueError if the text is not valid."""
+    text = text.strip()
+    match = re.fullmatch(r'every\s+(\d+(?:\.\d+)?)\s*([smhd]?)', text, re.IGNORECASE)
+    if match:
+        seconds = float(match.group(1)) * INTERVAL_UNITS[match.group(2).lower() or 's']
+        Interval(seconds)
+        return {"interval": seconds}
+    CronExpression(text)
+    return {"cron": text}
+
+
+def format_schedule_text(spec):
+    if not spec:
+        return ''
+    if spec.get("cron"):
+        return spec["cron"]
+    seconds = spec.get("interval") or 0
+    for unit in ("d", "h", "m"):
+        if seconds >= INTERVAL_UNITS[unit] and seconds % INTERVAL_UNITS[unit] == 0:
+            return f"every {int(seconds // INTERVAL_UNITS[unit])}{unit}"
+    return f"every {seconds:g}s"
+
+
+def load_schedules(scheduler, catalog):
+    """Add the schedule of every catalog entry that has one.
+
+    Returns [(name, error message)] for entries whose schedule is invalid.
+    """
+    invalid = []
+    for name, info in catalog.items():
+        if info.get('schedule'):
+            try:
+                scheduler.set(name, info['schedule'])
+            except ValueError as e:
+                invalid.append((name, str(e)))
+    return invalid
+
+
+class Scheduler:
+    """Next fire times of all schedules, plus their overlap bookkeeping.
+
+    Schedules are identified by catalog name. state_path, if given, keeps
+    the last fire time of every schedule across restarts for catch-up.
+    """
+
+    def __init__(self, state_path=None):
+        self.state_path = state_path
+        self.last_fired = {}
+        self._heap = []          # (fire time, version, name)
+        self._schedules = {}     # name -> (spec, trigger, version)
+        self._versions = 0
+        self._active = {}        # name -> set of run ids
+        self._run_names = {}     # run id -> name
+        self._queued = {}        # name -> runs waiting for the active one
+        self._lock = threading.RLock()
+        if state_path:
+            try:
+                with open(state_path, 'r', encoding='utf-8') as file:
+                    self.last_fired = json.load(file)
+            except (OSError, ValueError):
+                pass
+
+    def save_state(self):
+        if self.state_path:
+            with self._lock:
+                text = json.dumps(self.last_fired)
+            atomic_write_text(self.state_path, text)
+
+    def set(self, name, spec, now=None):
+        """Add or replace the schedule of a catalog entry (None removes it)."""
+        if not spec or spec.get("enabled") is False:
+            self.remove(name)
+            return
+        trigger = make_trigger(spec)
+        now = time.time() if now is None else now
+        with self._lock:
+            self._versions += 1
+            self._schedules[name] = (spec, trigger, self._versions)
+            heapq.heappush(self._heap, (self._first_fire(name, spec, trigger, now),
+                                        self._versions, name))
+
+    def remove(self, name):
+        # Stale heap entries are dropped lazily when they reach the top
+        with self._lock:
+            self._schedules.pop(name, None)
+            self._queued.pop(name, None)
+
+    def rename(self, old_name, new_name):
+        with self._lock:
+            entry = self._schedules.get(old_name)
+            if old_name in self.last_fired:
+                self.last_fired[new_name] = self.last_fired.pop(old_name)
+            if old_name in self._active:
+                self._active[new_name] = self._active.pop(old_name)
+                for run_id in self._active[new_name]:
+                    self._run_names[run_id] = new_name
+            if entry is not None:
+                self.remove(old_name)
+                self.set(new_name, entry[0])
+
+    def next_fire_time(self):
+        """Earliest pending fire time, or None if nothing is scheduled."""
+        with self._lock:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def upcoming(self):
+        """[(next fire time, name, spec)] for every schedule, soonest first."""
+        with self._lock:
+            current = [(fire, name) for fire, version, name in self._heap
+                       if name in self._schedules and self._schedules[name][2] == version]
+            return [(fire, name, self._schedules[name][0]) for fire, name in sorted(current)]
+
+    def dispatch(self, submit, now=None):
+        """Fire every due schedule through submit(name).
+
+        submit must start a run and return its ScriptRun, or None if it
+        could not. Returns the names that were started.
+        """
+        now = time.time() if now is None else now
+        started = []
+        with self._lock:
+            while True:
+                self._drop_stale()
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                fire, version, name = heapq.heappop(self._heap)
+                spec, trigger, _ = self._schedules[name]
+                self.last_fired[name] = fire
+                if spec.get("catch_up") == "all":
+                    next_fire = trigger.next_after(fire)
+                else:
+                    # Don't replay fires missed while we were busy or asleep
+                    next_fire = trigger.next_after(max(fire, now))
+                heapq.heappush(self._heap, (next_fire, version, name))
+
+                if self._active.get(name):
+                    overlap = spec.get("overlap", "skip")
+                    if overlap == "skip":
+                        continue
+                    if overlap == "queue":
+                        self._queued[name] = min(self._queued.get(name, 0) + 1, MAX_QUEUED)
+                        continue
+                if self._start(name, submit):
+                    started.append(name)
+        return started
+
+    def run_finished(self, run_id, submit):
+        """Note the end of a run; starts a queued run of the same schedule.
+
+        Returns the name of the schedule the run belonged to, if any.
+        """
+        with self._lock:
+            name = self._run_names.pop(run_id, None)
+            if name is None:
+                return None
+            self._active.get(name, set()).discard(run_id)
+            if self._queued.get(name) and not self._active.get(name):
+                self._queued[name] -= 1
+                self._start(name, submit)
+            return name
+
+    def _start(self, name, submit):
+        run = submit(name)
+        if run is None:
+            return False
+        self._active.setdefault(name, set()).add(run.run_id)
+        self._run_names[run.run_id] = name
+        return True
+
+    def _first_fire(self, name, spec, trigger, now):
+        last = self.last_fired.get(name)
+        if last is None:
+            return trigger.next_after(now)
+        missed = trigger.next_after(last)
+        if missed > now:
+            return missed
+        catch_up = spec.get("catch_up", "skip")
+        if catch_up == "once":
+            return now
+        if catch_up == "all":
+            # dispatch() replays the missed fires one after another; start
+            # from the oldest of the last MAX_CATCH_UP
+            if isinstance(trigger, Interval):
+                behind = int((now - missed) // trigger.seconds) + 1 - MAX_CATCH_UP
+                return missed + max(0, behind) * trigger.seconds
+            # Cron times don't depend on where the search starts, so look back
+            # from now in growing windows instead of walking the whole downtime
+            recent = collections.deque(maxlen=MAX_CATCH_UP)
+            span = 3600
+            while True:
+                start = max(last, now - span)
+                recent.clear()
+                fire = trigger.next_after(start)
+                while fire <= now:
+                    recent.append(fire)
+                    fire = trigger.next_after(fire)
+                if len(recent) == MAX_CATCH_UP or start == last:
+                    return recent[0]
+                span *= 8
+        return trigger.next_after(now)
+
+    def _drop_stale(self):
+        # Caller must hold self._lock
+        while self._heap:
+            _, version, name = self._heap[0]
+            entry = self._schedules.get(name)
+            if entry is not None and entry[2] == version:
+                return
+            heapq.heappop(self._heap)
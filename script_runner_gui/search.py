@@ -0,0 +1,183 @@
+"""
+Fuzzy catalog search for Script Runner Pro.
+
+SearchIndex keeps a trigram inverted index over each script's name,
+category, type and path (and optionally the first part of the script file
+itself). The index is updated incrementally as scripts are added, edited,
+renamed or deleted, so a query only touches the posting lists of its own
+trigrams instead of scanning the whole catalog.
+"""
+
+import heapq
+import threading
+
+# Only this much of a script file is indexed when content search is enabled
+MAX_CONTENT_BYTES = 64 * 1024
+
+# Share of a query's trigrams a result may miss and still match (typos)
+MISS_RATIO = 0.25
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def read_script_text(path):
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as file:
+            return file.read(MAX_CONTENT_BYTES)
+    except OSError:
+        return ''
+
+
+class SearchIndex:
+    """Trigram index mapping catalog entries to ranked fuzzy matches.
+
+    All methods are thread-safe, so queries can run off the GUI thread
+    while the catalog is being edited.
+    """
+
+    def __init__(self, index_contents=False):
+        self.index_contents = index_contents
+        self._lock = threading.Lock()
+        self._ids = {}        # name -> doc id
+        self._docs = {}       # doc id -> (name, lowered name, lowered fields, trigrams)
+        self._names = {}      # doc id -> lowered name
+        self._order = {}      # doc id -> tie-break sort key (shorter names first)
+        self._postings = {}   # trigram -> set of doc ids
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._ids)
+
+    def rebuild(self, catalog):
+        """Replace the index contents with every entry of catalog."""
+        with self._lock:
+            self._ids.clear()
+            self._docs.clear()
+            self._names.clear()
+            self._order.clear()
+            self._postings.clear()
+        for name, info in list(catalog.items()):
+            self.add(name, info)
+
+    def add(self, name, info):
+        """Index a script, replacing any previous entry with the same name."""
+        fields = ' '.join(str(info.get(field) or '')
+                          for field in ('category', 'type', 'path')).lower()
+        if self.index_contents and info.get('path'):
+            fields += ' ' + read_script_text(info['path']).lower()
+        lowered = name.lower()
+        grams = trigrams(lowered) | trigrams(fields)
+
+        with self._lock:
+            self._remove(name)
+            doc_id = self._next_id
+            self._next_id += 1
+            self._ids[name] = doc_id
+            self._docs[doc_id] = (name, lowered, fields, grams)
+            self._names[doc_id] = lowered
+            self._order[doc_id] = (len(lowered), lowered)
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(doc_id)
+
+    def remove(self, name):
+        with self._lock:
+            self._remove(name)
+
+    def rename(self, old_name, new_name, info):
+        with self._lock:
+            self._remove(old_name)
+        self.add(new_name, info)
+
+    def search(self, query, limit=None):
+        """Return names matching every word of query, best match first.
+
+        Words of three or more characters are looked up through the
+        trigram index; if a word has no exact match, entries sharing most
+        of its trigrams are accepted instead so small typos still match.
+        """
+        # Long words first: they narrow the candidate set the most
+        words = sorted(query.lower().split(), key=len, reverse=True)
+        if not words:
+            return []
+        with self._lock:
+            candidates = None
+            fuzzy_hits = {}
+            for word in words:
+                if len(word) < 3:
+                    pool = self._docs if candidates is None else candidates
+                    matches = {doc_id for doc_id in pool
+                               if word in self._docs[doc_id][1] or word in self._docs[doc_id][2]}
+                else:
+                    matches = self._exact_matches(word)
+                    if not matches:
+                        matches = self._fuzzy_matches(word, fuzzy_hits)
+                candidates = matches if candidates is None else candidates & matches
+                if not candidates:
+                    return []
+
+            ranked = self._rank(' '.join(words[::-1]), candidates, fuzzy_hits, limit)
+            return [self._docs[doc_id][0] for doc_id in ranked]
+
+    def _rank(self, phrase, candidates, fuzzy_hits, limit):
+        # Caller must hold self._lock. Ranking is tiered so that large result
+        # sets are ordered with C-level sorts on precomputed keys:
+        # names starting with the query, names containing it, then the rest.
+        names = self._names
+        order = self._order.__getitem__
+        in_name = [doc_id for doc_id in candidates if phrase in names[doc_id]]
+        prefix = [doc_id for doc_id in in_name if names[doc_id].startswith(phrase)]
+        tiers = [prefix, set(in_name).difference(prefix), candidates.difference(in_name)]
+
+        ranked = []
+        for tier, docs in enumerate(tiers):
+            wanted = limit - len(ranked) if limit else None
+            if wanted is not None and wanted <= 0:
+                break
+            if tier == 2 and fuzzy_hits:
+                key = lambda doc_id: (-fuzzy_hits.get(doc_id, 0), order(doc_id))
+            else:
+                key = order
+            if wanted is not None and wanted < len(docs):
+                ranked.extend(heapq.nsmallest(wanted, docs, key=key))
+            else:
+                ranked.extend(sorted(docs, key=key))
+        return ranked
+
+    def _exact_matches(self, word):
+        # Caller must hold self._lock
+        postings = sorted((self._postings.get(gram, ()) for gram in trigrams(word)), key=len)
+        if not postings[0]:
+            return set()
+        return postings[0].intersection(*postings[1:])
+
+    def _fuzzy_matches(self, word, hits):
+        # Caller must hold self._lock
+        grams = trigrams(word)
+        required = max(1, len(grams) - max(1, int(len(grams) * MISS_RATIO)))
+        postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+        # A doc sharing `required` trigrams must appear in at least one of
+        # the len(grams) - required + 1 smallest posting lists
+        candidates = set().union(*postings[:len(grams) - required + 1])
+        matches = set()
+        for doc_id in candidates:
+            count = len(grams & self._docs[doc_id][3])
+            if count >= required:
+                matches.add(doc_id)
+                hits[doc_id] = hits.get(doc_id, 0) + count
+        return matches
+
+    def _remove(self, name):
+        # Caller must hold self._lock
+        doc_id = self._ids.pop(name, None)
+        if doc_id is None:
+            return
+        grams = self._docs.pop(doc_id)[3]
+        del self._names[doc_id]
+        del self._order[doc_id]
+        for gram in grams:
+            posting = self._postings[gram]
+            posting.discard(doc_id)
+            if not posting:
+                del self._postings[gram]
@@ -0,0 +1,183 @@
+"""
+Application settings for Script Runner Pro.
+
+Settings live in a small JSON file inside the per-user data directory so
+they survive independently of the script catalog.
+"""
+
+import json
+import os
+import platform
+from pathlib import Path
+
+from .store import atomic_write_text
+
+DEFAULT_SETTINGS = {
+    # Number of scripts allowed to run at the same time (None = CPU count)
+    "max_workers": None,
+    # Lines kept in memory per output tab; older output stays in the run log
+    "console_max_lines": 5000,
+    # Prefix live output lines with the time they arrived
+    "console_timestamps": True,
+    # Encoding of script output (None = the system's preferred encoding)
+    "output_encoding": None,
+    # Number of per-run log files kept on disk
+    "max_log_files": 200,
+    # Script catalog location (None = scripts.json in the launch directory);
+    # a .db/.sqlite path selects the SQLite backend
+    "catalog_path": None,
+    # Also search inside script files, not just their catalog fields
+    "search_contents": False,
+    # Run history: keep the compressed tail of each run's output, and
+    # delete runs older than max_age_days or beyond max_mb in total
+    "history_enabled": True,
+    "history_store_output": True,
+    "history_max_output_kb": 1024,
+    "history_max_age_days": 90,
+    "history_max_mb": 500,
+    # Warm pool: run Python scripts in pre-started interpreters (POSIX only).
+    # Workers are recycled after max_runs scripts or max_rss_mb of memory;
+    # preload maps a category to modules imported ahead of its scripts
+    "warm_pool_enabled": False,
+    "warm_pool_size": 2,
+    "warm_pool_max_runs": 50,
+    "warm_pool_max_rss_mb": 256,
+    "warm_pool_preload": {},
+    # Result cache for scripts marked "cache" in the catalog; least recently
+    # used results are deleted beyond max_mb
+    "result_cache_max_mb": 500,
+    # Directories whose script files are kept in the catalog automatically,
+    # as [{"path": ..., "category": ...}]. Changes are picked up from file
+    # system notifications, or by polling every watch_poll_interval_s where
+    # those aren't available (or watch_polling is set, e.g. for network drives)
+    "watched_directories": [],
+    "watch_polling": False,
+    "watch_poll_interval_s": 5,
+    # Worker agents ("host:port") that runs are dispatched to instead of
+    # running locally, and the token they expect (see remote.py). The
+    # SCRIPT_RUNNER_AGENT_TOKEN environment variable overrides the token
+    "remote_agents": [],
+    "remote_agent_token": None,
+    # Process monitor (Tools > Process Monitor, Linux): seconds between
+    # samples of the running scripts' process trees, and samples kept for
+    # each sparkline
+    "monitor_interval_s": 1,
+    "monitor_history": 60,
+    # Log archive: compress the log of every finished run into an indexed
+    # archive ("auto" uses zstd when the zstandard package is installed,
+    # else gzip), and delete archives older than max_age_days or beyond
+    # max_mb in total
+    "archive_enabled": True,
+    "archive_codec": "auto",
+    "archive_max_age_days": 365,
+    "archive_max_mb": 2000,
+}
+
+
+def app_data_dir():
+    """Return the per-user data directory, creating it if needed."""
+    override = os.environ.get("SCRIPT_RUNNER_HOME")
+    if override:
+        path = Path(override)
+    elif platform.system() == "Windows":
+        path = Path(os.environ.get("APPDATA", Path.home())) / "ScriptRunnerPro"
+    else:
+        path = Path.home() / ".script_runner_pro"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def log_dir():
+    path = app_data_dir() / "logs"
+    path.mkdir(exist_ok=True)
+    return path
+
+
+def archive_dir():
+    path = app_data_dir() / "archive"
+    path.mkdir(exist_ok=True)
+    return path
+
+
+def history_path():
+    return app_data_dir() / "history.db"
+
+
+def schedule_state_path():
+    """Last fire time of every schedule, kept for missed-run catch-up."""
+    return app_data_dir() / "schedule_state.json"
+
+
+def open_history(settings):
+    """Open the run history database, or return None if it is disabled."""
+    if not settings.get("history_enabled"):
+        return None
+    from .history import RunHistory
+    return RunHistory(str(history_path()),
+                      store_output=settings.get("history_store_output", True),
+                      max_output_bytes=settings.get("history_max_output_kb", 1024) * 1024)
+
+
+def open_archive(settings, enabled_only=True):
+    """Open the log archive, or return None if it is disabled.
+
+    With enabled_only=False it is opened anyway, for reading.
+    """
+    if enabled_only and not settings.get("archive_enabled"):
+        return None
+    from .archive import LogArchive
+    return LogArchive(str(archive_dir()), log_dir=str(log_dir()),
+                      codec=settings.get("archive_codec") or "auto")
+
+
+def open_warm_pool(settings):
+    """Create the warm Python pool, or return None if disabled or unsupported."""
+    from .warmpool import WarmPool, warm_pool_supported
+    if not settings.get("warm_pool_enabled") or not warm_pool_supported():
+        return None
+    return WarmPool(size=settings.get("warm_pool_size", 2),
+                    max_runs=settings.get("warm_pool_max_runs", 50),
+                    max_rss=settings.get("warm_pool_max_rss_mb", 256) * 1024 * 1024,
+                    preload=settings.get("warm_pool_preload"))
+
+
+def open_result_cache(settings):
+    """Open the result cache used by scripts that opt in to caching."""
+    from .cache import ResultCache
+    return ResultCache(str(app_data_dir() / "cache"),
+                       max_bytes=settings.get("result_cache_max_mb", 500) * 1024 * 1024)
+
+
+def agent_token(settings=None):
+    return os.environ.get("SCRIPT_RUNNER_AGENT_TOKEN") or (settings or {}).get("remote_agent_token")
+
+
+def open_remote_pool(settings, agents=None):
+    """Create the pool of worker agents; runs stay local while it has none.
+
+    agents overrides the configured list.
+    """
+    from .remote import RemotePool
+    return RemotePool(settings.get("remote_agents") or [] if agents is None else agents,
+                      token=agent_token(settings))
+
+
+def settings_path():
+    return app_data_dir() / "settings.json"
+
+
+def load_settings():
+    """Load settings, falling back to defaults for missing or broken values."""
+    settings = dict(DEFAULT_SETTINGS)
+    try:
+        with open(settings_path(), 'r', encoding='utf-8') as file:
+            stored = json.load(file)
+        if isinstance(stored, dict):
+            settings.update(stored)
+    except (OSError, ValueError):
+        pass
+    return settings
+
+
+def save_settings(settings):
+    atomic_write_text(settings_path(), json.dumps(settings, indent=2))
@@ -0,0 +1,87 @@
+"""
+Per-run resource statistics for Script Runner Pro.
+
+The engine records wall time, CPU time, peak memory and output volume for
+every run (CPU time comes from wait4() and peak memory from /proc and
+wait4(), so they are only available on POSIX systems; see engine.py).
+This module formats those numbers and exports them as JSON or CSV.
+"""
+
+import csv
+import json
+import os
+import sys
+import time
+
+RUN_STAT_FIELDS = [
+    "run_id", "name", "exit_code", "started_at", "ended_at", "duration",
+    "cpu_user", "cpu_system", "max_rss", "output_bytes", "agent", "timed_out", "metrics",
+]
+
+
+def rusage_max_rss(rusage):
+    """ru_maxrss in bytes (Linux reports KiB, macOS bytes)."""
+    if sys.platform == "darwin":
+        return rusage.ru_maxrss
+    return rusage.ru_maxrss * 1024
+
+
+def own_max_rss():
+    """Peak RSS of this process in bytes (POSIX)."""
+    import resource
+    return rusage_max_rss(resource.getrusage(resource.RUSAGE_SELF))
+
+
+def process_max_rss(pid):
+    """Peak RSS (VmHWM) of a running process in bytes, or None (Linux only)."""
+    try:
+        with open(f'/proc/{pid}/status', 'rb') as file:
+            for line in file:
+                if line.startswith(b'VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def format_bytes(count):
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1024 or unit == "GB":
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+
+
+def format_stats(stats):
+    """One-line human readable summary of a run's statistics."""
+    parts = []
+    if stats.get("duration") is not None:
+        parts.append(f"{stats['duration']:.2f} s wall")
+    if stats.get("cpu_user") is not None:
+        parts.append(f"{stats['cpu_user']:.2f} s user")
+        parts.append(f"{stats['cpu_system']:.2f} s sys")
+    if stats.get("max_rss") is not None:
+        parts.append(f"{format_bytes(stats['max_rss'])} peak RSS")
+    if stats.get("output_bytes") is not None:
+        parts.append(f"{format_bytes(stats['output_bytes'])} output")
+    if stats.get("agent"):
+        parts.append(f"on {stats['agent']}")
+    return ", ".join(parts)
+
+
+def format_timestamp(timestamp):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp)) if timestamp else ""
+
+
+def export_stats(stats_list, path):
+    """Write run statistics to path; the extension picks CSV or JSON."""
+    if os.path.splitext(path)[1].lower() == ".csv":
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=RUN_STAT_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for stats in stats_list:
+                if stats.get("metrics"):
+                    stats = dict(stats, metrics=json.dumps(stats["metrics"]))
+                writer.writerow(stats)
+    else:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(list(stats_list), file, indent=2)
@@ -0,0 +1,187 @@
+"""
+Script catalog persistence for Script Runner Pro.
+
+Edits are recorded in memory and written out by flush(), so a burst of
+keystrokes costs one write. Two backends are available:
+
+- JsonCatalogStore keeps the classic scripts.json format and rewrites it
+  atomically (temp file + rename) on flush.
+- SqliteCatalogStore keeps one row per script, so a flush only touches the
+  entries that actually changed.
+
+open_store() picks the backend from the file extension.
+"""
+
+import abc
+import json
+import os
+import sqlite3
+import tempfile
+
+from .catalog_io import read_catalog
+
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+
+def default_catalog_path(settings=None):
+    """Resolve the catalog location once, so later chdirs don't move it."""
+    path = os.environ.get('SCRIPT_RUNNER_CATALOG')
+    if not path and settings:
+        path = settings.get('catalog_path')
+    return os.path.abspath(path or 'scripts.json')
+
+
+def open_store(path):
+    if path.lower().endswith(SQLITE_SUFFIXES):
+        return SqliteCatalogStore(path)
+    return JsonCatalogStore(path)
+
+
+def atomic_write_text(path, text, encoding='utf-8'):
+    """Write text to path so readers see either the old or the new file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding, newline='\n') as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def dump_catalog(data):
+    """Serialize a catalog as JSON with one script per line.
+
+    Encoding each entry compactly keeps json on its C fast path (indent=2
+    forces the pure-Python encoder) while the file stays easy to read.
+    """
+    if not data:
+        return '{}\n'
+    lines = [f'  {json.dumps(name)}: {json.dumps(info)}' for name, info in data.items()]
+    return '{\n' + ',\n'.join(lines) + '\n}\n'
+
+
+class CatalogStore(abc.ABC):
+    """Base class: an in-memory catalog plus a record of unsaved edits."""
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {}
+
+    @abc.abstractmethod
+    def load(self):
+        """Read the catalog and return the live name -> info dict."""
+
+    def put(self, name, info):
+        self.data[name] = info
+        self._changed(name)
+
+    def delete(self, name):
+        if self.data.pop(name, None) is not None:
+            self._changed(name)
+
+    def rename(self, old_name, new_name):
+        info = self.data.pop(old_name)
+        self.data[new_name] = info
+        self._changed(old_name)
+        self._changed(new_name)
+
+    def touch(self, name):
+        """Record that the info dict for name was modified in place."""
+        self._changed(name)
+
+    @property
+    @abc.abstractmethod
+    def dirty(self):
+        """Whether there are edits flush() has yet to write."""
+
+    @abc.abstractmethod
+    def flush(self):
+        """Write the unsaved edits."""
+
+    def close(self):
+        self.flush()
+
+    @abc.abstractmethod
+    def _changed(self, name):
+        """Record that the entry for name was added, changed or removed."""
+
+
+class JsonCatalogStore(CatalogStore):
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._dirty = False
+
+    def load(self):
+        try:
+            # Streamed, so a huge catalog never sits in memory twice
+            self.data = dict(read_catalog(self.path, 'json'))
+        except FileNotFoundError:
+            # Create an empty catalog on first run
+            self.data = {}
+            self._dirty = True
+            self.flush()
+        return self.data
+
+    @property
+    def dirty(self):
+        return self._dirty
+
+    def flush(self):
+        if self._dirty:
+            atomic_write_text(self.path, dump_catalog(self.data))
+            self._dirty = False
+
+    def _changed(self, name):
+        self._dirty = True
+
+
+class SqliteCatalogStore(CatalogStore):
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._pending = set()
+        # The store may be opened on a loader thread and used on the GUI thread
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS scripts ("
+            " name TEXT PRIMARY KEY,"
+            " info TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+    def load(self):
+        self.data = {name: json.loads(info)
+                     for name, info in self._db.execute("SELECT name, info FROM scripts")}
+        self._pending.clear()
+        return self.data
+
+    @property
+    def dirty(self):
+        return bool(self._pending)
+
+    def flush(self):
+        if not self._pending:
+            return
+        upserts = [(name, json.dumps(self.data[name]))
+                   for name in self._pending if name in self.data]
+        deletes = [(name,) for name in self._pending if name not in self.data]
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO scripts (name, info) VALUES (?, ?)", upserts)
+            self._db.executemany("DELETE FROM scripts WHERE name = ?", deletes)
+        self._pending.clear()
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+    def _changed(self, name):
+        self._pending.add(name)
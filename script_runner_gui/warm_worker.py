@@ -0,0 +1,202 @@
+"""
+Warm Python worker for Script Runner Pro.
+
+Started by WarmPool (see warmpool.py) as
+
+    python warm_worker.py <control fd> [module ...]
+
+The worker imports the listed modules once, then runs scripts with runpy
+for as long as the pool keeps it. Jobs arrive on the control socket as one
+JSON line each, together with the write ends of the run's stdout and
+stderr pipes (SCM_RIGHTS); those are installed as fd 1 and 2 for the
+duration of the job, so the script's output - including that of any
+children it starts - streams to the engine exactly as from a cold process.
+The reply is one JSON line with the exit code and resource usage. The
+peak RSS of a job is the worker's own during that job: on Linux the peak
+is reset before each job; elsewhere it is only known when the job raised
+the worker's lifetime peak, and is null otherwise.
+
+This file is run by path and must not import anything from the package.
+"""
+
+import array
+import importlib
+import json
+import os
+import resource
+import runpy
+import socket
+import sys
+import traceback
+
+MAX_MESSAGE = 1024 * 1024
+
+
+def max_rss_bytes():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def reset_peak_rss():
+    """Reset this process's peak RSS (VmHWM); False if unsupported (Linux only)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_bytes():
+    """VmHWM of this process in bytes, or None."""
+    try:
+        with open('/proc/self/status', 'rb') as file:
+            for line in file:
+                if line.startswith(b'VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def receive_job(sock):
+    """Return (job, fds) for the next request, or (None, []) at EOF."""
+    fds = array.array('i')
+    data = b''
+    while not data.endswith(b'\n'):
+        chunk, ancdata, _, _ = sock.recvmsg(MAX_MESSAGE, socket.CMSG_LEN(2 * fds.itemsize))
+        if not chunk:
+            return None, []
+        data += chunk
+        for level, kind, payload in ancdata:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                fds.frombytes(payload[:len(payload) - len(payload) % fds.itemsize])
+    return json.loads(data), list(fds)
+
+
+def print_script_traceback(exc):
+    """Print a traceback that starts in the script, as a cold run would."""
+    own_files = (os.path.abspath(__file__), runpy.__file__)
+    tb = exc.__traceback__
+    while tb is not None:
+        filename = tb.tb_frame.f_code.co_filename
+        if filename not in own_files and not filename.startswith('<frozen'):
+            break
+        tb = tb.tb_next
+    traceback.print_exception(type(exc), exc, tb)
+
+
+def exit_code(exc):
+    code = exc.code
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def run_job(job, out_fd, err_fd):
+    path = job["path"]
+    script_dir = os.path.dirname(os.path.abspath(path))
+    saved = (os.getcwd(), dict(os.environ), sys.argv, list(sys.path),
+             sys.stdin, sys.stdout, sys.stderr)
+    known_modules = set(sys.modules)
+
+    os.dup2(out_fd, 1)
+    os.dup2(err_fd, 2)
+    os.close(out_fd)
+    os.close(err_fd)
+    # Fresh streams buffered like a cold interpreter's on a pipe: stdout in
+    # blocks, stderr by line
+    sys.stdout = open(1, 'w', encoding=saved[5].encoding, errors=saved[5].errors, closefd=False)
+    sys.stderr = open(2, 'w', encoding=saved[6].encoding, errors='backslashreplace',
+                      buffering=1, closefd=False)
+    job_streams = (sys.stdout, sys.stderr)
+    try:
+        if job.get("cwd"):
+            os.chdir(job["cwd"])
+        if job.get("env") is not None:
+            os.environ.clear()
+            os.environ.update(job["env"])
+        sys.argv = [path] + list(job.get("args") or [])
+        # As for `python script.py`, the script's directory comes first
+        sys.path.insert(0, script_dir)
+        try:
+            # A fresh globals dict per run, named __main__
+            runpy.run_path(path, run_name="__main__")
+            code = 0
+        except SystemExit as e:
+            code = exit_code(e)
+        except BaseException as e:
+            print_script_traceback(e)
+            code = 1
+    finally:
+        # The script may have replaced the streams; flush ours and theirs
+        for stream in {sys.stdout, sys.stderr} | set(job_streams):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+        cwd, environ, sys.argv, sys.path, sys.stdin, sys.stdout, sys.stderr = saved
+        # Closing our copies of the pipes signals EOF to the engine
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, 1)
+        os.dup2(devnull, 2)
+        os.close(devnull)
+        os.chdir(cwd)
+        if os.environ != environ:
+            os.environ.clear()
+            os.environ.update(environ)
+        # Forget the script's own modules so a different script's
+        # same-named helper isn't served from the cache
+        prefix = script_dir + os.sep
+        for name in set(sys.modules) - known_modules:
+            module_file = getattr(sys.modules[name], '__file__', None) or ''
+            if module_file.startswith(prefix):
+                del sys.modules[name]
+    return code
+
+
+def main(argv):
+    sock = socket.socket(fileno=int(argv[1]))
+    sock.setblocking(True)
+    # Our own directory must not shadow the scripts' imports
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path[:] = [entry for entry in sys.path if os.path.abspath(entry or '.') != here]
+    for module in argv[2:]:
+        try:
+            importlib.import_module(module)
+        except Exception:
+            # A missing preload only costs warmth; the script reports its own error
+            pass
+    sock.sendall(json.dumps({"ready": os.getpid()}).encode() + b'\n')
+
+    while True:
+        job, fds = receive_job(sock)
+        if job is None:
+            return 0
+        reset = reset_peak_rss()
+        lifetime_peak = max_rss_bytes()
+        before = resource.getrusage(resource.RUSAGE_SELF)
+        code = run_job(job, fds[0], fds[1])
+        after = resource.getrusage(resource.RUSAGE_SELF)
+        if reset:
+            run_peak = peak_rss_bytes()
+        elif max_rss_bytes() > lifetime_peak:
+            run_peak = max_rss_bytes()
+        else:
+            # Below an earlier job's peak, so this job's own is unknown
+            run_peak = None
+        reply = {
+            "exit_code": code,
+            "cpu_user": after.ru_utime - before.ru_utime,
+            "cpu_system": after.ru_stime - before.ru_stime,
+            "max_rss": max_rss_bytes(),
+            "run_max_rss": run_peak,
+        }
+        sock.sendall(json.dumps(reply).encode() + b'\n')
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,241 @@
+"""
+Warm Python interpreter pool for Script Runner Pro.
+
+Starting a Python interpreter and its site imports takes far longer than
+many small utility scripts run for. The pool keeps interpreters running
+(warm_worker.py) and hands them scripts to execute with runpy, so a launch
+costs a message on a socket instead of a process start.
+
+Workers can pre-import modules per catalog category, so e.g. every "Data"
+script finds pandas already loaded. A worker is recycled after max_runs
+scripts or once its peak RSS passes max_rss, since scripts may leave
+state behind in the interpreter.
+
+The pool runs on the engine's event loop and needs POSIX fd passing; on
+other platforms open_warm_pool() in settings.py returns None and Python
+scripts start cold as before.
+"""
+
+import array
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'warm_worker.py')
+
+
+def warm_pool_supported():
+    return os.name == 'posix' and hasattr(socket, 'AF_UNIX') and hasattr(socket, 'SCM_RIGHTS')
+
+
+class _Worker:
+    """One warm interpreter and the parent's end of its control socket."""
+
+    def __init__(self, process, sock, modules):
+        self.process = process
+        self.sock = sock
+        self.modules = modules
+        self.runs = 0
+        self.buffer = b''
+
+    async def receive(self, loop):
+        """Next JSON message from the worker, or None if it went away."""
+        while b'\n' not in self.buffer:
+            try:
+                chunk = await loop.sock_recv(self.sock, 65536)
+            except OSError:
+                chunk = b''
+            if not chunk:
+                return None
+            self.buffer += chunk
+        line, self.buffer = self.buffer.split(b'\n', 1)
+        return json.loads(line)
+
+    def send_job(self, job, fds):
+        data = json.dumps(job).encode() + b'\n'
+        ancillary = [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', fds))]
+        sent = self.sock.sendmsg([data], ancillary)
+        if sent < len(data):
+            # The fds went with the first part; the rest is plain data
+            self.sock.setblocking(True)
+            try:
+                self.sock.sendall(data[sent:])
+            finally:
+                self.sock.setblocking(False)
+
+    def kill(self):
+        if self.process.returncode is None:
+            try:
+                os.kill(self.process.pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+    def close(self):
+        # The worker exits when it sees EOF on the control socket
+        self.sock.close()
+
+
+class WarmPool:
+    """Keeps `size` warm interpreters per preload set.
+
+    When more scripts run at once than there are workers, extra workers are
+    started for the burst and retired once it is over.
+    """
+
+    def __init__(self, size=2, max_runs=50, max_rss=256 * 1024 * 1024, preload=None,
+                 python=None):
+        self.size = max(1, size)
+        self.max_runs = max(1, max_runs)
+        self.max_rss = max_rss
+        self.preload = preload or {}
+        self.python = python or sys.executable
+        self.loop = None
+        self.idle = {}      # modules tuple -> [_Worker]
+        self.busy = {}      # modules tuple -> number of workers running a script
+        self.starting = {}  # modules tuple -> number of workers being started
+        self.closed = False
+
+    def modules_for(self, category):
+        return tuple(self.preload.get(category) or ())
+
+    def start(self, loop):
+        """Attach to the engine's loop and warm up the default workers."""
+        self.loop = loop
+        loop.call_soon_threadsafe(self._top_up, ())
+
+    async def run(self, run, sink, job):
+        """Run job (path/args/cwd/env) for a ScriptRun; returns its exit code."""
+        modules = self.modules_for(run.category)
+        out_read, out_write = os.pipe()
+        err_read, err_write = os.pipe()
+        try:
+            worker = await self._send(modules, job, [out_write, err_write])
+        except BaseException:
+            os.close(out_read)
+            os.close(err_read)
+            raise
+        finally:
+            os.close(out_write)
+            os.close(err_write)
+        run.process = worker.process
+        if run.cancel_requested:
+            worker.kill()
+
+        try:
+            closed = []
+            for stream, fd in (("stdout", out_read), ("stderr", err_read)):
+                closed.append(await sink.watch_pipe(stream, os.fdopen(fd, 'rb', buffering=0)))
+            reply = await worker.receive(self.loop)
+            await asyncio.gather(*closed)
+        finally:
+            self.busy[modules] -= 1
+        worker.runs += 1
+
+        if reply is None:
+            # The worker died mid-run (cancelled, crashed or os._exit)
+            await self._retire(worker)
+            return worker.process.returncode
+        run.cpu_user = reply["cpu_user"]
+        run.cpu_system = reply["cpu_system"]
+        run.max_rss = reply["run_max_rss"]
+        # Recycling goes by the worker's own peak, which may predate this run
+        self._release(worker, reply["max_rss"])
+        return reply["exit_code"]
+
+    def close(self):
+        """Stop all idle workers; must be called on the pool's loop."""
+        self.closed = True
+        for workers in self.idle.values():
+            for worker in workers:
+                worker.close()
+        self.idle.clear()
+
+    async def _send(self, modules, job, fds):
+        # An idle worker may have died since it was parked; fall back to a
+        # fresh one if handing it the job fails
+        workers = self.idle.get(modules)
+        while workers:
+            worker = workers.pop()
+            try:
+                worker.send_job(job, fds)
+            except OSError:
+                self.loop.create_task(self._retire(worker))
+                continue
+            self.busy[modules] = self.busy.get(modules, 0) + 1
+            return worker
+        worker = await self._spawn(modules)
+        try:
+            worker.send_job(job, fds)
+        except OSError:
+            self.loop.create_task(self._reap(worker))
+            raise
+        self.busy[modules] = self.busy.get(modules, 0) + 1
+        return worker
+
+    async def _spawn(self, modules):
+        parent_sock, child_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            process = subprocess.Popen(
+                [self.python, WORKER_SCRIPT, str(child_sock.fileno())] + list(modules),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                pass_fds=(child_sock.fileno(),)
+            )
+        finally:
+            child_sock.close()
+        parent_sock.setblocking(False)
+        worker = _Worker(process, parent_sock, modules)
+        if await worker.receive(self.loop) is None:
+            await self._reap(worker)
+            raise RuntimeError(f"Warm Python worker exited during startup "
+                               f"(exit code {worker.process.returncode})")
+        return worker
+
+    def _release(self, worker, max_rss):
+        idle = self.idle.setdefault(worker.modules, [])
+        if (self.closed or worker.runs >= self.max_runs or max_rss > self.max_rss
+                or self._count(worker.modules) >= self.size):
+            self.loop.create_task(self._retire(worker))
+        else:
+            idle.append(worker)
+
+    def _count(self, modules):
+        return (len(self.idle.get(modules, ())) + self.busy.get(modules, 0)
+                + self.starting.get(modules, 0))
+
+    async def _retire(self, worker):
+        await self._reap(worker)
+        self._top_up(worker.modules)
+
+    async def _reap(self, worker):
+        worker.close()
+        await self.loop.run_in_executor(None, worker.process.wait)
+
+    def _top_up(self, modules):
+        """Start workers until this preload set has `size` of them.
+
+        Only the default set is warmed ahead of demand; other sets are
+        started by their first script and kept warm from then on.
+        """
+        if self.closed or (modules and modules not in self.idle):
+            return
+        for _ in range(self.size - self._count(modules)):
+            self.starting[modules] = self.starting.get(modules, 0) + 1
+            self.loop.create_task(self._add_idle(modules))
+
+    async def _add_idle(self, modules):
+        try:
+            worker = await self._spawn(modules)
+        except Exception:
+            return
+        finally:
+            self.starting[modules] -= 1
+        if self.closed or self._count(modules) >= self.size:
+            await self._reap(worker)
+        else:
+            self.idle.setdefault(modules, []).append(worker)
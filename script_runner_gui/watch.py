@@ -0,0 +1,271 @@
+"""
+Watched script directories for Script Runner Pro.
+
+Every script file (by extension, see commands.EXTENSION_TYPES) below a
+watched directory is kept in the catalog: new files are added, deleted ones
+removed and moved or renamed ones re-pointed, keeping their settings.
+
+DirectoryIndex remembers the scripts and the modification time of every
+directory below a root. The initial scan walks the tree with a thread pool;
+afterwards only the directories reported as changed (by a file system
+watcher, or by polling their modification times) are listed again.
+Renames are recognised by file id (inode, mtime and size), so a move
+between two directories of the same batch is a move, not a delete plus an
+add.
+
+Nothing here depends on Qt; the GUI drives it from a worker thread.
+"""
+
+import concurrent.futures
+import os
+from pathlib import Path
+
+from .commands import EXTENSION_TYPES, detect_script_type
+
+# Directory names never descended into
+SKIP_DIRS = {'__pycache__', 'node_modules', 'site-packages', 'venv', '.venv', 'env'}
+
+
+def path_key(path):
+    """Comparable form of a path (absolute, case-folded where the OS is)."""
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _skip_dir(name):
+    return name.startswith('.') or name in SKIP_DIRS
+
+
+def _file_id(entry):
+    """Identity of a file that survives renames, or None if the OS has none.
+
+    Inodes are reused as soon as a file is deleted, so the modification time
+    and size (both kept by a rename) must match as well.
+    """
+    inode = entry.inode()
+    if not inode:
+        return None
+    stat = entry.stat()
+    return inode, stat.st_mtime_ns, stat.st_size
+
+
+def _scan_dir(path):
+    """List one directory: ({script path: file id}, [subdirs], mtime_ns).
+
+    Returns None if the directory can't be read (e.g. it was just removed).
+    """
+    files = {}
+    subdirs = []
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        with os.scandir(path) as scan:
+            for entry in scan:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not _skip_dir(entry.name):
+                            subdirs.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in EXTENSION_TYPES:
+                        if entry.is_file():
+                            files[entry.path] = _file_id(entry)
+                except OSError:
+                    continue
+    except OSError:
+        return None
+    return files, subdirs, mtime
+
+
+def scan_tree(root, workers=None):
+    """Scan root recursively; returns ({dir: {script: file id}}, {dir: mtime_ns}).
+
+    Directories are listed in parallel: scandir spends its time in system
+    calls that release the GIL, so a thread pool overlaps the disk waits.
+    """
+    files = {}
+    mtimes = {}
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)
+    with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+        pending = {pool.submit(_scan_dir, root): root}
+        while pending:
+            done, _ = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                result = future.result()
+                if result is None:
+                    continue
+                dir_files, subdirs, mtime = result
+                files[path] = dir_files
+                mtimes[path] = mtime
+                for subdir in subdirs:
+                    pending[pool.submit(_scan_dir, subdir)] = subdir
+    return files, mtimes
+
+
+class Changes:
+    """Script files added, removed and renamed ((old, new) pairs) under a root."""
+
+    def __init__(self, added=None, removed=None, renamed=None):
+        self.added = added or []
+        self.removed = removed or []
+        self.renamed = renamed or []
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.renamed)
+
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.renamed)
+
+
+def diff_files(old, new):
+    """Compare two {path: file id} maps of the same region."""
+    removed = {path: file_id for path, file_id in old.items() if path not in new}
+    by_id = {file_id: path for path, file_id in removed.items() if file_id}
+    added = []
+    renamed = []
+    for path, file_id in new.items():
+        if path in old:
+            continue
+        old_path = by_id.pop(file_id, None) if file_id else None
+        if old_path is None:
+            added.append(path)
+        else:
+            renamed.append((old_path, path))
+            del removed[old_path]
+    return Changes(sorted(added), sorted(removed), renamed)
+
+
+class DirectoryIndex:
+    """The script files below one watched root, grouped by directory."""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.files = {}   # dir -> {script path: file id}
+        self.mtimes = {}  # dir -> mtime_ns
+
+    @property
+    def file_count(self):
+        return sum(len(files) for files in self.files.values())
+
+    def all_files(self):
+        return [path for files in self.files.values() for path in files]
+
+    def scan(self):
+        """Full scan; returns the changes since the previous one."""
+        old = {path: file_id for files in self.files.values() for path, file_id in files.items()}
+        self.files, self.mtimes = scan_tree(self.root)
+        new = {path: file_id for files in self.files.values() for path, file_id in files.items()}
+        return diff_files(old, new)
+
+    def rescan(self, dirs):
+        """List only dirs again (new subdirectories are scanned whole)."""
+        old = {}
+        new = {}
+        stack = [os.path.abspath(path) for path in dirs]
+        seen = set()
+        while stack:
+            path = stack.pop()
+            if path in seen or not self._contains(path):
+                continue
+            seen.add(path)
+            old.update(self.files.pop(path, {}))
+            self.mtimes.pop(path, None)
+            result = _scan_dir(path)
+            if result is None:
+                # Gone: forget everything that was below it
+                prefix = path + os.sep
+                for subdir in [d for d in self.files if d.startswith(prefix)]:
+                    old.update(self.files.pop(subdir))
+                    self.mtimes.pop(subdir, None)
+                continue
+            dir_files, subdirs, mtime = result
+            self.files[path] = dir_files
+            self.mtimes[path] = mtime
+            new.update(dir_files)
+            for subdir in subdirs:
+                if subdir not in self.files:
+                    tree_files, tree_mtimes = scan_tree(subdir)
+                    self.files.update(tree_files)
+                    self.mtimes.update(tree_mtimes)
+                    for files in tree_files.values():
+                        new.update(files)
+            # Subdirectories that disappeared from this listing
+            known = {d for d in self.files if os.path.dirname(d) == path}
+            stack.extend(known - set(subdirs))
+        return diff_files(old, new)
+
+    def changed_dirs(self):
+        """Directories whose modification time changed, for polling."""
+        changed = []
+        for path, mtime in list(self.mtimes.items()):
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    changed.append(path)
+            except OSError:
+                changed.append(path)
+        return changed
+
+    def _contains(self, path):
+        return path == self.root or path.startswith(self.root.rstrip(os.sep) + os.sep)
+
+
+def _unique_name(catalog, path):
+    stem = Path(path).stem
+    if stem not in catalog:
+        return stem
+    name = f"{stem} ({Path(path).parent.name})"
+    number = 2
+    candidate = name
+    while candidate in catalog:
+        candidate = f"{name} {number}"
+        number += 1
+    return candidate
+
+
+def sync_catalog(store, root, changes, category='', full=False):
+    """Apply Changes under root to a catalog store.
+
+    With full=True, changes.added lists every script currently under root:
+    missing ones are added and catalog entries under root whose file is gone
+    are removed. Returns {"added": [names], "removed": [names],
+    "renamed": [(old name, new name)], "updated": [names]}.
+    """
+    catalog = store.data
+    by_path = {path_key(info['path']): name for name, info in catalog.items() if info.get('path')}
+    result = {"added": [], "removed": [], "renamed": [], "updated": []}
+
+    removed = list(changes.removed)
+    if full:
+        present = {path_key(path) for path in changes.added}
+        prefix = path_key(root).rstrip(os.sep) + os.sep
+        removed.extend(path for path in by_path
+                       if path.startswith(prefix) and path not in present)
+    for path in removed:
+        name = by_path.pop(path_key(path), None)
+        if name is not None and name in catalog:
+            store.delete(name)
+            result["removed"].append(name)
+
+    for old_path, new_path in changes.renamed:
+        name = by_path.pop(path_key(old_path), None)
+        if name is None or name not in catalog:
+            changes.added.append(new_path)
+            continue
+        catalog[name]['path'] = new_path
+        store.touch(name)
+        new_name = name
+        if name == Path(old_path).stem and Path(new_path).stem != name:
+            # Automatically named after the file; follow the file's new name
+            new_name = _unique_name(catalog, new_path)
+            store.rename(name, new_name)
+            result["renamed"].append((name, new_name))
+        else:
+            result["updated"].append(name)
+        by_path[path_key(new_path)] = new_name
+
+    for path in changes.added:
+        if path_key(path) in by_path:
+            continue
+        name = _unique_name(catalog, path)
+        store.put(name, {'path': path, 'type': detect_script_type(path), 'category': category})
+        by_path[path_key(path)] = name
+        result["added"].append(name)
+    return result
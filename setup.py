@@ -19,7 +19,7 @@ setup(
     long_description=read_readme(),
     long_description_content_type="text/markdown",
     url="https://github.com/Tuhin-SnapD/ScriptRunnerPro",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: End Users/Desktop",
@@ -38,9 +38,14 @@ setup(
     install_requires=[
         "PyQt5>=5.15.0",
     ],
+    extras_require={
+        # Log archives compressed with zstd instead of gzip
+        "zstd": ["zstandard"],
+    },
     entry_points={
         "console_scripts": [
             "script-runner-pro=script_runner_gui:main",
+            "script-runner=script_runner_gui.cli:main",
         ],
     },
     include_package_data=True,